@@ -40,6 +40,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'orders.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -47,6 +48,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'orders.routers.ReplicaStickinessMiddleware',
 ]
 
 ROOT_URLCONF = 'cafe_management_system.urls'
@@ -84,6 +86,13 @@ DATABASES = {
     }
 }
 
+# Read replica of `default`. It points at the primary as a stand-in; set HOST to a streaming replica in production.
+# In tests it mirrors the test database of `default`.
+
+DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['orders.routers.ReplicaRouter']
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -122,3 +131,80 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Orders pagination (keyset, see orders/pagination.py)
+
+ORDERS_PAGE_SIZE = 50
+
+ORDERS_MAX_PAGE_SIZE = 1000
+
+ORDERS_BATCH_MAX_SIZE = 1000
+
+ORDERS_EXPORT_CHUNK_SIZE = 2000
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Any Django cache backend can be plugged in here (e.g. Redis or Memcached for several workers).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'cafe-orders',
+        # Room for cached order rows of several full pages (see ORDERS_ROW_CACHE_TIMEOUT)
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+}
+
+ORDERS_CACHE_ALIAS = 'default'
+
+ORDERS_CACHE_TIMEOUT = 60
+
+# HTML order list and search pages are streamed in chunks of ORDERS_HTML_CHUNK_SIZE rows (see orders/streaming.py).
+# Rendered rows are cached per order version, so they stay valid until the order changes.
+
+ORDERS_HTML_CHUNK_SIZE = 200
+
+ORDERS_ROW_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Order change events for kitchen displays (Server-Sent Events, see orders/events.py)
+# 'memory' - in-process broker (one worker), 'postgres' - LISTEN/NOTIFY fan-out across workers, None - disabled.
+
+ORDERS_EVENTS_BACKEND = 'memory'
+
+ORDERS_EVENTS_CHANNEL = 'orders_events'
+
+ORDERS_EVENTS_QUEUE_SIZE = 1000
+
+ORDERS_EVENTS_HISTORY_SIZE = 1000
+
+ORDERS_EVENTS_RESUME_WINDOW = 60
+
+ORDERS_EVENTS_HEARTBEAT = 15
+
+ORDERS_EVENTS_RETRY_MS = 3000
+
+# Read replicas (see orders/routers.py): aliases in DATABASES that serve list, search, revenue and export reads.
+# After a write the client reads from `default` for ORDERS_REPLICA_STICKY_SECONDS (read-your-writes).
+
+ORDERS_READ_REPLICAS = ['replica']
+
+ORDERS_REPLICA_STICKY_SECONDS = 5
+
+# Request metrics in Prometheus text format at /metrics (see orders/metrics.py).
+# When disabled the middleware is removed at startup and adds no overhead.
+
+ORDERS_METRICS_ENABLED = True
+
+ORDERS_METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Archive of closed shifts (see `python manage.py archive_orders`): paid orders older than
+# ORDERS_ARCHIVE_AFTER_DAYS are moved from orders_order to orders_archivedorder in batches.
+
+ORDERS_ARCHIVE_AFTER_DAYS = 30
+
+ORDERS_ARCHIVE_BATCH_SIZE = 5000
+
+# Idempotency keys for order creation (Idempotency-Key header / idempotency_key form field, see orders/idempotency.py).
+# Expired keys are removed by `python manage.py purge_idempotency_keys`.
+
+ORDERS_IDEMPOTENCY_TTL = 24 * 60 * 60
@@ -0,0 +1,163 @@
+import json
+from decimal import Decimal
+from typing import Any
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import replace_query_param
+from .events import stream_order_events, subscribe_order_events
+from .forms import OrderSearchForm
+from .models import Order, RevenueTotal
+from .pagination import decode_keyset_cursor, encode_keyset_cursor
+from .routers import read_from_replica
+from .serializers import OrderSerializer, order_values, serialize_order_rows
+from .utils import get_filtered_orders
+
+# Асинхронные версии горячих эндпоинтов API для запуска под ASGI-сервером (uvicorn, daphne).
+# Ответы совпадают по формату с OrderViewSet, запросы к базе выполняются через асинхронный ORM.
+# Декораторы require_http_methods и csrf_exempt в Django 4.2 не поддерживают корутины,
+# поэтому метод проверяется в самих представлениях, а csrf_exempt выставляется атрибутом.
+
+
+def json_response(data: Any, status: int = 200) -> HttpResponse:
+    """ Рендерит данные тем же JSONRenderer, что и DRF, чтобы ответы совпадали с синхронным API. """
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def get_page_size(request: HttpRequest) -> int:
+    """ Размер страницы из параметра `page_size` с теми же ограничениями, что и в `OrderCursorPagination`. """
+    try:
+        page_size = int(request.GET.get('page_size', settings.ORDERS_PAGE_SIZE))
+    except ValueError:
+        return settings.ORDERS_PAGE_SIZE
+    return min(page_size, settings.ORDERS_MAX_PAGE_SIZE) if page_size > 0 else settings.ORDERS_PAGE_SIZE
+
+
+async def render_order_page(request: HttpRequest, orders: QuerySet) -> HttpResponse:
+    """
+    Асинхронно читает одну keyset-страницу заказов (`id < cursor`, от новых к старым).
+    Курсоры совместимы с `OrderCursorPagination` при переходе на следующую страницу.
+    :param request: HTTP-запрос с параметрами `cursor` и `page_size`.
+    :param orders: Отфильтрованная выборка заказов.
+    :return: JSON-ответ в формате `{"next", "previous", "results"}`.
+    """
+    try:
+        position = decode_keyset_cursor(request.GET.get('cursor'))
+    except ValueError as e:
+        return json_response({'detail': str(e)}, status=404)
+    if position is not None:
+        orders = orders.filter(id__lt=position)
+    page_size = get_page_size(request)
+    page = [order async for order in order_values(orders.order_by('-id'))[:page_size + 1]]
+
+    next_link = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        next_link = replace_query_param(request.build_absolute_uri(), 'cursor', encode_keyset_cursor(page[-1]['id']))
+    return json_response({'next': next_link, 'previous': None, 'results': serialize_order_rows(page)})
+
+
+@read_from_replica
+async def order_list(request: HttpRequest) -> HttpResponse:
+    """
+    GET: список заказов с фильтрами `table_number` и `status` и keyset-пагинацией.
+    POST: создание заказа с вычислением `total_price` (как в `OrderViewSet.create`).
+    """
+    if request.method == 'POST':
+        return await create_order(request)
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET', 'POST'])
+    form = OrderSearchForm(request.GET)
+    if not form.is_valid():
+        return json_response(form.errors, status=400)
+    return await render_order_page(request, get_filtered_orders(form))
+
+
+order_list.csrf_exempt = True
+
+
+async def create_order(request: HttpRequest) -> HttpResponse:
+    """
+    Создает заказ. Данные проверяются `OrderSerializer` (без обращений к базе),
+    а сохранение выполняется через `asave`, поэтому все производные данные обновляются как в `Order.save`.
+    """
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        return json_response({'detail': 'Некорректный JSON.'}, status=400)
+    serializer = OrderSerializer(data=payload)
+    if not serializer.is_valid():
+        return json_response(serializer.errors, status=400)
+    data = dict(serializer.validated_data)
+    data['total_price'] = sum(item.get('price', 0) for item in data['items'])
+    order = Order(**data)
+    # Блюда уже проверены сериализатором
+    order.validated_items = data['items']
+    await order.asave(force_insert=True)
+    return json_response(OrderSerializer(order).data, status=201)
+
+
+async def order_detail(request: HttpRequest, pk: int) -> HttpResponse:
+    """ Возвращает один заказ по ID. """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    row = await order_values(Order.objects.filter(pk=pk)).afirst()
+    if row is None:
+        return json_response({'detail': 'No Order matches the given query.'}, status=404)
+    return json_response(serialize_order_rows([row])[0])
+
+
+@read_from_replica
+async def order_search(request: HttpRequest) -> HttpResponse:
+    """
+    Поиск заказов по фильтрам формы `OrderSearchForm` (как на HTML-странице поиска).
+    Некорректные значения фильтров возвращаются как ошибки формы.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    form = OrderSearchForm(request.GET)
+    if not form.is_valid():
+        return json_response(form.errors, status=400)
+    return await render_order_page(request, get_filtered_orders(form))
+
+
+@read_from_replica
+async def order_revenue(request: HttpRequest) -> HttpResponse:
+    """ Возвращает общую выручку из накопительного итога. """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    total_revenue = await RevenueTotal.objects.filter(pk=RevenueTotal.PAID).values_list(
+        'total_revenue', flat=True
+    ).afirst()
+    return json_response({'total_revenue': total_revenue if total_revenue is not None else Decimal('0.00')})
+
+
+async def order_events(request: HttpRequest) -> HttpResponse:
+    """
+    Поток Server-Sent Events об изменениях заказов (created, updated, deleted) для экранов кухни.
+    Фильтры: `status` (можно указать несколько раз) и `table_number`. После переподключения
+    пропущенные события дочитываются по заголовку `Last-Event-ID`.
+    Работает только под ASGI-сервером: соединение остается открытым.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    statuses = set(request.GET.getlist('status'))
+    if not statuses <= dict(Order.STATUS_CHOICES).keys():
+        return json_response({'status': ['Некорректный статус.']}, status=400)
+    try:
+        table_number = int(request.GET['table_number']) if request.GET.get('table_number') else None
+    except ValueError:
+        return json_response({'table_number': ['Введите целое число.']}, status=400)
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event_id = None
+
+    subscription = await subscribe_order_events(statuses, table_number, last_event_id)
+    response = StreamingHttpResponse(stream_order_events(subscription), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    # Отписка, даже если клиент отключился до начала чтения потока
+    response._resource_closers.append(subscription.close)
+    return response
@@ -0,0 +1,312 @@
+import json
+import platform
+import random
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+import django
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from .models import Order
+from .serializers import OrderSerializer, order_values, serialize_order_rows
+from .validation import validate_orders
+
+# Воспроизводимый набор замеров производительности приложения заказов.
+# Данные генерируются детерминированно по seed, сценарии проходят полный цикл запроса
+# (middleware, представление, шаблон или DRF), результаты сохраняются в JSON и сравниваются с базовыми.
+
+# Блюда меню с ценами
+DISHES = [
+    ('Пицца', 450), ('Паста', 380), ('Суп', 250), ('Салат', 300), ('Стейк', 900), ('Кофе', 150),
+    ('Чай', 100), ('Десерт', 280), ('Суши', 600), ('Бургер', 420), ('Лимонад', 180), ('Хлеб', 50),
+]
+# Распределение количества блюд в заказе: чаще всего 1-3 блюда, изредка большие компании
+ITEMS_LENGTH_WEIGHTS = {1: 30, 2: 25, 3: 18, 4: 10, 5: 7, 6: 4, 8: 3, 12: 2, 20: 1}
+# Распределение статусов: большая часть заказов за день уже оплачена
+STATUS_WEIGHTS = {'waiting': 15, 'ready': 10, 'paid': 75}
+TABLES_COUNT = 50
+# Размеры для замеров проверки: большой заказ (банкет) и пачка заказов (синхронизация, импорт)
+LARGE_ORDER_ITEMS = 500
+BATCH_SIZE = 1000
+# Количество своих заказов, которые изменяет редактирование при замере на существующих данных (--reuse)
+EDIT_ORDERS = 100
+
+LATENCY_METRICS = ('p50_ms', 'p95_ms')
+
+
+def get_bench_host() -> str:
+    """ Возвращает хост из ALLOWED_HOSTS для запросов тестового клиента. """
+    hosts = [host for host in settings.ALLOWED_HOSTS if host not in ('*', '0.0.0.0') and not host.startswith('.')]
+    return hosts[0] if hosts else 'localhost'
+
+
+def random_items(rng: random.Random) -> list[dict[str, Any]]:
+    """ Генерирует список блюд заказа по распределению ITEMS_LENGTH_WEIGHTS. """
+    length = rng.choices(list(ITEMS_LENGTH_WEIGHTS), weights=list(ITEMS_LENGTH_WEIGHTS.values()))[0]
+    return [{'name': name, 'price': price} for name, price in rng.choices(DISHES, k=length)]
+
+
+def random_status(rng: random.Random) -> str:
+    return rng.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()))[0]
+
+
+def seed_orders(count: int, seed: int = 0, batch_size: int = 10000, using: str = DEFAULT_DB_ALIAS) -> list[int]:
+    """
+    Загружает `count` сгенерированных заказов пачками через `copy_create`.
+    :param count: Количество заказов.
+    :param seed: Seed генератора: одинаковый seed дает одинаковые данные.
+    :param batch_size: Размер пачки.
+    :param using: Алиас базы данных.
+    :return: ID созданных заказов.
+    """
+    rng = random.Random(seed)
+    ids = []
+    for start in range(0, count, batch_size):
+        orders = [
+            Order(table_number=rng.randint(1, TABLES_COUNT), items=random_items(rng), status=random_status(rng))
+            for _ in range(min(batch_size, count - start))
+        ]
+        ids.extend(order.pk for order in Order.objects.using(using).copy_create(orders))
+    return ids
+
+
+def delete_orders(ids: list[int], batch_size: int = 10000, using: str = DEFAULT_DB_ALIAS) -> None:
+    """ Удаляет заказы пачками (с обновлением накопительного итога выручки). """
+    for start in range(0, len(ids), batch_size):
+        Order.objects.using(using).filter(pk__in=ids[start:start + batch_size]).delete()
+
+
+@dataclass
+class BenchmarkContext:
+    """ Состояние прогона: генератор случайных чисел, клиент и ID заказов, с которыми работают сценарии. """
+    rng: random.Random
+    order_ids: list[int]
+    edit_ids: list[int]
+    client: Client = field(default_factory=lambda: Client(HTTP_HOST=get_bench_host()))
+    created_ids: list[int] = field(default_factory=list)
+    sample: list[Order] = field(default_factory=list)
+    batch: list[dict[str, Any]] = field(default_factory=list)
+
+    def random_order_id(self) -> int:
+        return self.rng.choice(self.order_ids)
+
+    def random_payload(self) -> dict[str, Any]:
+        items = random_items(self.rng)
+        return {'table_number': self.rng.randint(1, TABLES_COUNT), 'items': items, 'status': random_status(self.rng),
+                'total_price': sum(item['price'] for item in items)}
+
+
+def expect(response, status_code: int):
+    """ Проверяет код ответа, чтобы не замерять ошибки вместо работы. Потоковый ответ дочитывается до конца. """
+    if response.status_code != status_code:
+        raise RuntimeError(f'{response.request["PATH_INFO"]} вернул {response.status_code}, ожидался {status_code}')
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def bench_create(ctx: BenchmarkContext) -> None:
+    response = expect(ctx.client.post(reverse('order-list'), ctx.random_payload(), content_type='application/json'), 201)
+    ctx.created_ids.append(response.data['id'])
+
+
+def bench_list(ctx: BenchmarkContext) -> None:
+    expect(ctx.client.get(reverse('list_order')), 200)
+
+
+def bench_list_api(ctx: BenchmarkContext) -> None:
+    expect(ctx.client.get(reverse('order-list')), 200)
+
+
+def bench_search(ctx: BenchmarkContext) -> None:
+    params = {'table_number': ctx.rng.randint(1, TABLES_COUNT), 'status': random_status(ctx.rng)}
+    expect(ctx.client.get(reverse('order_search'), params), 200)
+
+
+def bench_search_api(ctx: BenchmarkContext) -> None:
+    params = {'table_number': ctx.rng.randint(1, TABLES_COUNT), 'status': random_status(ctx.rng)}
+    expect(ctx.client.get(reverse('order-list'), params), 200)
+
+
+def bench_edit(ctx: BenchmarkContext) -> None:
+    payload = ctx.random_payload()
+    data = {
+        'table_number': payload['table_number'],
+        'status': payload['status'],
+        'dish_name': [item['name'] for item in payload['items']],
+        'dish_price': [item['price'] for item in payload['items']],
+    }
+    expect(ctx.client.post(reverse('update_order', args=[ctx.rng.choice(ctx.edit_ids)]), data), 302)
+
+
+def bench_revenue(ctx: BenchmarkContext) -> None:
+    expect(ctx.client.get(reverse('calculate_revenue')), 200)
+
+
+def bench_revenue_api(ctx: BenchmarkContext) -> None:
+    expect(ctx.client.get(reverse('order-revenue')), 200)
+
+
+def bench_serialize(ctx: BenchmarkContext) -> None:
+    if not ctx.sample:
+        ctx.sample = list(Order.objects.filter(pk__in=ctx.rng.sample(ctx.order_ids, min(50, len(ctx.order_ids)))))
+    json.dumps(OrderSerializer(ctx.sample, many=True).data, default=str)
+
+
+def bench_validate_large_order(ctx: BenchmarkContext) -> None:
+    """ Проверка заказа на LARGE_ORDER_ITEMS блюд через `OrderSerializer` (как при создании через API). """
+    items = [{'name': name, 'price': price} for name, price in ctx.rng.choices(DISHES, k=LARGE_ORDER_ITEMS)]
+    serializer = OrderSerializer(data={'table_number': 1, 'items': items, 'status': 'waiting', 'total_price': 0})
+    if not serializer.is_valid():
+        raise RuntimeError(serializer.errors)
+
+
+def bench_validate_batch(ctx: BenchmarkContext) -> None:
+    """ Проверка пачки из BATCH_SIZE заказов за один проход `validate_orders` (как при импорте). """
+    if not ctx.batch:
+        ctx.batch = [ctx.random_payload() for _ in range(BATCH_SIZE)]
+    if any(validate_orders(ctx.batch, STATUS_WEIGHTS)):
+        raise RuntimeError('Сгенерированные заказы не прошли проверку.')
+
+
+def bench_render_page(rows: int, fast: bool) -> Callable[[BenchmarkContext], None]:
+    """
+    Сценарий ответа списка на `rows` заказов (чтение и JSON): через `OrderSerializer`
+    или через быструю сериализацию `order_values` / `serialize_order_rows`.
+    """
+    def scenario(ctx: BenchmarkContext) -> None:
+        orders = Order.objects.order_by('-id')[:rows]
+        if fast:
+            data = serialize_order_rows(list(order_values(orders)))
+        else:
+            data = OrderSerializer(orders, many=True).data
+        JSONRenderer().render(data)
+    return scenario
+
+
+def bench_deserialize(ctx: BenchmarkContext) -> None:
+    serializer = OrderSerializer(data=ctx.random_payload())
+    if not serializer.is_valid():
+        raise RuntimeError(serializer.errors)
+
+
+SCENARIOS: dict[str, Callable[[BenchmarkContext], None]] = {
+    'create': bench_create,
+    'list': bench_list,
+    'list_api': bench_list_api,
+    'search': bench_search,
+    'search_api': bench_search_api,
+    'edit': bench_edit,
+    'revenue': bench_revenue,
+    'revenue_api': bench_revenue_api,
+    'serialize': bench_serialize,
+    'deserialize': bench_deserialize,
+    'validate_large_order': bench_validate_large_order,
+    'validate_batch': bench_validate_batch,
+    'render_1k': bench_render_page(1000, fast=False),
+    'render_fast_1k': bench_render_page(1000, fast=True),
+    'render_10k': bench_render_page(10000, fast=False),
+    'render_fast_10k': bench_render_page(10000, fast=True),
+}
+
+
+def measure(scenario: Callable[[BenchmarkContext], None], ctx: BenchmarkContext, iterations: int,
+            warmup: int) -> dict[str, float]:
+    """
+    Замеряет сценарий: `warmup` прогонов без замера, затем `iterations` замеренных.
+    :return: Задержки (мс) и пропускная способность (операций в секунду).
+    """
+    for _ in range(warmup):
+        scenario(ctx)
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        scenario(ctx)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+
+    def percentile(fraction: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000, 3)
+
+    return {
+        'iterations': iterations,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+        'p50_ms': percentile(0.5),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': round(latencies[-1] * 1000, 3),
+        'ops_per_second': round(iterations / sum(latencies), 1),
+    }
+
+
+def run_benchmarks(order_ids: list[int], scenarios: Optional[list[str]] = None, iterations: int = 100,
+                   warmup: int = 10, seed: int = 0, use_cache: bool = False,
+                   edit_ids: Optional[list[int]] = None) -> dict[str, Any]:
+    """
+    Прогоняет сценарии на уже загруженных заказах.
+    :param order_ids: ID заказов, с которыми работают сценарии чтения.
+    :param edit_ids: ID заказов, которые изменяет сценарий редактирования (по умолчанию `order_ids`).
+    :param scenarios: Имена сценариев из SCENARIOS (по умолчанию все).
+    :param iterations: Количество замеренных прогонов каждого сценария.
+    :param warmup: Количество прогонов для прогрева.
+    :param seed: Seed генератора случайных параметров запросов.
+    :param use_cache: Замерять с кэшем заказов (по умолчанию кэш отключен, чтобы замерять запросы к базе).
+    :return: Результаты вида `{"meta": {...}, "scenarios": {имя: метрики}}`.
+    """
+    ctx = BenchmarkContext(rng=random.Random(seed), order_ids=order_ids, edit_ids=edit_ids or order_ids)
+    overrides = {'DEBUG': False}
+    if not use_cache:
+        overrides['ORDERS_CACHE_TIMEOUT'] = 0
+        overrides['ORDERS_ROW_CACHE_TIMEOUT'] = 0
+    results = {}
+    try:
+        with override_settings(**overrides):
+            for name in scenarios or SCENARIOS:
+                results[name] = measure(SCENARIOS[name], ctx, iterations, warmup)
+    finally:
+        delete_orders(ctx.created_ids)
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'orders': len(order_ids),
+            'seed': seed,
+            'iterations': iterations,
+            'warmup': warmup,
+            'use_cache': use_cache,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connections[DEFAULT_DB_ALIAS].vendor,
+        },
+        'scenarios': results,
+    }
+
+
+def compare_results(current: dict[str, Any], baseline: dict[str, Any], threshold: float = 0.2) -> list[dict[str, Any]]:
+    """
+    Сравнивает результаты с базовыми и возвращает регрессии: сценарии, у которых задержка
+    (p50 или p95) выросла больше чем на `threshold` (доля, 0.2 = 20%).
+    :param current: Текущие результаты `run_benchmarks`.
+    :param baseline: Сохраненные базовые результаты.
+    :param threshold: Допустимый рост задержки.
+    :return: Список регрессий.
+    """
+    regressions = []
+    for name, metrics in current['scenarios'].items():
+        base = baseline['scenarios'].get(name)
+        if base is None:
+            continue
+        for metric in LATENCY_METRICS:
+            if base[metric] and metrics[metric] > base[metric] * (1 + threshold):
+                regressions.append({
+                    'scenario': name,
+                    'metric': metric,
+                    'baseline': base[metric],
+                    'current': metrics[metric],
+                    'change': round(metrics[metric] / base[metric] - 1, 3),
+                })
+    return regressions
@@ -0,0 +1,131 @@
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Iterable
+from django.conf import settings
+from django.core.cache import caches, BaseCache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from .routers import is_primary_pinned
+
+GENERATION_KEY = 'orders:generation'
+
+_MISSING = object()
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def get_orders_cache() -> BaseCache:
+    """ Возвращает кэш заказов (алиас из настройки ORDERS_CACHE_ALIAS). """
+    return caches[settings.ORDERS_CACHE_ALIAS]
+
+
+def get_generation() -> int:
+    """
+    Возвращает текущее поколение данных о заказах. Поколение входит в каждый ключ кэша,
+    поэтому после его увеличения все ранее закэшированные значения перестают читаться.
+    Если ключ поколения вытеснен из кэша, новое поколение берется от текущего времени,
+    чтобы не вернуться к старым ключам.
+    """
+    cache = get_orders_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns() // 1000, timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation() -> None:
+    """ Увеличивает поколение данных о заказах (инвалидация всего кэша заказов). """
+    cache = get_orders_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns() // 1000, timeout=None)
+    _count('invalidations')
+
+
+def _has_pending_invalidation(using: str) -> bool:
+    connection = transaction.get_connection(using)
+    return any(callback[1] is bump_generation for callback in connection.run_on_commit)
+
+
+def invalidate_orders(using: str = DEFAULT_DB_ALIAS) -> None:
+    """
+    Инвалидирует кэш заказов после фиксации текущей транзакции (вне транзакции - сразу).
+    Повторные вызовы в одной транзакции регистрируют инвалидацию только один раз.
+    :param using: Алиас базы данных, в которой изменены заказы.
+    """
+    if not _has_pending_invalidation(using):
+        transaction.on_commit(bump_generation, using=using)
+
+
+def cached(namespace: str, parts: Iterable[Any], compute: Callable[[], Any], using: str = DEFAULT_DB_ALIAS) -> Any:
+    """
+    Читает значение из кэша заказов или вычисляет и сохраняет его (read-through).
+    Пока в текущей транзакции есть незафиксированные изменения заказов, кэш не используется,
+    чтобы не сохранить в него незафиксированные данные.
+    Клиент, закрепленный за основной базой после записи (read-your-writes), кэш не читает: значение
+    текущего поколения могло быть вычислено на отстающей реплике. Его значение с основной базы
+    сохраняется в кэш вместо прежнего.
+    :param namespace: Пространство ключей (например, `api-list`).
+    :param parts: Части ключа: фильтры, курсор и т. п.
+    :param compute: Функция, вычисляющая значение при промахе.
+    :param using: Алиас базы данных, из которой читаются заказы.
+    :return: Закэшированное или вычисленное значение.
+    """
+    if _has_pending_invalidation(using):
+        return compute()
+    digest = hashlib.md5(repr(tuple(parts)).encode()).hexdigest()
+    key = f'orders:{namespace}:{get_generation()}:{digest}'
+    cache = get_orders_cache()
+    value = _MISSING if is_primary_pinned() else cache.get(key, _MISSING)
+    if value is not _MISSING:
+        _count('hits')
+        return value
+    _count('misses')
+    value = compute()
+    cache.set(key, value, settings.ORDERS_CACHE_TIMEOUT)
+    return value
+
+
+def get_versioned_many(namespace: str, versions: Iterable[tuple[Any, int]]) -> dict[Any, Any]:
+    """
+    Читает из кэша заказов значения, привязанные к версии объекта (например, отрисованные строки заказов).
+    Такие ключи не зависят от поколения: значение остается верным, пока объект не получит новую версию.
+    :param namespace: Пространство ключей.
+    :param versions: Пары (id, версия).
+    :return: Найденные значения по id.
+    """
+    keys = {f'orders:{namespace}:{pk}:{version}': pk for pk, version in versions}
+    found = get_orders_cache().get_many(keys)
+    _count('hits', len(found))
+    _count('misses', len(keys) - len(found))
+    return {keys[key]: value for key, value in found.items()}
+
+
+def set_versioned_many(namespace: str, values: dict[tuple[Any, int], Any], using: str = DEFAULT_DB_ALIAS) -> None:
+    """
+    Сохраняет значения, привязанные к версии объекта, на ORDERS_ROW_CACHE_TIMEOUT.
+    Пока в текущей транзакции есть незафиксированные изменения заказов, ничего не сохраняется:
+    при откате номер версии достанется другим данным.
+    :param namespace: Пространство ключей.
+    :param values: Значения по парам (id, версия).
+    :param using: Алиас базы данных, из которой прочитаны объекты.
+    """
+    if not values or _has_pending_invalidation(using):
+        return
+    get_orders_cache().set_many(
+        {f'orders:{namespace}:{pk}:{version}': value for (pk, version), value in values.items()},
+        settings.ORDERS_ROW_CACHE_TIMEOUT,
+    )
+
+
+def get_cache_stats() -> dict[str, int]:
+    """ Возвращает счетчики попаданий, промахов и инвалидаций кэша заказов в текущем процессе. """
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,296 @@
+import asyncio
+import itertools
+import json
+import logging
+import select
+import threading
+import time
+from collections import deque
+from functools import partial
+from typing import Any, AsyncIterator, Iterable, Optional
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+# Поток событий об изменениях заказов для экранов кухни (Server-Sent Events).
+# Все подписчики процесса получают события из одного брокера в памяти, поэтому
+# количество экранов не увеличивает нагрузку на базу. Источник событий задается
+# настройкой ORDERS_EVENTS_BACKEND:
+#   'memory'   - события публикуются в брокер процесса после фиксации транзакции;
+#   'postgres' - события отправляются через NOTIFY в той же транзакции, а один поток
+#                в каждом процессе слушает канал (LISTEN) и передает их в брокер;
+#   None       - события отключены.
+
+logger = logging.getLogger(__name__)
+
+EVENT_FIELDS = ('id', 'table_number', 'status', 'total_price', 'version')
+PREVIOUS_STATUS_FIELD = 'previous_status'
+
+
+class Subscription:
+    """
+    Подписка одного клиента: очередь событий в цикле событий клиента и его фильтры.
+    Если клиент не успевает читать и очередь переполняется, подписка помечается как отставшая,
+    и поток завершается: клиент переподключается с `Last-Event-ID` и дочитывает события из истории.
+    """
+
+    def __init__(self, broker: 'OrderEventBroker', statuses: Optional[set[str]], table_number: Optional[int]):
+        self.broker = broker
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(settings.ORDERS_EVENTS_QUEUE_SIZE)
+        self.statuses = statuses or None
+        self.table_number = table_number
+        self.overflowed = False
+
+    def matches(self, event: dict[str, Any]) -> bool:
+        """
+        Проверяет, проходит ли событие через фильтры подписки. Изменение статуса проходит через фильтр
+        и по прежнему статусу, чтобы подписчик узнал, что заказ вышел из отслеживаемого статуса.
+        """
+        order = event['order']
+        if self.statuses is not None and order['status'] not in self.statuses \
+                and order.get('previous_status') not in self.statuses:
+            return False
+        return self.table_number is None or order['table_number'] == self.table_number
+
+    def put_many(self, events: list[dict[str, Any]]) -> None:
+        """ Кладет события в очередь (вызывается в цикле событий подписчика). """
+        for event in events:
+            if self.overflowed:
+                return
+            try:
+                self.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.overflowed = True
+
+    async def get(self, timeout: float) -> dict[str, Any]:
+        """
+        Ждет следующее событие.
+        :raises asyncio.TimeoutError: Если за `timeout` секунд событий не было.
+        """
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    @property
+    def finished(self) -> bool:
+        """ Подписка отстала, и все полученные события уже прочитаны. """
+        return self.overflowed and self.queue.empty()
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class OrderEventBroker:
+    """
+    Брокер событий в памяти процесса: нумерует события, хранит последние из них
+    для дочитывания после переподключения и раздает их подписчикам.
+    Публиковать события можно из любого потока.
+    """
+
+    def __init__(self, history_size: int):
+        self._lock = threading.Lock()
+        self._subscribers: set[Subscription] = set()
+        self._history: deque = deque(maxlen=history_size)
+        self._sequence = itertools.count(1)
+        self._last_unsubscribed = float('-inf')
+
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def is_active(self) -> bool:
+        """
+        Нужно ли собирать события: есть подписчики или последний из них отключился недавно
+        и еще может переподключиться с `Last-Event-ID`.
+        """
+        return self.has_subscribers() or (
+            time.monotonic() - self._last_unsubscribed < settings.ORDERS_EVENTS_RESUME_WINDOW
+        )
+
+    def subscribe(self, statuses: Optional[set[str]] = None, table_number: Optional[int] = None,
+                  last_event_id: Optional[int] = None) -> Subscription:
+        """
+        Подписывает клиента на события. Вызывается внутри цикла событий клиента.
+        :param statuses: Статусы заказов, о которых нужны события (None - все).
+        :param table_number: Номер стола (None - все столы).
+        :param last_event_id: Номер последнего полученного события: пропущенные события из истории
+            отдаются сразу после подписки.
+        :return: Подписка.
+        """
+        subscription = Subscription(self, statuses, table_number)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if last_event_id is not None:
+                subscription.put_many([
+                    event for event in self._history if event['id'] > last_event_id and subscription.matches(event)
+                ])
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.discard(subscription)
+                self._last_unsubscribed = time.monotonic()
+
+    def dispatch(self, events: Iterable[dict[str, Any]]) -> None:
+        """
+        Нумерует события, сохраняет их в историю и передает подходящим подписчикам.
+        :param events: События вида `{"type": ..., "order": {...}}`.
+        """
+        with self._lock:
+            numbered = [{'id': next(self._sequence), **event} for event in events]
+            self._history.extend(numbered)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            matched = [event for event in numbered if subscription.matches(event)]
+            if not matched:
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put_many, matched)
+            except RuntimeError:
+                # Цикл событий клиента уже закрыт
+                self.unsubscribe(subscription)
+
+
+broker = OrderEventBroker(settings.ORDERS_EVENTS_HISTORY_SIZE)
+
+
+class PostgresListener(threading.Thread):
+    """
+    Поток, который слушает канал NOTIFY на отдельном соединении с PostgreSQL
+    и передает полученные события в брокер процесса. При потере соединения переподключается.
+    """
+    daemon = True
+
+    def __init__(self, using: str, channel: str):
+        super().__init__(name='orders-events-listener')
+        self.using = using
+        self.channel = channel
+        self.ready = threading.Event()
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            try:
+                self.listen()
+            except Exception:
+                logger.exception('Соединение для событий заказов потеряно, переподключение.')
+                self.stopped.wait(1)
+
+    def listen(self) -> None:
+        connection = connections[self.using]
+        listener = connection.Database.connect(**connection.get_connection_params())
+        try:
+            listener.autocommit = True
+            with listener.cursor() as cursor:
+                cursor.execute(f'LISTEN {connection.ops.quote_name(self.channel)}')
+            self.ready.set()
+            while not self.stopped.is_set():
+                if not select.select([listener], [], [], 1)[0]:
+                    continue
+                listener.poll()
+                events = [json.loads(notify.payload) for notify in listener.notifies]
+                listener.notifies.clear()
+                if events:
+                    broker.dispatch(events)
+        finally:
+            listener.close()
+
+
+_listener: Optional[PostgresListener] = None
+_listener_lock = threading.Lock()
+
+
+def get_backend(using: str = DEFAULT_DB_ALIAS) -> Optional[str]:
+    """ Возвращает источник событий; 'postgres' на других СУБД заменяется на 'memory'. """
+    backend = settings.ORDERS_EVENTS_BACKEND
+    if backend == 'postgres' and connections[using].vendor != 'postgresql':
+        return 'memory'
+    return backend
+
+
+def start_listener(using: str = DEFAULT_DB_ALIAS) -> None:
+    """ Запускает поток LISTEN процесса (один раз) и ждет, пока он подпишется на канал. """
+    global _listener
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = PostgresListener(using, settings.ORDERS_EVENTS_CHANNEL)
+            _listener.start()
+    _listener.ready.wait(timeout=5)
+
+
+def stop_listener() -> None:
+    """ Останавливает поток LISTEN процесса и закрывает его соединение. """
+    global _listener
+    with _listener_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stopped.set()
+        listener.join()
+
+
+def events_enabled(using: str = DEFAULT_DB_ALIAS) -> bool:
+    """
+    Нужно ли публиковать события. Для брокера в памяти события не собираются,
+    пока в процессе нет подписчиков (и недавно отключившихся), поэтому массовые операции
+    не делают лишних запросов.
+    """
+    backend = get_backend(using)
+    return backend == 'postgres' or (backend == 'memory' and broker.is_active())
+
+
+def publish_order_events(event_type: str, orders: Iterable[dict[str, Any]], using: str = DEFAULT_DB_ALIAS) -> None:
+    """
+    Публикует события об изменении заказов. Подписчики получают их только после фиксации транзакции.
+    :param event_type: Тип события: created, updated или deleted.
+    :param orders: Значения полей EVENT_FIELDS измененных заказов; для события updated также
+        `previous_status` - статус заказа до изменения.
+    :param using: Алиас базы данных, в которой изменены заказы.
+    """
+    if not events_enabled(using):
+        return
+    fields = (*EVENT_FIELDS, PREVIOUS_STATUS_FIELD) if event_type == 'updated' else EVENT_FIELDS
+    events = [{'type': event_type, 'order': {field: order[field] for field in fields}} for order in orders]
+    if not events:
+        return
+    # Сериализуем сразу, чтобы все подписчики получили одинаковые данные (Decimal -> строка)
+    events = json.loads(json.dumps(events, cls=DjangoJSONEncoder))
+    if get_backend(using) == 'postgres':
+        # NOTIFY доставляется слушателям только после фиксации транзакции
+        with connections[using].cursor() as cursor:
+            cursor.executemany(
+                'SELECT pg_notify(%s, %s)',
+                [(settings.ORDERS_EVENTS_CHANNEL, json.dumps(event)) for event in events],
+            )
+    else:
+        transaction.on_commit(partial(broker.dispatch, events), using=using)
+
+
+async def subscribe_order_events(statuses: Optional[set[str]] = None, table_number: Optional[int] = None,
+                                 last_event_id: Optional[int] = None) -> Subscription:
+    """ Подписывает клиента на события; для источника 'postgres' запускает поток LISTEN процесса. """
+    if get_backend() == 'postgres':
+        await sync_to_async(start_listener, thread_sensitive=False)()
+    return broker.subscribe(statuses, table_number, last_event_id)
+
+
+def format_event(event: dict[str, Any]) -> str:
+    """ Форматирует событие в формате Server-Sent Events. """
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['order'])}\n\n"
+
+
+async def stream_order_events(subscription: Subscription) -> AsyncIterator[str]:
+    """
+    Поток Server-Sent Events для подписки. Пока событий нет, клиенту периодически
+    отправляется комментарий, чтобы прокси не закрывали соединение.
+    """
+    try:
+        yield f'retry: {settings.ORDERS_EVENTS_RETRY_MS}\n\n'
+        while not subscription.finished:
+            try:
+                event = await subscription.get(settings.ORDERS_EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        subscription.close()
@@ -0,0 +1,68 @@
+import csv
+import json
+from datetime import datetime
+from typing import Callable, Iterator, Optional
+from django.conf import settings
+from django.db.models import QuerySet
+
+EXPORT_FIELDS = ['id', 'table_number', 'status', 'total_price', 'items', 'created_at', 'paid_at']
+
+
+def format_timestamp(value: Optional[datetime]) -> Optional[str]:
+    """ Время в ISO 8601 (как его разбирает `import_orders`). """
+    return value.isoformat() if value is not None else None
+
+
+class _Echo:
+    """ Псевдо-файл для csv.writer: возвращает записанную строку вместо буферизации. """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _iter_rows(queryset: QuerySet, chunk_size: int) -> Iterator[tuple]:
+    """
+    Итерирует заказы серверным курсором пачками по `chunk_size`, не загружая всю выборку в память.
+    """
+    return queryset.order_by('id').values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def iter_orders_csv(queryset: QuerySet, chunk_size: int = None) -> Iterator[str]:
+    """
+    Построчно выгружает заказы в CSV. Список блюд записывается в колонку `items` как JSON,
+    время создания и оплаты - в ISO 8601 (у неоплаченных заказов `paid_at` пустое).
+    :param queryset: Выборка заказов (с уже примененными фильтрами).
+    :param chunk_size: Размер пачки серверного курсора.
+    :return: Итератор строк CSV, начиная с заголовка.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for order_id, table_number, status, total_price, items, created_at, paid_at in _iter_rows(
+        queryset, chunk_size or settings.ORDERS_EXPORT_CHUNK_SIZE
+    ):
+        yield writer.writerow([
+            order_id, table_number, status, total_price, json.dumps(items, ensure_ascii=False),
+            format_timestamp(created_at), format_timestamp(paid_at),
+        ])
+
+
+def iter_orders_ndjson(queryset: QuerySet, chunk_size: int = None) -> Iterator[str]:
+    """
+    Построчно выгружает заказы в NDJSON (один JSON-объект на строку).
+    :param queryset: Выборка заказов (с уже примененными фильтрами).
+    :param chunk_size: Размер пачки серверного курсора.
+    :return: Итератор строк NDJSON.
+    """
+    for row in _iter_rows(queryset, chunk_size or settings.ORDERS_EXPORT_CHUNK_SIZE):
+        order = dict(zip(EXPORT_FIELDS, row))
+        order['total_price'] = str(order['total_price'])
+        order['created_at'] = format_timestamp(order['created_at'])
+        order['paid_at'] = format_timestamp(order['paid_at'])
+        yield json.dumps(order, ensure_ascii=False) + '\n'
+
+
+# Формат выгрузки: (генератор строк, content type)
+EXPORT_FORMATS: dict[str, tuple[Callable[..., Iterator[str]], str]] = {
+    'csv': (iter_orders_csv, 'text/csv; charset=utf-8'),
+    'ndjson': (iter_orders_ndjson, 'application/x-ndjson; charset=utf-8'),
+}
@@ -0,0 +1,33 @@
+import django_filters
+from django.db.models import QuerySet
+from .models import Order
+
+DISH_MATCH_CHOICES = [
+    ('contains', 'Часть названия'),
+    ('prefix', 'Начало названия'),
+]
+
+
+class OrderFilter(django_filters.FilterSet):
+    """
+    Фильтры списка заказов API: номер стола, статус и блюдо.
+
+    Поля:
+    - `table_number` (int): Номер стола.
+    - `status` (str): Статус заказа.
+    - `dish` (str): Название блюда или его часть (без учета регистра).
+    - `dish_match` (str): `contains` (по умолчанию) - любая часть названия, `prefix` - начало названия.
+    """
+    dish = django_filters.CharFilter(method='filter_dish', max_length=255)
+    dish_match = django_filters.ChoiceFilter(choices=DISH_MATCH_CHOICES, method='filter_dish_match')
+
+    class Meta:
+        model = Order
+        fields = ['table_number', 'status', 'dish', 'dish_match']
+
+    def filter_dish(self, queryset: QuerySet, name: str, value: str) -> QuerySet:
+        return queryset.with_dish(value, prefix=self.form.cleaned_data.get('dish_match') == 'prefix')
+
+    def filter_dish_match(self, queryset: QuerySet, name: str, value: str) -> QuerySet:
+        # Режим совпадения применяется в filter_dish
+        return queryset
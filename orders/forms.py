@@ -1,7 +1,9 @@
 from django import forms
 from django import forms
-from django.core.exceptions import ValidationError
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
 from .models import Order
+from .filters import DISH_MATCH_CHOICES
+from .validation import ItemErrors, parse_form_items
 
 
 class OrderForm(forms.ModelForm):
@@ -20,6 +22,7 @@ class OrderForm(forms.ModelForm):
         widget=forms.NumberInput(attrs={'step': '0.01'})
     )
     dish_name = forms.CharField()
+    version = forms.IntegerField(required=False, widget=forms.HiddenInput)
 
     class Meta:
         model = Order
@@ -28,6 +31,8 @@ class OrderForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
+        if self.instance.pk is not None:
+            self.fields['version'].initial = self.instance.version
         if self.instance and self.instance.items:
             self.fields['total_price'].initial = sum(item['price'] for item in self.instance.items)
             self.dishes = self.instance.items
@@ -51,36 +56,34 @@ class OrderForm(forms.ModelForm):
         cleaned_data = super().clean()
 
         try:
+            if hasattr(self.data, 'getlist'):
+                dish_names = self.data.getlist('dish_name')
+                dish_prices = self.data.getlist('dish_price')
             # Если данные пришли не в QueryDict, а в обычном словаре
-            if isinstance(self.data, dict):
+            else:
                 dish_names = self.data['dish_name']
+                dish_names = [dish_names] if isinstance(dish_names, str) else dish_names
                 dish_prices = [self.data['dish_price']] if isinstance(self.data.get('dish_price'),
                                                                       (float, str, int)) else \
                     self.data[
                         'dish_price']
-            else:
-                dish_names = self.data.getlist('dish_name')
-                dish_prices = self.data.getlist('dish_price')
         except Exception as e:
             raise ValidationError("В заказе должно быть хотя бы одно блюдо")
 
         if not dish_names or not dish_prices:
             raise ValidationError("Названия или цены блюд не могут быть пустыми.")
 
-        # Проверяем название и цену каждого блюда
-        items = []
-        for name, price in zip(dish_names, dish_prices):
-            if not name.strip():
-                raise ValidationError({'dish_name': 'Название блюда не может быть пустым.'})
-            try:
-                price = float(price)
-                if price <= 0:
-                    raise ValidationError({'dish_price': 'Цена блюда не может быть меньше или равна нулю.'})
-            except ValueError:
-                raise ValidationError({'dish_price': 'Цена блюда должна быть числом.'})
-            items.append({"name": name, "price": price})
+        # Проверяем название и цену каждого блюда общими правилами заказа
+        items, errors = parse_form_items(dish_names, dish_prices)
+        if errors:
+            raise ValidationError(self.dish_errors(errors))
 
         self.instance.items = items
+        # Блюда проверены: `Order.clean` при проверке модели и сохранении их повторно не проверяет
+        self.instance.validated_items = items
+        cleaned_data['items'] = items
+        # Версия, которую видел пользователь: заказ не сохранится, если его успели изменить
+        self.instance.expected_version = cleaned_data.get('version')
         total_price = sum(item['price'] for item in items)
         self.instance.total_price = total_price
 
@@ -88,6 +91,23 @@ class OrderForm(forms.ModelForm):
 
         return cleaned_data
 
+    @staticmethod
+    def dish_errors(errors: ItemErrors) -> dict[str, list[str]]:
+        """
+        Переносит ошибки `check_items` на поля формы: ошибки названий - на `dish_name`, цен - на `dish_price`.
+        :param errors: Ошибки блюд.
+        :return: Ошибки по полям формы.
+        """
+        if isinstance(errors, list):
+            return {NON_FIELD_ERRORS: errors}
+        fields = {'name': 'dish_name', 'price': 'dish_price'}
+        form_errors = {}
+        for item_errors in errors.values():
+            for field, messages in item_errors.items():
+                field_errors = form_errors.setdefault(fields.get(field, NON_FIELD_ERRORS), [])
+                field_errors.extend(message for message in messages if message not in field_errors)
+        return form_errors
+
 
 class OrderSearchForm(forms.Form):
     table_number = forms.IntegerField(
@@ -106,3 +126,15 @@ class OrderSearchForm(forms.Form):
         ],
         widget=forms.Select(attrs={'class': 'form-control'})
     )
+    dish = forms.CharField(
+        label="Блюдо",
+        required=False,
+        max_length=255,
+        widget=forms.TextInput(attrs={'placeholder': 'Название блюда или его часть'})
+    )
+    dish_match = forms.ChoiceField(
+        label="Совпадение",
+        required=False,
+        choices=DISH_MATCH_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
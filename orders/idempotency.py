@@ -0,0 +1,93 @@
+import hashlib
+import json
+from datetime import timedelta
+from typing import Any, Callable, Optional
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import IdempotencyKey
+
+# Идемпотентное создание заказов: клиент передает ключ (заголовок Idempotency-Key в API,
+# скрытое поле idempotency_key в HTML-форме), и повтор запроса с тем же ключом (например,
+# после обрыва Wi-Fi) получает сохраненный ответ первого запроса без проверки данных и без INSERT.
+# Ключ хранится ORDERS_IDEMPOTENCY_TTL секунд, истекшие ключи удаляет `purge_idempotency_keys`.
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_FIELD = 'idempotency_key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+
+
+class IdempotencyKeyReused(Exception):
+    """ Ключ уже использован для запроса с другими данными. """
+
+    def __init__(self):
+        super().__init__('Ключ идемпотентности уже использован для запроса с другими данными.')
+
+
+def request_fingerprint(payload: Any) -> str:
+    """ Возвращает SHA-256 данных запроса (порядок ключей словарей не важен). """
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, cls=DjangoJSONEncoder).encode()).hexdigest()
+
+
+def get_stored_response(scope: str, key: str, fingerprint: str) -> Optional[tuple[int, Any]]:
+    """
+    Возвращает сохраненный ответ на запрос с этим ключом, если ключ еще не истек.
+    :raises IdempotencyKeyReused: Если ключ использован для запроса с другими данными.
+    :return: Кортеж (код ответа, данные) или None.
+    """
+    stored = IdempotencyKey.objects.filter(
+        scope=scope, key=key, expires_at__gt=timezone.now(), status_code__isnull=False
+    ).values_list('request_hash', 'status_code', 'response').first()
+    if stored is None:
+        return None
+    request_hash, status_code, response = stored
+    if request_hash != fingerprint:
+        raise IdempotencyKeyReused
+    return status_code, response
+
+
+def run_idempotent(scope: str, key: str, payload: Any,
+                   handler: Callable[[], tuple[Any, Optional[tuple[int, Any]]]]) -> tuple[Any, bool]:
+    """
+    Выполняет запрос не больше одного раза на ключ.
+
+    Ключ записывается в той же транзакции, что и заказ: параллельный повтор с тем же ключом ждет
+    на уникальном индексе, пока первый запрос не завершится, и получает его ответ.
+    Неуспешный запрос ключ не занимает: его можно повторить с исправленными данными.
+
+    :param scope: Операция, к которой относится ключ.
+    :param key: Ключ, переданный клиентом.
+    :param payload: Данные запроса (для проверки, что ключ не использован с другими данными).
+    :param handler: Выполняет запрос и возвращает (результат, (код ответа, данные) для сохранения)
+        или (результат, None), если запрос не выполнен и сохранять нечего.
+    :raises IdempotencyKeyReused: Если ключ использован для запроса с другими данными.
+    :return: Кортеж (результат, повтор): при повторе результатом является сохраненный (код ответа, данные).
+    """
+    fingerprint = request_fingerprint(payload)
+    stored = get_stored_response(scope, key, fingerprint)
+    if stored is not None:
+        return stored, True
+    now = timezone.now()
+    with transaction.atomic():
+        IdempotencyKey.objects.filter(scope=scope, key=key, expires_at__lte=now).delete()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    scope=scope, key=key, request_hash=fingerprint, created_at=now,
+                    expires_at=now + timedelta(seconds=settings.ORDERS_IDEMPOTENCY_TTL),
+                )
+        except IntegrityError:
+            # Параллельный запрос с тем же ключом уже зафиксирован
+            stored = get_stored_response(scope, key, fingerprint)
+            if stored is None:
+                raise
+            return stored, True
+        result, response = handler()
+        if response is None:
+            transaction.set_rollback(True)
+        else:
+            record.status_code, record.response = response
+            record.save(update_fields=['status_code', 'response'])
+    return result, False
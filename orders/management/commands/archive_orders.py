@@ -0,0 +1,45 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from ...models import ArchivedOrder, Order, RevenueRollup
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит оплаченные заказы старше N дней из основной таблицы в архив пачками. '
+        'Запускается по расписанию (например, раз в сутки после закрытия смены).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ORDERS_ARCHIVE_AFTER_DAYS,
+            help='Переносить заказы, оплаченные раньше, чем столько дней назад.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ORDERS_ARCHIVE_BATCH_SIZE,
+            help='Количество заказов в одной транзакции.',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Только посчитать заказы для переноса.')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days должен быть не меньше 1.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть не меньше 1.')
+        before = timezone.now() - timedelta(days=options['days'])
+        if options['dry_run']:
+            count = Order.objects.filter(status='paid', paid_at__lt=before).count()
+            self.stdout.write(f'Заказов для переноса в архив: {count}.')
+            return
+        # Часовые итоги закрытых часов считаются до переноса, чтобы отчеты за прошлые периоды
+        # продолжали читать их, а не архивную таблицу
+        RevenueRollup.objects.refresh()
+        total = 0
+        while True:
+            moved = ArchivedOrder.objects.archive(before, options['batch_size'])
+            if not moved:
+                break
+            total += moved
+            self.stdout.write(f'Перенесено в архив: {total}.')
+        self.stdout.write(self.style.SUCCESS(f'Перенесено в архив заказов: {total}.'))
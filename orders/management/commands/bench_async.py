@@ -0,0 +1,79 @@
+import asyncio
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+from ...models import Order
+
+# Пары (синхронный URL, асинхронный URL) для сравниваемых эндпоинтов
+ENDPOINTS = {
+    'list': lambda order_id: (reverse('order-list'), reverse('async_order_list')),
+    'retrieve': lambda order_id: (reverse('order-detail', args=[order_id]), reverse('async_order_detail', args=[order_id])),
+    'search': lambda order_id: (reverse('order-list') + '?status=waiting', reverse('async_order_search') + '?status=waiting'),
+    'revenue': lambda order_id: (reverse('order-revenue'), reverse('async_order_revenue')),
+}
+
+
+async def run_load(url: str, requests: int, concurrency: int) -> dict:
+    """
+    Выполняет `requests` GET-запросов к ASGI-приложению с заданным числом одновременных запросов.
+    :return: Пропускная способность и задержки.
+    """
+    client = AsyncClient()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one_request():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(url)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f'{url} вернул {response.status_code}')
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'url': url,
+        'requests_per_second': round(requests / elapsed, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность синхронного (DRF) и асинхронного API заказов '
+        'при заданной конкурентности, обращаясь к ASGI-приложению в том же процессе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), action='append', help='Эндпоинт (можно несколько).')
+        parser.add_argument('--requests', type=int, default=500, help='Количество запросов на эндпоинт.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Число одновременных запросов.')
+        parser.add_argument('--seed', type=int, default=0, help='Создать столько заказов перед замером.')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            Order.objects.bulk_create(
+                Order(table_number=i % 20 + 1, items=[{'name': 'Pizza', 'price': 300}], status='waiting')
+                for i in range(options['seed'])
+            )
+        order_id = Order.objects.values_list('id', flat=True).first()
+        if order_id is None:
+            raise CommandError('В базе нет заказов: запустите с --seed N.')
+
+        results = []
+        for name in options['endpoint'] or sorted(ENDPOINTS):
+            sync_url, async_url = ENDPOINTS[name](order_id)
+            for mode, url in (('sync', sync_url), ('async', async_url)):
+                # AsyncClient в Django 4.2 всегда отправляет заголовок Host: testserver
+                with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                    result = asyncio.run(run_load(url, options['requests'], options['concurrency']))
+                results.append({'endpoint': name, 'mode': mode, 'concurrency': options['concurrency'], **result})
+                self.stderr.write(f"{name:8} {mode:5} {result['requests_per_second']:>8} req/s  p95 {result['p95_ms']} ms")
+        self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
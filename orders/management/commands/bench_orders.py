@@ -0,0 +1,74 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from ...benchmarks import EDIT_ORDERS, SCENARIOS, compare_results, delete_orders, run_benchmarks, seed_orders
+from ...models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержки и пропускную способность создания, списка, поиска, редактирования, выручки '
+        'и сериализации заказов на сгенерированных данных и сравнивает результаты с базовыми.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=10000, help='Количество сгенерированных заказов.')
+        parser.add_argument('--scenario', choices=sorted(SCENARIOS), action='append', help='Сценарий (можно несколько).')
+        parser.add_argument('--iterations', type=int, default=100, help='Замеренных прогонов на сценарий.')
+        parser.add_argument('--warmup', type=int, default=10, help='Прогонов для прогрева.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed генератора данных и параметров запросов.')
+        parser.add_argument('--use-cache', action='store_true', help='Замерять с кэшем заказов.')
+        parser.add_argument(
+            '--reuse', action='store_true',
+            help='Читать заказы, уже лежащие в базе. Существующие заказы не изменяются: редактирование замеряется '
+                 f'на {EDIT_ORDERS} своих сгенерированных заказах, создание удаляет созданные заказы.',
+        )
+        parser.add_argument('--keep', action='store_true', help='Не удалять сгенерированные заказы после замера.')
+        parser.add_argument('--output', '-o', help='Файл для результатов в JSON (по умолчанию stdout).')
+        parser.add_argument('--baseline', help='Файл с базовыми результатами для сравнения.')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Допустимый рост задержки (0.2 = 20%%).')
+
+    def handle(self, *args, **options):
+        if options['reuse']:
+            order_ids = list(Order.objects.order_by('pk').values_list('pk', flat=True)[:options['orders']])
+            if not order_ids:
+                raise CommandError('Нет заказов для замера.')
+            seeded = []
+            if 'edit' in (options['scenario'] or SCENARIOS):
+                # Редактирование изменяет заказы, поэтому на существующих данных оно работает только со своими
+                seeded = seed_orders(EDIT_ORDERS, options['seed'])
+        else:
+            self.stderr.write(f"Загрузка {options['orders']} заказов...")
+            order_ids = seeded = seed_orders(options['orders'], options['seed'])
+            if not order_ids:
+                raise CommandError('Нет заказов для замера.')
+
+        try:
+            results = run_benchmarks(
+                order_ids, options['scenario'], options['iterations'], options['warmup'], options['seed'],
+                options['use_cache'], edit_ids=seeded,
+            )
+        finally:
+            if seeded and not options['keep']:
+                delete_orders(seeded)
+
+        for name, metrics in results['scenarios'].items():
+            self.stderr.write(
+                f"{name:12} {metrics['ops_per_second']:>9} ops/s  p50 {metrics['p50_ms']} ms  p95 {metrics['p95_ms']} ms"
+            )
+        payload = json.dumps(results, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(payload + '\n')
+        else:
+            self.stdout.write(payload)
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as baseline:
+                regressions = compare_results(results, json.load(baseline), options['threshold'])
+            for regression in regressions:
+                self.stderr.write(self.style.ERROR(
+                    f"{regression['scenario']} {regression['metric']}: {regression['baseline']} -> "
+                    f"{regression['current']} ms ({regression['change']:+.0%})"
+                ))
+            if regressions:
+                raise CommandError(f'Регрессий производительности: {len(regressions)}.')
@@ -0,0 +1,54 @@
+import gzip
+from functools import partial
+from django.core.management.base import BaseCommand, CommandError
+from ...export import EXPORT_FORMATS
+from ...forms import OrderSearchForm
+from ...routers import replica_reads
+from ...utils import get_filtered_orders
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает заказы основной таблицы (без архива) в CSV или NDJSON (в файл, gzip или stdout).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv', help='Формат выгрузки.')
+        parser.add_argument('--output', '-o', help='Файл выгрузки (по умолчанию stdout).')
+        parser.add_argument('--gzip', action='store_true', help='Сжимать файл gzip (включается автоматически для *.gz).')
+        parser.add_argument('--table-number', type=int, help='Только заказы этого стола.')
+        parser.add_argument('--status', help='Только заказы с этим статусом.')
+        parser.add_argument('--dish', help='Только заказы с блюдом, в названии которого есть эта строка.')
+        parser.add_argument('--chunk-size', type=int, help='Размер пачки серверного курсора.')
+
+    def handle(self, *args, **options):
+        form = OrderSearchForm({
+            'table_number': options['table_number'], 'status': options['status'] or '', 'dish': options['dish'] or '',
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+        iter_rows, _ = EXPORT_FORMATS[options['format']]
+        rows = iter_rows(get_filtered_orders(form), options['chunk_size'])
+
+        output = options['output']
+        use_gzip = options['gzip'] or (output or '').endswith('.gz')
+        if use_gzip and not output:
+            raise CommandError('Для сжатой выгрузки укажите файл через --output.')
+        if output:
+            stream = (gzip.open if use_gzip else open)(output, 'wt', encoding='utf-8', newline='')
+            write = stream.write
+        else:
+            stream = None
+            write = partial(self.stdout.write, ending='')
+
+        count = 0
+        try:
+            with replica_reads():
+                for line in rows:
+                    write(line)
+                    count += 1
+        finally:
+            if stream is not None:
+                stream.close()
+        if output:
+            if options['format'] == 'csv':
+                count -= 1  # заголовок CSV не считается заказом
+            self.stdout.write(self.style.SUCCESS(f'Выгружено заказов: {count} -> {output}'))
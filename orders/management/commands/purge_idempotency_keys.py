@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from ...models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет ключи идемпотентности с истекшим сроком (ORDERS_IDEMPOTENCY_TTL). '
+        'Запускается по расписанию (например, раз в час).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Количество ключей в одном DELETE.')
+
+    def handle(self, *args, **options):
+        deleted = IdempotencyKey.objects.purge_expired(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Удалено ключей: {deleted}.'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from ...models import RevenueTotal
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает накопительный итог выручки и сверяет его с полным агрегатом по заказам (включая архив).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только сверить итог с агрегатом, ничего не изменяя.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            RevenueTotal.objects.rebuild()
+
+        stored = RevenueTotal.objects.current()
+        expected = RevenueTotal.objects.expected()
+        if tuple(stored) != tuple(expected):
+            raise CommandError(
+                f'Итог выручки расходится с агрегатом: сохранено {stored[0]} заказов на {stored[1]}, '
+                f'по заказам {expected[0]} на {expected[1]}.'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Выручка сверена: {expected[0]} оплаченных заказов на {expected[1]}.'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from ...models import Order, TableTab
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает открытые счета столов заново и сверяет их с полным агрегатом по заказам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только сверить счета с агрегатом, ничего не изменяя.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            TableTab.objects.rebuild()
+
+        fields = ['table_number', *TableTab.TAB_FIELDS[:-1]]
+        stored = {tab['table_number']: tab for tab in TableTab.objects.values(*fields)}
+        expected = {
+            tab.table_number: {field: getattr(tab, field) for field in fields}
+            for tab in TableTab.objects.compute(Order.objects.all())
+        }
+        mismatched = sorted(
+            table_number for table_number in stored.keys() | expected.keys()
+            if stored.get(table_number) != expected.get(table_number)
+        )
+        if mismatched:
+            raise CommandError(f'Счета столов расходятся с агрегатом по заказам: {", ".join(map(str, mismatched))}.')
+        self.stdout.write(self.style.SUCCESS(f'Счета столов сверены: открытых столов {len(expected)}.'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from ...models import RevenueRollup
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает часовые итоги выручки: добавляет закрытые часы и пересчитывает устаревшие. '
+        'Запускается по расписанию (например, раз в час).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Пересчитать все часовые итоги заново.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            RevenueRollup.objects.update(stale=True)
+        hours = RevenueRollup.objects.refresh()
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано часов: {hours}.'))
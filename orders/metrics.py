@@ -0,0 +1,173 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from typing import Callable, Iterator, Sequence
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+# Метрики запросов в текстовом формате Prometheus: задержка, количество и время SQL-запросов
+# и размер ответа по имени маршрута (`list_order`, `order-list`, ...). Значения хранятся в памяти
+# процесса, поэтому при нескольких процессах сервера каждый отдает свои метрики.
+# Если ORDERS_METRICS_ENABLED = False, middleware отключается при старте и не добавляет накладных расходов.
+
+UNRESOLVED_VIEW = '<unresolved>'
+
+_lock = threading.Lock()
+
+
+def escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], **extra: str) -> str:
+    pairs = [*zip(names, values), *extra.items()]
+    return '{' + ','.join(f'{name}="{escape_label(str(value))}"' for name, value in pairs) + '}'
+
+
+class Counter:
+    """ Счетчик с метками. """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple, amount: float = 1) -> None:
+        with _lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} counter'
+        with _lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f'{self.name}{format_labels(self.label_names, labels)} {value}'
+
+
+class Histogram:
+    """ Гистограмма с метками и фиксированными границами корзин. """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Для каждого набора меток: количество значений в каждой корзине (последняя - +Inf), сумма, количество
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        with _lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[bisect_left(self.buckets, value)] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        with _lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), values):
+                cumulative += count
+                yield f'{self.name}_bucket{format_labels(self.label_names, labels, le=str(bound))} {cumulative}'
+            yield f'{self.name}_sum{format_labels(self.label_names, labels)} {values[-2]}'
+            yield f'{self.name}_count{format_labels(self.label_names, labels)} {values[-1]}'
+
+
+REQUESTS = Counter('cafe_http_requests_total', 'Количество запросов.', ['view', 'method', 'status'])
+REQUEST_DURATION = Histogram(
+    'cafe_http_request_duration_seconds', 'Время обработки запроса (для потоковых ответов - до первого байта).',
+    ['view', 'method'], settings.ORDERS_METRICS_LATENCY_BUCKETS,
+)
+DB_QUERIES = Counter('cafe_db_queries_total', 'Количество SQL-запросов.', ['view'])
+DB_QUERY_DURATION = Counter('cafe_db_query_duration_seconds_total', 'Суммарное время SQL-запросов.', ['view'])
+DB_QUERIES_PER_REQUEST = Histogram(
+    'cafe_db_queries_per_request', 'Количество SQL-запросов на один HTTP-запрос.',
+    ['view'], (0, 1, 2, 5, 10, 20, 50, 100, 250),
+)
+RESPONSE_SIZE = Histogram(
+    'cafe_http_response_size_bytes', 'Размер ответа (без потоковых ответов).',
+    ['view'], (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+
+METRICS = (REQUESTS, REQUEST_DURATION, DB_QUERIES, DB_QUERY_DURATION, DB_QUERIES_PER_REQUEST, RESPONSE_SIZE)
+
+
+def render_metrics() -> str:
+    """ Возвращает все метрики в текстовом формате Prometheus. """
+    return '\n'.join(line for metric in METRICS for line in metric.render()) + '\n'
+
+
+class QueryStats:
+    """ Считает количество и время SQL-запросов одного HTTP-запроса через `execute_wrapper`. """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute: Callable, sql, params, many: bool, context: dict):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+    @contextmanager
+    def capture(self) -> Iterator['QueryStats']:
+        """ Подключает счетчик ко всем соединениям с базами данных на время блока. """
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(self))
+            yield self
+
+
+class MetricsMiddleware:
+    """ Записывает метрики каждого запроса по имени маршрута, к которому он относится. """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable):
+        if not settings.ORDERS_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with QueryStats().capture() as stats:
+            response = self.get_response(request)
+        self.observe(request, response, time.perf_counter() - started, stats)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        started = time.perf_counter()
+        with QueryStats().capture() as stats:
+            response = await self.get_response(request)
+        self.observe(request, response, time.perf_counter() - started, stats)
+        return response
+
+    @staticmethod
+    def observe(request: HttpRequest, response: HttpResponse, duration: float, stats: QueryStats) -> None:
+        resolver_match = getattr(request, 'resolver_match', None)
+        view = resolver_match.view_name if resolver_match is not None else UNRESOLVED_VIEW
+        REQUESTS.inc((view, request.method, str(response.status_code)))
+        REQUEST_DURATION.observe((view, request.method), duration)
+        DB_QUERIES.inc((view,), stats.count)
+        DB_QUERY_DURATION.inc((view,), stats.duration)
+        DB_QUERIES_PER_REQUEST.observe((view,), stats.count)
+        if not response.streaming:
+            RESPONSE_SIZE.observe((view,), len(response.content))
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.19 on 2026-10-18 02:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_alter_order_items_alter_order_status_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'table_number', 'id'], name='orders_status_table_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['table_number', 'id'], name='orders_table_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'paid')), fields=['total_price'], name='orders_paid_total_price_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.19 on 2026-10-18 02:25
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_revenue_total(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    RevenueTotal = apps.get_model('orders', 'RevenueTotal')
+    db = schema_editor.connection.alias
+    totals = Order.objects.using(db).filter(status='paid').aggregate(
+        order_count=Count('id'), total_revenue=Sum('total_price')
+    )
+    RevenueTotal.objects.using(db).create(
+        key='paid', order_count=totals['order_count'], total_revenue=totals['total_revenue'] or 0
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_order_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueTotal',
+            fields=[
+                ('key', models.CharField(default='paid', max_length=10, primary_key=True, serialize=False)),
+                ('order_count', models.BigIntegerField(default=0)),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.RunPython(fill_revenue_total, migrations.RunPython.noop),
+    ]
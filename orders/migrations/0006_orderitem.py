@@ -0,0 +1,50 @@
+# Generated by Django 4.2.19 on 2026-10-18 02:28
+
+from collections import Counter
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_order_items(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    db = schema_editor.connection.alias
+    batch = []
+    for order in Order.objects.using(db).only('pk', 'items').iterator(chunk_size=2000):
+        quantities = Counter(
+            (item['name'], Decimal(str(item['price'])).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+            for item in order.items
+        )
+        batch.extend(
+            OrderItem(order_id=order.pk, name=name, price=price, quantity=quantity)
+            for (name, price), quantity in quantities.items()
+        )
+        if len(batch) >= 5000:
+            OrderItem.objects.using(db).bulk_create(batch)
+            batch = []
+    OrderItem.objects.using(db).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_revenuetotal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_items', to='orders.order')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['name', 'price', 'quantity'], name='orders_item_name_price_qty_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_order_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.19 on 2026-10-18 02:52
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def backfill_timestamps(apps, schema_editor):
+    # Точное время создания и оплаты старых заказов неизвестно: берется время последнего изменения
+    Order = apps.get_model('orders', 'Order')
+    db = schema_editor.connection.alias
+    Order.objects.using(db).update(created_at=F('updated_at'))
+    Order.objects.using(db).filter(status='paid').update(paid_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_order_updated_at_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueRollup',
+            fields=[
+                ('hour', models.DateTimeField(primary_key=True, serialize=False)),
+                ('order_count', models.BigIntegerField(default=0)),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('stale', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='paid_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_timestamps, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'paid')), fields=['paid_at', 'total_price'], name='orders_paid_at_idx'),
+        ),
+    ]
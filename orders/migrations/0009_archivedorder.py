@@ -0,0 +1,31 @@
+# Generated by Django 4.2.19 on 2026-10-18 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_order_timestamps_revenuerollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('table_number', models.IntegerField()),
+                ('items', models.JSONField(default=list)),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(choices=[('waiting', 'в ожидании'), ('ready', 'готово'), ('paid', 'оплачено')], max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('paid_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField()),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('archived_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['paid_at', 'total_price'], name='orders_archive_paid_at_idx'), models.Index(fields=['table_number', 'id'], name='orders_archive_table_id_idx')],
+            },
+        ),
+    ]
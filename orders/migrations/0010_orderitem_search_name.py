@@ -0,0 +1,66 @@
+# Generated by Django 4.2.19 on 2026-10-18 03:00
+
+from django.db import migrations, models, transaction
+
+TRGM_INDEX_NAME = 'orders_item_search_trgm_idx'
+
+
+def normalize_dish_name(name):
+    return ' '.join(name.casefold().replace('ё', 'е').split())
+
+
+def backfill_search_names(apps, schema_editor):
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    db = schema_editor.connection.alias
+    # Различных названий блюд немного: одно UPDATE на название по индексу orders_item_name_price_qty_idx
+    names = OrderItem.objects.using(db).order_by().values_list('name', flat=True).distinct()
+    for name in list(names):
+        OrderItem.objects.using(db).filter(name=name).update(search_name=normalize_dish_name(name))
+    if schema_editor.connection.vendor == 'postgresql':
+        # Без статистики по новой колонке планировщик не выбирает индексы поиска до автоанализа
+        schema_editor.execute('ANALYZE orders_orderitem')
+
+
+def create_trigram_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+        try:
+            # Без прав на создание расширения остается индекс для поиска по началу названия
+            with transaction.atomic(using=connection.alias):
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        except Exception:
+            return
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {TRGM_INDEX_NAME} ON orders_orderitem USING gin (search_name gin_trgm_ops)'
+        )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {TRGM_INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_archivedorder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='search_name',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.RunPython(backfill_search_names, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['search_name', 'order_id'], name='orders_item_search_prefix_idx', opclasses=['varchar_pattern_ops', 'int8_ops']),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.19 on 2026-10-18 03:09
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, Min, Q, Sum
+
+
+def populate_table_tabs(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    TableTab = apps.get_model('orders', 'TableTab')
+    db = schema_editor.connection.alias
+    rows = (
+        Order.objects.using(db).filter(status__in=['waiting', 'ready']).order_by().values('table_number')
+        .annotate(
+            open_count=Count('*'),
+            waiting_count=Count('pk', filter=Q(status='waiting')),
+            ready_count=Count('pk', filter=Q(status='ready')),
+            outstanding=Sum('total_price'),
+            oldest_waiting_at=Min('created_at', filter=Q(status='waiting')),
+        )
+    )
+    TableTab.objects.using(db).bulk_create([TableTab(**row) for row in rows])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0011_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableTab',
+            fields=[
+                ('table_number', models.IntegerField(primary_key=True, serialize=False)),
+                ('open_count', models.PositiveIntegerField(default=0)),
+                ('waiting_count', models.PositiveIntegerField(default=0)),
+                ('ready_count', models.PositiveIntegerField(default=0)),
+                ('outstanding', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('oldest_waiting_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(populate_table_tabs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.19 on 2026-10-18 12:00
+
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Sum
+
+
+def include_archive_in_revenue_total(apps, schema_editor):
+    # Раньше перенос в архив вычитал заказы из итога выручки: пересчитываем итог по основной таблице и архиву
+    Order = apps.get_model('orders', 'Order')
+    ArchivedOrder = apps.get_model('orders', 'ArchivedOrder')
+    RevenueTotal = apps.get_model('orders', 'RevenueTotal')
+    db = schema_editor.connection.alias
+    order_count, total_revenue = 0, Decimal('0.00')
+    for model in (Order, ArchivedOrder):
+        totals = model.objects.using(db).filter(status='paid').aggregate(
+            order_count=Count('id'), total_revenue=Sum('total_price')
+        )
+        order_count += totals['order_count']
+        total_revenue += totals['total_revenue'] or 0
+    RevenueTotal.objects.using(db).update_or_create(
+        key='paid', defaults={'order_count': order_count, 'total_revenue': total_revenue}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0012_tabletab'),
+    ]
+
+    operations = [
+        migrations.RunPython(include_archive_in_revenue_total, migrations.RunPython.noop),
+    ]
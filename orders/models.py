@@ -1,6 +1,346 @@
+import csv
+import io
+import json
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Iterable, Optional
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models, router, transaction
+from django.db.models import F, Q, Case, Count, Max, Min, Sum, Value, When
+from django.db.models.functions import TruncHour
 from django.core.validators import MinValueValidator
+from django.utils import timezone
+from .cache import invalidate_orders
+from .events import EVENT_FIELDS, PREVIOUS_STATUS_FIELD, events_enabled, publish_order_events
+from .validation import MAX_NAME_LENGTH, check_items, item_messages
+
+
+def to_money(value) -> Decimal:
+    """
+    Приводит сумму к тому виду, в котором она хранится в колонке `total_price` (2 знака после запятой).
+    :param value: Сумма (Decimal, float, int или строка).
+    :return: Округленная сумма.
+    """
+    return Order._meta.get_field('total_price').to_python(value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def copy_rows(cursor, model: type[models.Model], columns: list[str], rows) -> None:
+    """
+    Загружает строки в таблицу модели командой PostgreSQL `COPY ... FROM STDIN` в формате CSV.
+    :param cursor: Курсор соединения PostgreSQL (psycopg2).
+    :param model: Модель, в таблицу которой загружаются строки.
+    :param columns: Имена колонок в порядке значений строк.
+    :param rows: Итерируемые кортежи значений.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    quote_name = cursor.db.ops.quote_name
+    cursor.copy_expert(
+        f'COPY {quote_name(model._meta.db_table)} ({", ".join(map(quote_name, columns))}) FROM STDIN WITH (FORMAT csv)',
+        buffer,
+    )
+
+
+def revenue_share(status: Optional[str], total_price) -> tuple[int, Decimal]:
+    """
+    Возвращает вклад заказа в выручку: количество оплаченных заказов и их сумму.
+    :param status: Статус заказа (None, если заказа нет).
+    :param total_price: Итоговая сумма заказа.
+    :return: Кортеж (1, сумма) для оплаченного заказа, иначе (0, 0).
+    """
+    if status == 'paid':
+        return 1, to_money(total_price)
+    return 0, Decimal('0.00')
+
+
+def hour_start(moment: datetime) -> datetime:
+    """ Возвращает начало часа (UTC), в который попадает момент времени. """
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def stamp_paid_at(order: 'Order', stored_status: Optional[str], stored_paid_at: Optional[datetime]) -> None:
+    """
+    Выставляет время оплаты заказа: текущее время при переходе в статус `paid`,
+    прежнее - если заказ уже был оплачен, None - для неоплаченных заказов.
+    Для нового заказа заданное время оплаты сохраняется (например, при импорте).
+    """
+    if order.status != 'paid':
+        order.paid_at = None
+    elif stored_status == 'paid':
+        order.paid_at = stored_paid_at or timezone.now()
+    elif stored_status is None:
+        order.paid_at = order.paid_at or timezone.now()
+    else:
+        order.paid_at = timezone.now()
+
+
+def order_event_values(order: 'Order', previous_status: Optional[str] = None) -> dict[str, Any]:
+    """
+    Возвращает значения полей заказа для события об его изменении (см. `orders.events`).
+    :param previous_status: Статус заказа до изменения (для события updated).
+    """
+    return {**{field: getattr(order, field) for field in EVENT_FIELDS}, 'total_price': to_money(order.total_price),
+            PREVIOUS_STATUS_FIELD: previous_status}
+
+
+def updated_event_values(orders: models.QuerySet, previous_statuses: dict[int, str]) -> list[dict[str, Any]]:
+    """
+    Возвращает значения полей измененных заказов для событий updated.
+    :param previous_statuses: Статусы заказов до изменения по id (если статус не менялся - пустой словарь).
+    """
+    return [{**row, PREVIOUS_STATUS_FIELD: previous_statuses.get(row['id'], row['status'])}
+            for row in orders.values(*EVENT_FIELDS)]
+
+
+class OrderVersionConflict(Exception):
+    """
+    Заказ изменен (или удален) другим пользователем после того, как его прочитали для редактирования.
+    Атрибуты:
+        expected_version (int): Версия, с которой начиналось редактирование.
+        current_version (int | None): Текущая версия в базе (None, если заказ удален).
+    """
+
+    def __init__(self, expected_version: int, current_version: Optional[int]):
+        self.expected_version = expected_version
+        self.current_version = current_version
+        if current_version is None:
+            message = 'Заказ удален другим пользователем.'
+        else:
+            message = f'Заказ изменен другим пользователем: версия {current_version}, редактировалась версия {expected_version}.'
+        super().__init__(message)
+
+
+class OrderQuerySet(models.QuerySet):
+    def paid_revenue(self) -> tuple[int, Decimal]:
+        """
+        Считает количество и сумму оплаченных заказов в выборке полным агрегатом.
+        :return: Кортеж (количество, сумма).
+        """
+        totals = self.filter(status='paid').aggregate(order_count=Count('*'), total_revenue=Sum('total_price'))
+        return totals['order_count'], totals['total_revenue'] or Decimal('0.00')
+
+    def with_dish(self, query: str, prefix: bool = False) -> 'OrderQuerySet':
+        """
+        Оставляет заказы, в которых есть блюдо с подходящим названием (без учета регистра).
+        Поиск идет по нормализованным названиям в таблице `OrderItem` по индексу, без разбора JSON заказов.
+        :param query: Название блюда или его часть.
+        :param prefix: Искать только по началу названия (иначе - по любой части).
+        :return: Отфильтрованная выборка.
+        """
+        lookup = 'search_name__startswith' if prefix else 'search_name__contains'
+        return self.filter(pk__in=OrderItem.objects.filter(**{lookup: normalize_dish_name(query)}).values('order_id'))
+
+    def bulk_create(self, objs, *args, **kwargs) -> list:
+        """
+        Создает заказы одним INSERT и в той же транзакции добавляет оплаченные к накопительному итогу выручки.
+        После фиксации транзакции кэш заказов сбрасывается.
+        Для заказов без `total_price` сумма вычисляется по ценам блюд, как в `Order.save`.
+        Валидация не выполняется: данные должны быть проверены заранее.
+        """
+        objs = self._with_total_price(objs)
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            OrderItem.objects.using(self.db).bulk_create(
+                [order_item for order in created for order_item in build_order_items(order)]
+            )
+            self._add_created_revenue(created)
+            TableTab.objects.db_manager(self.db).refresh(
+                order.table_number for order in created if order.status in Order.OPEN_STATUSES
+            )
+            invalidate_orders(self.db)
+            publish_order_events('created', map(order_event_values, created), self.db)
+        return created
+
+    def copy_create(self, objs) -> list:
+        """
+        Загружает заказы через PostgreSQL COPY (на других бэкендах - через `bulk_create`).
+        Идентификаторы заранее резервируются из последовательности, поэтому блюда загружаются
+        вторым COPY, а накопительный итог выручки обновляется в той же транзакции.
+        Валидация не выполняется: данные должны быть проверены заранее.
+        """
+        connection = connections[self.db]
+        if connection.vendor != 'postgresql':
+            return self.bulk_create(objs)
+        objs = self._with_total_price(objs)
+        if not objs:
+            return objs
+        with transaction.atomic(using=self.db), connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                [Order._meta.db_table, len(objs)],
+            )
+            now = timezone.now()
+            for order, (pk,) in zip(objs, cursor.fetchall()):
+                order.pk = pk
+                order.updated_at = now
+                order._state.adding = False
+                order._state.db = self.db
+            copy_rows(cursor, Order, [
+                'id', 'table_number', 'items', 'total_price', 'status', 'updated_at', 'version', 'created_at', 'paid_at',
+            ], (
+                (order.pk, order.table_number, json.dumps(order.items, ensure_ascii=False),
+                 to_money(order.total_price), order.status, order.updated_at, order.version, order.created_at,
+                 order.paid_at)
+                for order in objs
+            ))
+            copy_rows(cursor, OrderItem, ['order_id', 'name', 'search_name', 'price', 'quantity'], (
+                (order.pk, name, normalize_dish_name(name)[:MAX_NAME_LENGTH], price, quantity)
+                for order in objs
+                for name, price, quantity in order_item_values(order.items)
+            ))
+            self._add_created_revenue(objs)
+            TableTab.objects.db_manager(self.db).refresh(
+                order.table_number for order in objs if order.status in Order.OPEN_STATUSES
+            )
+            invalidate_orders(self.db)
+            publish_order_events('created', map(order_event_values, objs), self.db)
+        return objs
+
+    @staticmethod
+    def _with_total_price(objs) -> list:
+        """
+        Вычисляет `total_price` по ценам блюд для заказов, где сумма не задана, как в `Order.save`,
+        и выставляет время оплаты оплаченным заказам.
+        """
+        objs = list(objs)
+        for order in objs:
+            if order.total_price is None:
+                order.total_price = sum(item.get('price', 0) for item in order.items)
+            stamp_paid_at(order, None, None)
+        return objs
+
+    def _add_created_revenue(self, created: list) -> None:
+        """
+        Добавляет оплаченные из новых заказов к накопительному итогу выручки
+        и помечает устаревшими часовые итоги, в которые попали заказы с прошедшим временем оплаты.
+        """
+        shares = [revenue_share(order.status, order.total_price) for order in created]
+        RevenueTotal.objects.db_manager(self.db).shift(
+            sum(count for count, _ in shares), sum((amount for _, amount in shares), Decimal('0.00'))
+        )
+        RevenueRollup.objects.db_manager(self.db).invalidate(order.paid_at for order in created)
+
+    def update(self, **kwargs) -> int:
+        """
+        Обновляет заказы выборки одним UPDATE.
+        Если меняются `status` или `total_price`, строки блокируются, а разница в выручке
+        переносится в накопительный итог в той же транзакции. При замене `items` строки
+        `OrderItem` пересоздаются одним bulk INSERT.
+        Версия заказа и время изменения обновляются в том же UPDATE.
+        При смене статуса время оплаты выставляется так же, как в `Order.save`, а часовые итоги
+        выручки за прошедшие часы, которые затронуло изменение, помечаются устаревшими.
+        Если на события о заказах есть подписчики, строки блокируются всегда, чтобы после UPDATE
+        опубликовать измененные заказы. При изменении статуса, суммы, стола или времени создания
+        пересчитываются счета затронутых столов (`TableTab`).
+        """
+        now = timezone.now()
+        kwargs.setdefault('version', F('version') + 1)
+        kwargs.setdefault('updated_at', now)
+        if 'status' in kwargs and 'paid_at' not in kwargs:
+            if kwargs['status'] == 'paid':
+                kwargs['paid_at'] = Case(
+                    When(status='paid', paid_at__isnull=False, then=F('paid_at')), default=Value(now)
+                )
+            else:
+                kwargs['paid_at'] = None
+        tab_changed = bool(TableTab.ORDER_FIELDS & kwargs.keys())
+        if not tab_changed and not {'status', 'total_price', 'items', 'paid_at'} & kwargs.keys():
+            with transaction.atomic(using=self.db):
+                invalidate_orders(self.db)
+                if not events_enabled(self.db):
+                    return super().update(**kwargs)
+                locked = self._locked()
+                updated = models.QuerySet.update(locked, **kwargs)
+                publish_order_events('updated', updated_event_values(locked, {}), self.db)
+            return updated
+        with transaction.atomic(using=self.db):
+            invalidate_orders(self.db)
+            locked = self._locked()
+            previous_count, previous_revenue = locked.paid_revenue()
+            previous_hours = locked.closed_paid_hours()
+            previous_tables = locked.open_tables() if tab_changed else set()
+            previous_statuses = (
+                dict(locked.values_list('id', 'status')) if 'status' in kwargs and events_enabled(self.db) else {}
+            )
+            updated = models.QuerySet.update(locked, **kwargs)
+            if tab_changed:
+                TableTab.objects.db_manager(self.db).refresh(previous_tables | locked.open_tables())
+            order_count, total_revenue = locked.paid_revenue()
+            RevenueTotal.objects.db_manager(self.db).shift(
+                order_count - previous_count, total_revenue - previous_revenue
+            )
+            RevenueRollup.objects.db_manager(self.db).invalidate(previous_hours | locked.closed_paid_hours())
+            if 'items' in kwargs:
+                OrderItem.objects.using(self.db).filter(order__in=locked).delete()
+                OrderItem.objects.using(self.db).bulk_create([
+                    order_item
+                    for order in locked.only('pk', 'items')
+                    for order_item in build_order_items(order)
+                ])
+            publish_order_events('updated', updated_event_values(locked, previous_statuses), self.db)
+        return updated
+
+    update.alters_data = True
+
+    def set_status(self, status: str) -> int:
+        """
+        Переводит все заказы выборки в указанный статус одним UPDATE.
+        :param status: Новый статус.
+        :raises ValidationError: Если статус некорректный (как в `Order.clean`).
+        :return: Количество измененных заказов.
+        """
+        if status not in dict(Order.STATUS_CHOICES):
+            raise ValidationError(f"Некорректный статус: {status}.")
+        return self.exclude(status=status).update(status=status)
+
+    set_status.alters_data = True
+
+    def delete(self) -> tuple[int, dict[str, int]]:
+        """
+        Удаляет заказы выборки и в той же транзакции вычитает оплаченные из накопительного итога выручки
+        и пересчитывает счета столов с неоплаченными заказами.
+        """
+        with transaction.atomic(using=self.db):
+            invalidate_orders(self.db)
+            locked = self._locked()
+            order_count, total_revenue = locked.paid_revenue()
+            paid_hours = locked.closed_paid_hours()
+            open_tables = locked.open_tables()
+            deleted = list(locked.values(*EVENT_FIELDS)) if events_enabled(self.db) else []
+            # Для удаления достаточно первичных ключей: JSON с блюдами не загружается
+            result = models.QuerySet.delete(locked.only('pk'))
+            TableTab.objects.db_manager(self.db).refresh(open_tables)
+            RevenueTotal.objects.db_manager(self.db).shift(-order_count, -total_revenue)
+            RevenueRollup.objects.db_manager(self.db).invalidate(paid_hours)
+            publish_order_events('deleted', deleted, self.db)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def open_tables(self) -> set[int]:
+        """ Возвращает номера столов, у которых в выборке есть неоплаченные заказы. """
+        return set(self.filter(status__in=Order.OPEN_STATUSES).values_list('table_number', flat=True).distinct())
+
+    def closed_paid_hours(self) -> set[datetime]:
+        """ Возвращает часы (UTC) до текущего, в которые были оплачены заказы выборки. """
+        return set(
+            self.filter(status='paid', paid_at__lt=hour_start(timezone.now()))
+            .annotate(hour=TruncHour('paid_at', tzinfo=dt_timezone.utc))
+            .values_list('hour', flat=True).distinct()
+        )
+
+    def _locked(self) -> 'OrderQuerySet':
+        """
+        Блокирует строки выборки (SELECT ... FOR UPDATE) и возвращает выборку по их первичным ключам.
+        Строки блокируются по возрастанию pk: пересекающиеся массовые операции берут блокировки в одном порядке
+        и не попадают во взаимную блокировку.
+        """
+        pks = list(self.order_by('pk').select_for_update().values_list('pk', flat=True))
+        return Order.objects.using(self.db).filter(pk__in=pks)
 
 
 class Order(models.Model):
@@ -11,32 +351,58 @@ class Order(models.Model):
         items (List[Dict[str, Any]]): JSON-список блюд в заказе.
         total_price (Decimal): Общая сумма заказа.
         status (str): Статус заказа (waiting, ready, paid).
+        created_at (datetime): Время создания.
+        paid_at (datetime): Время оплаты (только для оплаченных заказов).
+        updated_at (datetime): Время последнего изменения.
+        version (int): Номер версии, увеличивается при каждом изменении.
     """
     STATUS_CHOICES = [
         ('waiting', 'в ожидании'),
         ('ready', 'готово'),
         ('paid', 'оплачено'),
     ]
+    # Статусы открытых (еще не оплаченных) заказов
+    OPEN_STATUSES = ('waiting', 'ready')
     table_number = models.IntegerField(validators=[MinValueValidator(1)])
     items = models.JSONField(default=list)
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='waiting')
+    created_at = models.DateTimeField(default=timezone.now)
+    paid_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+
+    objects = OrderQuerySet.as_manager()
+
+    # Версия, с которой начиналось редактирование (оптимистичная блокировка, см. `save`)
+    expected_version: Optional[int] = None
+    # Список блюд, уже проверенный `check_items` (сериализатором или формой): `clean` его не проверяет повторно
+    validated_items: Optional[list] = None
+
+    class Meta:
+        indexes = [
+            # Поиск по статусу и номеру стола (get_filtered_orders, filterset_fields) с keyset-пагинацией по id
+            models.Index(fields=['status', 'table_number', 'id'], name='orders_status_table_id_idx'),
+            # Поиск только по номеру стола
+            models.Index(fields=['table_number', 'id'], name='orders_table_id_idx'),
+            # Выручка: SUM(total_price) по оплаченным заказам читается только из индекса
+            models.Index(fields=['total_price'], condition=Q(status='paid'), name='orders_paid_total_price_idx'),
+            # Выручка за период: оплаченные заказы по времени оплаты, сумма читается из индекса
+            models.Index(fields=['paid_at', 'total_price'], condition=Q(status='paid'), name='orders_paid_at_idx'),
+        ]
 
     def clean(self) -> None:
         """
-        Валидация данных:
+        Валидация данных по общим правилам `validation.check_items`:
         1. Поле items не может быть пустым.
-        2. Цена не может быть нулевой или отрицательной.
+        2. Цена не может быть нулевой или отрицательной, название блюда - пустым.
         3. Статус должен быть валидным.
+        Список блюд, уже проверенный сериализатором или формой (`validated_items`), повторно не проверяется.
         """
-        if not self.items:
-            raise ValidationError("Поле 'items' не может быть пустым.")
-
-        for item in self.items:
-            if item.get('price') <= 0:
-                raise ValidationError("Цена блюда не может быть отрицательной или нулевой.")
-            if not item.get('name'):
-                raise ValidationError("Название блюда не может быть пустым.")
+        if self.items is not self.validated_items:
+            errors = check_items(self.items)
+            if errors:
+                raise ValidationError(item_messages(errors))
 
         if self.status not in dict(self.STATUS_CHOICES):
             raise ValidationError(f"Некорректный статус: {self.status}.")
@@ -45,13 +411,574 @@ class Order(models.Model):
         """
         Перед сохранением заказа автоматически вычисляем total_price как сумму цен всех блюд,
         а также проверяем данные на валидность.
+        В той же транзакции обновляется накопительный итог выручки, если заказ входит в статус `paid`,
+        выходит из него или меняет сумму, оставаясь оплаченным, а при изменении списка блюд
+        пересоздаются строки `OrderItem`, а при изменении открытого заказа пересчитывается счет стола (`TableTab`).
+        Событие о заказе публикуется подписчикам после фиксации транзакции.
+        Если задана `expected_version`, заказ сохраняется условным UPDATE ... WHERE version = expected_version:
+        изменения, сделанные другими пользователями после чтения заказа, не перезаписываются.
+        :raises OrderVersionConflict: Если версия заказа в базе отличается от `expected_version`.
         """
         if self.total_price is None:
             self.total_price = sum(item.get('price', 0) for item in self.items)
 
         # Проверяем на валидность перед сохранением
         self.clean()
-        super().save(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(Order, instance=self)
+        with transaction.atomic(using=using):
+            stored = self._stored_state(using)
+            previous_count, previous_revenue = revenue_share(stored['status'], stored['total_price'])
+            self.version = stored['version'] + 1 if stored['version'] else 1
+            stamp_paid_at(self, stored['status'], stored['paid_at'])
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version', 'updated_at', 'paid_at'}
+            super().save(*args, **kwargs)
+            self.expected_version = None
+            self.validated_items = None
+            order_count, total_revenue = revenue_share(self.status, self.total_price)
+            RevenueTotal.objects.db_manager(using).shift(
+                order_count - previous_count, total_revenue - previous_revenue
+            )
+            if (previous_count, previous_revenue, stored['paid_at']) != (order_count, total_revenue, self.paid_at):
+                RevenueRollup.objects.db_manager(using).invalidate([stored['paid_at'], self.paid_at])
+            if stored['items'] != self.items:
+                self.sync_order_items(using, replace=stored['items'] is not None)
+            tab_state = (self.table_number, self.status, to_money(self.total_price), self.created_at)
+            stored_tab_state = (stored['table_number'], stored['status'], stored['total_price'], stored['created_at'])
+            if tab_state != stored_tab_state and (
+                stored['status'] in self.OPEN_STATUSES or self.status in self.OPEN_STATUSES
+            ):
+                TableTab.objects.db_manager(using).refresh(
+                    {stored['table_number'], self.table_number} - {None}
+                )
+            publish_order_events('created' if stored['version'] is None else 'updated',
+                                 [order_event_values(self, stored['status'])], using)
+
+    def delete(self, *args, **kwargs) -> tuple[int, dict[str, int]]:
+        """
+        Удаляет заказ и в той же транзакции вычитает его из накопительного итога выручки.
+        """
+        using = kwargs.get('using') or router.db_for_write(Order, instance=self)
+        with transaction.atomic(using=using):
+            stored = self._stored_state(using)
+            order_count, total_revenue = revenue_share(stored['status'], stored['total_price'])
+            deleted = {'id': self.pk, 'table_number': self.table_number, **stored}
+            result = super().delete(*args, **kwargs)
+            RevenueTotal.objects.db_manager(using).shift(-order_count, -total_revenue)
+            if order_count:
+                RevenueRollup.objects.db_manager(using).invalidate([stored['paid_at']])
+            if stored['status'] in self.OPEN_STATUSES:
+                TableTab.objects.db_manager(using).refresh([stored['table_number']])
+            if stored['status'] is not None:
+                publish_order_events('deleted', [deleted], using)
+        return result
+
+    def sync_order_items(self, using: str, replace: bool = True) -> None:
+        """
+        Записывает блюда заказа в таблицу `OrderItem` одним bulk INSERT.
+        :param using: Алиас базы данных.
+        :param replace: Удалить ранее сохраненные строки заказа перед вставкой.
+        """
+        if replace:
+            OrderItem.objects.using(using).filter(order=self).delete()
+        OrderItem.objects.using(using).bulk_create(build_order_items(self))
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update) -> bool:
+        if self.expected_version is not None:
+            base_qs = base_qs.filter(version=self.expected_version)
+        updated = super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        if not updated and self.expected_version is not None:
+            current_version = Order.objects.using(using).filter(pk=pk_val).values_list('version', flat=True).first()
+            raise OrderVersionConflict(self.expected_version, current_version)
+        return updated
+
+    def _stored_state(self, using: str) -> dict[str, Any]:
+        """
+        Блокирует строку заказа и возвращает сохраненные в базе стол, статус, сумму, список блюд, версию,
+        время создания и оплаты. Для нового заказа все значения равны None.
+        """
+        fields = ('table_number', 'status', 'total_price', 'items', 'version', 'created_at', 'paid_at')
+        stored = None
+        if not self._state.adding and self.pk is not None:
+            stored = Order.objects.using(using).select_for_update().filter(pk=self.pk).values(*fields).first()
+        return stored or dict.fromkeys(fields)
 
     def __str__(self):
         return f"Заказ {self.id} - Столик {self.table_number} - Сумма {self.total_price}"
+
+
+def normalize_dish_name(name: str) -> str:
+    """
+    Приводит название блюда к виду для поиска: без регистра (casefold, для кириллицы и латиницы),
+    `ё` заменяется на `е`, повторяющиеся пробелы схлопываются.
+    :param name: Название блюда или поисковый запрос.
+    :return: Нормализованная строка.
+    """
+    return ' '.join(name.casefold().replace('ё', 'е').split())
+
+
+def order_item_values(items: list[dict[str, Any]]) -> list[tuple[str, Decimal, int]]:
+    """
+    Группирует JSON-список блюд в значения строк `OrderItem`.
+    Одинаковые блюда (название и цена) объединяются в одну строку с количеством.
+    :param items: Список блюд заказа.
+    :return: Список кортежей (название, цена, количество).
+    """
+    quantities = Counter((item['name'], to_money(item['price'])) for item in items)
+    return [(name, price, quantity) for (name, price), quantity in quantities.items()]
+
+
+def build_order_items(order: Order) -> list['OrderItem']:
+    """
+    Строит строки `OrderItem` по JSON-списку блюд заказа.
+    :param order: Сохраненный заказ.
+    :return: Список несохраненных строк `OrderItem`.
+    """
+    return [
+        OrderItem(order=order, name=name, search_name=normalize_dish_name(name)[:MAX_NAME_LENGTH], price=price,
+                  quantity=quantity)
+        for name, price, quantity in order_item_values(order.items)
+    ]
+
+
+class OrderItem(models.Model):
+    """
+    Блюдо в заказе (нормализованная копия `Order.items` для аналитики по блюдам).
+    Включает в себя:
+        order (Order): Заказ.
+        name (str): Название блюда.
+        search_name (str): Название для поиска (`normalize_dish_name`).
+        price (Decimal): Цена блюда.
+        quantity (int): Количество одинаковых блюд в заказе.
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='order_items')
+    name = models.CharField(max_length=MAX_NAME_LENGTH)
+    search_name = models.CharField(max_length=MAX_NAME_LENGTH, default='')
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            # GROUP BY по названию блюда читает только индекс
+            models.Index(fields=['name', 'price', 'quantity'], name='orders_item_name_price_qty_idx'),
+            # Поиск блюда по началу названия (LIKE 'запрос%'). Поиск по части названия использует
+            # триграммный GIN-индекс orders_item_search_trgm_idx, если в базе доступно расширение pg_trgm
+            models.Index(
+                fields=['search_name', 'order_id'], opclasses=['varchar_pattern_ops', 'int8_ops'],
+                name='orders_item_search_prefix_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} x{self.quantity} - Заказ {self.order_id}"
+
+
+class RevenueTotalManager(models.Manager):
+    def shift(self, order_count: int, total_revenue: Decimal) -> None:
+        """
+        Сдвигает накопительный итог выручки на заданные величины.
+        Должен вызываться в транзакции, которая изменяет сами заказы.
+        :param order_count: Изменение количества оплаченных заказов.
+        :param total_revenue: Изменение суммы оплаченных заказов.
+        """
+        if not order_count and not total_revenue:
+            return
+        changes = {
+            'order_count': F('order_count') + order_count,
+            'total_revenue': F('total_revenue') + total_revenue,
+        }
+        if not self.filter(pk=RevenueTotal.PAID).update(**changes):
+            self.get_or_create(pk=RevenueTotal.PAID)
+            self.filter(pk=RevenueTotal.PAID).update(**changes)
+
+    def current(self) -> tuple[int, Decimal]:
+        """
+        Читает накопительный итог выручки одной строкой.
+        :return: Кортеж (количество оплаченных заказов, выручка).
+        """
+        totals = self.filter(pk=RevenueTotal.PAID).values_list('order_count', 'total_revenue').first()
+        return totals or (0, Decimal('0.00'))
+
+    def expected(self) -> tuple[int, Decimal]:
+        """
+        Считает итог полным агрегатом по оплаченным заказам основной таблицы и архива.
+        :return: Кортеж (количество оплаченных заказов, выручка).
+        """
+        totals = [
+            orders.aggregate(order_count=Count('*'), total_revenue=Sum('total_price'))
+            for orders in paid_order_sources(self.db)
+        ]
+        return (sum(total['order_count'] for total in totals),
+                sum((total['total_revenue'] or Decimal('0.00') for total in totals), Decimal('0.00')))
+
+    def rebuild(self) -> tuple[int, Decimal]:
+        """
+        Пересчитывает накопительный итог полным агрегатом по заказам основной таблицы и архива.
+        :return: Кортеж (количество оплаченных заказов, выручка) после пересчета.
+        """
+        with transaction.atomic(using=self.db):
+            self.get_or_create(pk=RevenueTotal.PAID)
+            self.select_for_update().filter(pk=RevenueTotal.PAID).first()
+            order_count, total_revenue = self.expected()
+            self.filter(pk=RevenueTotal.PAID).update(order_count=order_count, total_revenue=total_revenue)
+        return order_count, total_revenue
+
+
+class RevenueTotal(models.Model):
+    """
+    Накопительный итог по оплаченным заказам, включая перенесенные в архив.
+    Обновляется в той же транзакции, что и заказ, поэтому выручка читается одной строкой без SUM по истории.
+    Включает в себя:
+        key (str): Ключ итога (`paid`).
+        order_count (int): Количество оплаченных заказов.
+        total_revenue (Decimal): Сумма оплаченных заказов.
+    """
+    PAID = 'paid'
+
+    key = models.CharField(max_length=10, primary_key=True, default=PAID)
+    order_count = models.BigIntegerField(default=0)
+    total_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    objects = RevenueTotalManager()
+
+    def __str__(self):
+        return f"Выручка {self.key} - Заказов {self.order_count} - Сумма {self.total_revenue}"
+
+
+class RevenueRollupManager(models.Manager):
+    def invalidate(self, moments: Iterable[Optional[datetime]]) -> None:
+        """
+        Помечает устаревшими часовые итоги за прошедшие часы, в которые попадают указанные моменты оплаты.
+        Итоги текущего часа не хранятся, поэтому обычная оплата заказа не делает лишних запросов.
+        Должен вызываться в транзакции, которая изменяет сами заказы.
+        :param moments: Время оплаты (или начало часа) измененных заказов; None пропускаются.
+        """
+        current_hour = hour_start(timezone.now())
+        hours = {hour_start(moment) for moment in moments if moment is not None and moment < current_hour}
+        if hours:
+            self._mark_stale(hours)
+
+    def _mark_stale(self, hours: Iterable[datetime]) -> None:
+        # Вставка или пометка строк блокирует их до конца транзакции, поэтому пересчет
+        # в `refresh` не перезапишет итог данными, прочитанными до этого изменения
+        self.bulk_create(
+            [RevenueRollup(hour=hour, stale=True) for hour in sorted(hours)],
+            update_conflicts=True, unique_fields=['hour'], update_fields=['stale'],
+        )
+
+    def refresh(self) -> int:
+        """
+        Пересчитывает часовые итоги по оплаченным заказам (включая архив): добавляет закрытые часы с момента первой оплаты
+        до текущего часа (включая часы без оплат) и пересчитывает устаревшие.
+        :return: Количество пересчитанных часов.
+        """
+        current_hour = hour_start(timezone.now())
+        sources = paid_order_sources(self.db)
+        with transaction.atomic(using=self.db):
+            first_paid_at = min(
+                filter(None, (orders.aggregate(first=Min('paid_at'))['first'] for orders in sources)), default=None
+            )
+            if first_paid_at is None:
+                return 0
+            last_hour = self.filter(stale=False).aggregate(last=Max('hour'))['last']
+            hour = hour_start(first_paid_at) if last_hour is None else last_hour + timedelta(hours=1)
+            new_hours = []
+            while hour < current_hour:
+                new_hours.append(hour)
+                hour += timedelta(hours=1)
+            if new_hours:
+                self._mark_stale(new_hours)
+            hours = list(self.select_for_update().filter(stale=True, hour__lt=current_hour).values_list('hour', flat=True))
+            if not hours:
+                return 0
+            totals = {hour: [0, Decimal('0.00')] for hour in hours}
+            for orders in sources:
+                for row in (
+                    orders.filter(hour_ranges_q(merge_hours(hours)))
+                    .annotate(hour=TruncHour('paid_at', tzinfo=dt_timezone.utc))
+                    .values('hour').annotate(order_count=Count('*'), total_revenue=Sum('total_price'))
+                ):
+                    totals[row['hour']][0] += row['order_count']
+                    totals[row['hour']][1] += row['total_revenue']
+            self.bulk_update([
+                RevenueRollup(hour=hour, order_count=totals[hour][0], total_revenue=totals[hour][1], stale=False)
+                for hour in hours
+            ], ['order_count', 'total_revenue', 'stale'], batch_size=1000)
+        return len(hours)
+
+
+def paid_order_sources(using: Optional[str] = None) -> list[models.QuerySet]:
+    """
+    Возвращает выборки всех оплаченных заказов: из основной таблицы и из архива.
+    :param using: Алиас базы данных (None - по роутеру).
+    """
+    return [
+        Order.objects.db_manager(using).filter(status='paid'),
+        ArchivedOrder.objects.db_manager(using).filter(status='paid'),
+    ]
+
+
+def merge_hours(hours: Iterable[datetime]) -> list[tuple[datetime, datetime]]:
+    """
+    Объединяет часы в непрерывные интервалы.
+    :param hours: Начала часов.
+    :return: Список интервалов (начало, конец) без пересечений.
+    """
+    ranges = []
+    for hour in sorted(set(hours)):
+        if ranges and ranges[-1][1] == hour:
+            ranges[-1] = (ranges[-1][0], hour + timedelta(hours=1))
+        else:
+            ranges.append((hour, hour + timedelta(hours=1)))
+    return ranges
+
+
+def hour_ranges_q(ranges: list[tuple[datetime, datetime]]) -> Q:
+    """ Условие на время оплаты: попадание в один из интервалов. """
+    condition = Q(pk__in=[])
+    for start, end in ranges:
+        condition |= Q(paid_at__gte=start, paid_at__lt=end)
+    return condition
+
+
+class RevenueRollup(models.Model):
+    """
+    Итог выручки по оплаченным заказам за закрытый час (по времени оплаты, UTC).
+    Отчеты за прошлые периоды читают эти строки вместо заказов. Если оплаченный заказ
+    за прошедший час изменен, строка помечается устаревшей до следующего пересчета.
+    Включает в себя:
+        hour (datetime): Начало часа.
+        order_count (int): Количество оплаченных заказов.
+        total_revenue (Decimal): Сумма оплаченных заказов.
+        stale (bool): Итог устарел и должен быть пересчитан.
+    """
+    hour = models.DateTimeField(primary_key=True)
+    order_count = models.BigIntegerField(default=0)
+    total_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    stale = models.BooleanField(default=False)
+
+    objects = RevenueRollupManager()
+
+    def __str__(self):
+        return f"Выручка за {self.hour:%Y-%m-%d %H:00} - Заказов {self.order_count} - Сумма {self.total_revenue}"
+
+
+ARCHIVED_FIELDS = [
+    'id', 'table_number', 'items', 'total_price', 'status', 'created_at', 'paid_at', 'updated_at', 'version',
+]
+
+
+class ArchivedOrderManager(models.Manager):
+    def archive(self, before: datetime, batch_size: int = 5000) -> int:
+        """
+        Переносит одну пачку оплаченных заказов с временем оплаты раньше `before` в архив.
+        Строки переносятся в базе (INSERT ... SELECT и DELETE) без загрузки в Python,
+        заказы, заблокированные другими транзакциями, пропускаются до следующего запуска.
+        Накопительный итог выручки не меняется: перенесенные заказы остаются в нем как архивные.
+        Часовые итоги тоже не меняются: перед переносом они должны быть пересчитаны (`RevenueRollup.objects.refresh`).
+        :param before: Граница времени оплаты.
+        :param batch_size: Максимальное количество заказов в пачке.
+        :return: Количество перенесенных заказов.
+        """
+        connection = connections[self.db]
+        quote_name = connection.ops.quote_name
+        with transaction.atomic(using=self.db):
+            pks = list(
+                Order.objects.using(self.db).filter(status='paid', paid_at__lt=before).order_by('pk')
+                .select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked)
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                return 0
+            columns = ', '.join(map(quote_name, ARCHIVED_FIELDS))
+            placeholders = ', '.join(['%s'] * len(pks))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {quote_name(ArchivedOrder._meta.db_table)} ({columns}, {quote_name("archived_at")}) '
+                    f'SELECT {columns}, %s FROM {quote_name(Order._meta.db_table)} WHERE id IN ({placeholders})',
+                    [timezone.now(), *pks],
+                )
+                cursor.execute(
+                    f'DELETE FROM {quote_name(OrderItem._meta.db_table)} WHERE order_id IN ({placeholders})', pks
+                )
+                cursor.execute(f'DELETE FROM {quote_name(Order._meta.db_table)} WHERE id IN ({placeholders})', pks)
+            invalidate_orders(self.db)
+        return len(pks)
+
+
+class ArchivedOrder(models.Model):
+    """
+    Архивный заказ: оплаченный заказ закрытой смены, перенесенный из основной таблицы,
+    чтобы она оставалась небольшой. Доступен только для чтения через API архива.
+    Включает в себя те же поля, что и `Order` (с тем же ID), а также:
+        archived_at (datetime): Время переноса в архив.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    table_number = models.IntegerField()
+    items = models.JSONField(default=list)
+    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=10, choices=Order.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    paid_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField()
+    version = models.PositiveIntegerField(default=1)
+    archived_at = models.DateTimeField()
+
+    objects = ArchivedOrderManager()
+
+    class Meta:
+        indexes = [
+            # История за период и выручка по архиву
+            models.Index(fields=['paid_at', 'total_price'], name='orders_archive_paid_at_idx'),
+            # История по номеру стола с keyset-пагинацией по id
+            models.Index(fields=['table_number', 'id'], name='orders_archive_table_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"Архивный заказ {self.id} - Столик {self.table_number} - Сумма {self.total_price}"
+
+
+class IdempotencyKeyManager(models.Manager):
+    def purge_expired(self, batch_size: int = 1000) -> int:
+        """
+        Удаляет ключи идемпотентности с истекшим сроком пачками по индексу `expires_at`.
+        :param batch_size: Количество ключей, удаляемых одним запросом.
+        :return: Количество удаленных ключей.
+        """
+        deleted = 0
+        now = timezone.now()
+        while True:
+            pks = list(self.filter(expires_at__lte=now).values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return deleted
+            deleted += self.filter(pk__in=pks).delete()[0]
+
+
+class IdempotencyKey(models.Model):
+    """
+    Ключ идемпотентности запроса на создание заказа и сохраненный ответ на него.
+    Повторный запрос с тем же ключом получает сохраненный ответ без проверки данных и без создания заказа.
+    Включает в себя:
+        scope (str): Операция, к которой относится ключ (например, `api-create`).
+        key (str): Ключ, переданный клиентом.
+        request_hash (str): SHA-256 данных первого запроса: с тем же ключом нельзя отправить другие данные.
+        status_code (int): Код сохраненного ответа.
+        response (dict): Данные сохраненного ответа.
+        created_at (datetime): Время первого запроса.
+        expires_at (datetime): Время, после которого ключ удаляется (`purge_idempotency_keys`).
+    """
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    objects = IdempotencyKeyManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='orders_idempotency_scope_key_uniq'),
+        ]
+        indexes = [
+            # Удаление ключей с истекшим сроком
+            models.Index(fields=['expires_at'], name='orders_idempotency_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"Ключ {self.scope}:{self.key} - Ответ {self.status_code}"
+
+
+class TableTabManager(models.Manager):
+    def refresh(self, table_numbers: Iterable[int]) -> None:
+        """
+        Пересчитывает счета указанных столов по их неоплаченным заказам (по индексу статуса и стола).
+        Строки столов блокируются в порядке номеров, поэтому параллельные изменения заказов одного стола
+        пересчитывают его по очереди, и каждый пересчет видит изменения предыдущих.
+        Должен вызываться в транзакции, которая изменяет сами заказы, после их изменения.
+        :param table_numbers: Номера столов, заказы которых изменились.
+        """
+        tables = sorted(set(table_numbers))
+        if not tables:
+            return
+        with transaction.atomic(using=self.db):
+            self.bulk_create(
+                [TableTab(table_number=table_number) for table_number in tables],
+                update_conflicts=True, unique_fields=['table_number'], update_fields=['updated_at'],
+            )
+            tabs = self.compute(Order.objects.using(self.db).filter(table_number__in=tables))
+            closed = set(tables) - {tab.table_number for tab in tabs}
+            if closed:
+                self.filter(table_number__in=closed).delete()
+            if tabs:
+                self.bulk_update(tabs, TableTab.TAB_FIELDS)
+
+    def rebuild(self) -> int:
+        """
+        Пересчитывает счета всех столов заново полным агрегатом по неоплаченным заказам.
+        На время пересчета изменения счетов другими транзакциями блокируются.
+        :return: Количество столов с открытым счетом.
+        """
+        connection = connections[self.db]
+        with transaction.atomic(using=self.db):
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'LOCK TABLE {connection.ops.quote_name(TableTab._meta.db_table)} IN SHARE ROW EXCLUSIVE MODE'
+                    )
+            tabs = self.compute(Order.objects.using(self.db).all())
+            self.all().delete()
+            self.bulk_create(tabs)
+        return len(tabs)
+
+    def compute(self, orders: models.QuerySet) -> list['TableTab']:
+        """
+        Считает счета столов по неоплаченным заказам выборки одним GROUP BY.
+        :param orders: Выборка заказов.
+        :return: Несохраненные строки `TableTab` (только столы с неоплаченными заказами).
+        """
+        now = timezone.now()
+        rows = (
+            orders.filter(status__in=Order.OPEN_STATUSES).order_by().values('table_number')
+            .annotate(
+                open_count=Count('*'),
+                waiting_count=Count('pk', filter=Q(status='waiting')),
+                ready_count=Count('pk', filter=Q(status='ready')),
+                outstanding=Sum('total_price'),
+                oldest_waiting_at=Min('created_at', filter=Q(status='waiting')),
+            )
+        )
+        return [TableTab(**row, updated_at=now) for row in rows]
+
+
+class TableTab(models.Model):
+    """
+    Открытый счет стола: сводка по его неоплаченным заказам для экрана хостес.
+    Строка есть только у столов с неоплаченными заказами и пересчитывается в той же транзакции,
+    что и изменение заказов стола; полностью пересчитывается командой `rebuild_table_tabs`.
+    Включает в себя:
+        table_number (int): Номер стола.
+        open_count (int): Количество неоплаченных заказов.
+        waiting_count (int): Количество заказов в ожидании.
+        ready_count (int): Количество готовых заказов.
+        outstanding (Decimal): Сумма неоплаченных заказов.
+        oldest_waiting_at (datetime): Время создания самого старого заказа в ожидании.
+        updated_at (datetime): Время последнего пересчета.
+    """
+    # Поля заказа, от которых зависит счет стола
+    ORDER_FIELDS = frozenset({'table_number', 'status', 'total_price', 'created_at'})
+    TAB_FIELDS = ['open_count', 'waiting_count', 'ready_count', 'outstanding', 'oldest_waiting_at', 'updated_at']
+
+    table_number = models.IntegerField(primary_key=True)
+    open_count = models.PositiveIntegerField(default=0)
+    waiting_count = models.PositiveIntegerField(default=0)
+    ready_count = models.PositiveIntegerField(default=0)
+    outstanding = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    oldest_waiting_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    objects = TableTabManager()
+
+    def __str__(self):
+        return f"Стол {self.table_number} - Заказов {self.open_count} - К оплате {self.outstanding}"
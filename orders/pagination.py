@@ -0,0 +1,105 @@
+import json
+from base64 import b64decode, b64encode
+from typing import Any, Optional
+from urllib import parse
+from django.conf import settings
+from django.db import connections
+from django.db.models import QuerySet
+from django.http import Http404, HttpRequest
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+
+def estimate_count(queryset: QuerySet) -> int:
+    """
+    Оценивает количество строк в выборке без выполнения COUNT(*).
+
+    Для PostgreSQL берется оценка планировщика из EXPLAIN (FORMAT JSON),
+    для остальных бэкендов выполняется обычный COUNT.
+
+    :param queryset: Выборка заказов (с уже примененными фильтрами).
+    :return: Оценочное количество строк.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.count()
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class OrderCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация заказов по `id` (от новых к старым).
+
+    Курсор непрозрачный (base64), следующая страница выбирается условием `id < last_id`,
+    поэтому OFFSET-сканов и COUNT(*) по всей таблице нет.
+    Количество записей отдается только по запросу `?with_count=1` и является оценкой.
+    """
+    page_size = settings.ORDERS_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.ORDERS_MAX_PAGE_SIZE
+    ordering = '-id'
+    count_query_param = 'with_count'
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view: Any = None) -> Optional[list]:
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.count = estimate_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data: list) -> Response:
+        payload = {'next': self.get_next_link(), 'previous': self.get_previous_link(), 'results': data}
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return Response(payload)
+
+
+def paginate_orders(request: HttpRequest, queryset: QuerySet) -> dict[str, Any]:
+    """
+    Возвращает одну страницу заказов для HTML-страниц с той же keyset-пагинацией, что и в API.
+    :param request: HTTP-запрос (параметры `cursor` и `page_size` берутся из GET).
+    :param queryset: Отфильтрованная выборка заказов.
+    :return: Словарь с заказами страницы и ссылками на соседние страницы.
+    :raises Http404: Если курсор некорректный.
+    """
+    paginator = OrderCursorPagination()
+    try:
+        orders = paginator.paginate_queryset(queryset, Request(request))
+    except NotFound as e:
+        # Исключения DRF в обычных представлениях Django не обрабатываются
+        raise Http404(e.detail)
+    return {
+        'orders': orders,
+        'next_page': paginator.get_next_link(),
+        'previous_page': paginator.get_previous_link(),
+        'orders_count': paginator.count,
+    }
+
+
+def encode_keyset_cursor(position: int) -> str:
+    """
+    Кодирует позицию (`id` последнего заказа страницы) в курсор того же формата, что и у `OrderCursorPagination`.
+    :param position: `id` последнего заказа страницы.
+    :return: Непрозрачный курсор.
+    """
+    return b64encode(parse.urlencode({'p': position}).encode('ascii')).decode('ascii')
+
+
+def decode_keyset_cursor(cursor: Optional[str]) -> Optional[int]:
+    """
+    Разбирает курсор `OrderCursorPagination` для перехода на следующую страницу.
+    :param cursor: Курсор из параметра `cursor` или None.
+    :return: `id`, после которого начинается страница, или None для первой страницы.
+    :raises ValueError: Если курсор некорректный или ведет на предыдущую страницу.
+    """
+    if not cursor:
+        return None
+    try:
+        tokens = parse.parse_qs(b64decode(cursor.encode('ascii')).decode('ascii'), keep_blank_values=True)
+        position = int(tokens['p'][0])
+    except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+        raise ValueError('Некорректный курсор.')
+    if tokens.get('r', ['0'])[0] == '1' or tokens.get('o', ['0'])[0] != '0':
+        raise ValueError('Поддерживается только переход на следующую страницу.')
+    return position
@@ -0,0 +1,131 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Iterator, Optional
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpRequest, HttpResponse
+
+# Чтение с реплик: запросы на чтение уходят на реплики (ORDERS_READ_REPLICAS) только внутри
+# `replica_reads()` - в списках, поиске, выручке и выгрузке. Остальные запросы и все записи
+# выполняются на основной базе. После изменяющего запроса клиент на ORDERS_REPLICA_STICKY_SECONDS
+# секунд закрепляется за основной базой (cookie), чтобы сразу видеть свои изменения.
+# Закрепленный клиент не читает кэш заказов (значение в нем могло быть вычислено на отстающей реплике),
+# а вычисляет значение на основной базе и обновляет им кэш (см. `orders.cache.cached`).
+
+STICKY_COOKIE_NAME = 'orders_primary'
+
+_replica_reads: ContextVar[bool] = ContextVar('orders_replica_reads', default=False)
+_primary_pinned: ContextVar[bool] = ContextVar('orders_primary_pinned', default=False)
+
+
+@contextmanager
+def replica_reads() -> Iterator[None]:
+    """ Направляет запросы на чтение внутри блока на реплики (если они настроены и клиент не закреплен). """
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def primary_pinned(pinned: bool = True) -> Iterator[None]:
+    """ Закрепляет все запросы внутри блока за основной базой. """
+    token = _primary_pinned.set(pinned)
+    try:
+        yield
+    finally:
+        _primary_pinned.reset(token)
+
+
+def is_primary_pinned() -> bool:
+    """ Закреплены ли запросы текущего контекста за основной базой. """
+    return _primary_pinned.get()
+
+
+def read_from_replica(view: Callable) -> Callable:
+    """ Декоратор представления (синхронного или асинхронного), которое читает данные с реплик. """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(*args, **kwargs):
+            with replica_reads():
+                return await view(*args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Роутер баз данных: чтение внутри `replica_reads()` идет на случайную реплику,
+    все остальное - на основную базу. Внутри транзакции основной базы чтение остается на ней.
+    """
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        if not _replica_reads.get() or _primary_pinned.get() or not settings.ORDERS_READ_REPLICAS:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.ORDERS_READ_REPLICAS)
+
+    def db_for_write(self, model, **hints) -> str:
+        # Объекты, прочитанные с реплики, сохраняются в основную базу
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> Optional[bool]:
+        databases = {DEFAULT_DB_ALIAS, *settings.ORDERS_READ_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db: str, app_label: str, model_name: Optional[str] = None, **hints) -> Optional[bool]:
+        if db in settings.ORDERS_READ_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Read-your-writes для реплик: изменяющие запросы (POST, PUT, PATCH, DELETE) и запросы клиента
+    в течение ORDERS_REPLICA_STICKY_SECONDS после них читают только с основной базы.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with primary_pinned(self.is_pinned(request)):
+            response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        with primary_pinned(self.is_pinned(request)):
+            response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    @staticmethod
+    def is_writing(request: HttpRequest) -> bool:
+        return request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+    def is_pinned(self, request: HttpRequest) -> bool:
+        return self.is_writing(request) or STICKY_COOKIE_NAME in request.COOKIES
+
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        if self.is_writing(request) and settings.ORDERS_READ_REPLICAS:
+            response.set_cookie(
+                STICKY_COOKIE_NAME, '1', max_age=settings.ORDERS_REPLICA_STICKY_SECONDS, httponly=True, samesite='Lax'
+            )
+        return response
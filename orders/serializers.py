@@ -1,6 +1,12 @@
-from typing import Any
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any, Optional
+from django.db.models import QuerySet
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Order
+from rest_framework.settings import api_settings
+from .models import Order, ArchivedOrder, TableTab
+from .validation import check_items
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -12,27 +18,26 @@ class OrderSerializer(serializers.ModelSerializer):
     - `table_number` (int): Номер столика, за которым сделан заказ.
     - `items` (list[dict]): Список блюд в заказе.
     - `status` (str): Статус заказа (`pending`, `paid`, `canceled` и т. д.).
+    - `version` (int): Версия заказа для оптимистичной блокировки (только чтение).
     """
 
     class Meta:
         model = Order
-        fields = ['id', 'table_number', 'items', 'status', 'total_price']  # `total_price` исключен
+        fields = ['id', 'table_number', 'items', 'status', 'total_price', 'version']  # `total_price` исключен
+        read_only_fields = ['version']
 
     def validate_items(self, value: list[dict[str, Any]]) -> list[dict[str, Any]]:
         """
-        Проверяет, что цена каждого блюда в заказе не отрицательная.
+        Проверяет блюда заказа общими правилами `check_items`: список не пустой,
+        у каждого блюда непустое название и цена больше нуля.
 
         :param value: Список блюд, содержащих информацию о цене.
-        :raises serializers.ValidationError: Если хотя бы одно блюдо имеет отрицательную цену.
+        :raises serializers.ValidationError: С ошибками по номерам невалидных блюд.
         :return: Исходный список, если валидация пройдена.
         """
-        if not value:
-            raise serializers.ValidationError("Поле 'items' не может быть пустым.")
-        for item in value:
-            if item.get('price') <= 0:
-                raise serializers.ValidationError('Цена блюда не может быть меньше или равна нулю.')
-            if not item.get('name'):
-                raise serializers.ValidationError('Название блюда не может быть пустым.')
+        errors = check_items(value)
+        if errors:
+            raise serializers.ValidationError(errors)
         return value
 
     def create(self, validated_data: dict[str, Any]) -> Order:
@@ -40,6 +45,7 @@ class OrderSerializer(serializers.ModelSerializer):
         Создает новый заказ, автоматически вычисляя `total_price`.
 
         `total_price` рассчитывается как сумма цен всех блюд в заказе.
+        Блюда уже проверены в `validate_items`, поэтому `Order.clean` их повторно не проверяет.
 
         :param validated_data: Данные, прошедшие валидацию.
         :return: Экземпляр модели `Order`.
@@ -48,7 +54,10 @@ class OrderSerializer(serializers.ModelSerializer):
         if not items:
             raise serializers.ValidationError('Поле "items" не может быть пустым.')
         validated_data['total_price'] = sum(item.get('price', 0) for item in items)
-        return super().create(validated_data)
+        order = Order(**validated_data)
+        order.validated_items = items
+        order.save(force_insert=True)
+        return order
 
     def update(self, instance: Order, validated_data: dict[str, Any]) -> Order:
         """
@@ -63,4 +72,179 @@ class OrderSerializer(serializers.ModelSerializer):
         if 'items' in validated_data:
             items = validated_data['items']
             instance.total_price = sum(item.get('price', 0) for item in items)
+            instance.validated_items = items
         return super().update(instance, validated_data)
+
+
+# Поля заказа, которых достаточно большинству клиентов (без списка блюд)
+ORDER_SUMMARY_FIELDS = ['id', 'table_number', 'status', 'total_price']
+ORDER_PROJECTIONS = {'full': OrderSerializer.Meta.fields, 'summary': ORDER_SUMMARY_FIELDS}
+
+
+def parse_field_list(value: str) -> list[str]:
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def select_order_fields(fields: Optional[str] = None, exclude: Optional[str] = None,
+                        projection: Optional[str] = None) -> list[str]:
+    """
+    Определяет поля заказа для ответа по параметрам `fields`, `exclude` или `projection`
+    (передается не больше одного). `id` возвращается всегда.
+    :param fields: Поля через запятую.
+    :param exclude: Исключаемые поля через запятую.
+    :param projection: Набор полей из ORDER_PROJECTIONS (`full`, `summary`).
+    :raises serializers.ValidationError: Если поле неизвестно, исключается `id` или передано несколько параметров.
+    :return: Поля в порядке `OrderSerializer.Meta.fields`.
+    """
+    all_fields = OrderSerializer.Meta.fields
+    params = {name: value for name, value in (('fields', fields), ('exclude', exclude), ('projection', projection))
+              if value is not None}
+    if len(params) > 1:
+        raise serializers.ValidationError({name: 'Передайте только один из параметров fields, exclude, projection.'
+                                           for name in params})
+    if projection is not None:
+        if projection not in ORDER_PROJECTIONS:
+            raise serializers.ValidationError({'projection': f'Допустимые значения: {", ".join(ORDER_PROJECTIONS)}.'})
+        return list(ORDER_PROJECTIONS[projection])
+    for name, value in params.items():
+        unknown = [field for field in parse_field_list(value) if field not in all_fields]
+        if unknown:
+            raise serializers.ValidationError({name: f'Неизвестные поля: {", ".join(unknown)}.'})
+    if fields is not None:
+        selected = {'id', *parse_field_list(fields)}
+        return [field for field in all_fields if field in selected]
+    if exclude is not None:
+        excluded = set(parse_field_list(exclude))
+        if 'id' in excluded:
+            raise serializers.ValidationError({'exclude': 'Поле id исключить нельзя.'})
+        return [field for field in all_fields if field not in excluded]
+    return list(all_fields)
+
+
+def order_values(queryset: QuerySet, fields: Optional[list[str]] = None) -> QuerySet:
+    """
+    Выборка заказов для быстрой сериализации только для чтения: словари с полями `OrderSerializer`
+    в том же порядке, без создания моделей. Читаются только колонки выбранных полей:
+    без `items` список блюд из базы не читается.
+    :param queryset: Выборка заказов.
+    :param fields: Поля из `select_order_fields` (по умолчанию все поля `OrderSerializer`).
+    :return: Выборка словарей (`values()`), ее можно передавать в `OrderCursorPagination`.
+    """
+    return queryset.values(*(fields or OrderSerializer.Meta.fields))
+
+
+def serialize_order_rows(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Быстрая сериализация строк `order_values` в данные, совпадающие с `OrderSerializer(many=True).data`
+    (после рендеринга - побайтно). Поля сериализатора не вызываются для каждой строки: из базы
+    `id`, `table_number`, `status`, `version` и `items` приходят уже в нужном виде,
+    а `total_price` (всегда с 2 знаками после запятой) форматируется как в `DecimalField`.
+    :param rows: Строки `order_values`, изменяются на месте.
+    :return: Те же строки.
+    """
+    if not rows or 'total_price' not in rows[0]:
+        return rows
+    to_representation = OrderSerializer().fields['total_price'].to_representation
+    quantum = Decimal('0.01')
+    for row in rows:
+        price = row['total_price']
+        if api_settings.COERCE_DECIMAL_TO_STRING and price.as_tuple().exponent == quantum.as_tuple().exponent:
+            row['total_price'] = f'{price:f}'
+        else:
+            row['total_price'] = to_representation(price)
+    return rows
+
+
+class DishStatsSerializer(serializers.Serializer):
+    """
+    Сериализатор для аналитики по блюдам.
+
+    Поля:
+    - `name` (str): Название блюда.
+    - `quantity` (int): Количество проданных порций.
+    - `revenue` (Decimal): Сумма по блюду.
+    """
+    name = serializers.CharField()
+    quantity = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class RevenueReportQuerySerializer(serializers.Serializer):
+    """
+    Параметры отчета по выручке.
+
+    Поля:
+    - `start` (datetime): Начало периода (по умолчанию - начало текущего дня).
+    - `end` (datetime): Конец периода (по умолчанию - текущий момент).
+    - `bucket` (str): Размер интервала: `hour`, `day` или `week`.
+    """
+    MAX_HOUR_BUCKETS = 31 * 24
+
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    bucket = serializers.ChoiceField(choices=['hour', 'day', 'week'], default='day')
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        """
+        Подставляет период по умолчанию и проверяет, что начало раньше конца,
+        а почасовой отчет не длиннее 31 дня.
+        """
+        now = timezone.now()
+        attrs.setdefault('end', now)
+        attrs.setdefault('start', timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0))
+        if attrs['start'] >= attrs['end']:
+            raise serializers.ValidationError('Начало периода должно быть раньше конца.')
+        if attrs['bucket'] == 'hour' and attrs['end'] - attrs['start'] > timedelta(hours=self.MAX_HOUR_BUCKETS):
+            raise serializers.ValidationError('Почасовой отчет доступен за период не больше 31 дня.')
+        return attrs
+
+
+class RevenueBucketSerializer(serializers.Serializer):
+    """
+    Сериализатор для интервала отчета по выручке.
+
+    Поля:
+    - `period` (datetime): Начало интервала.
+    - `order_count` (int): Количество оплаченных заказов.
+    - `total_revenue` (Decimal): Выручка.
+    """
+    period = serializers.DateTimeField()
+    order_count = serializers.IntegerField()
+    total_revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class ArchivedOrderSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для архивного заказа (только чтение).
+
+    Поля:
+    - `id` (int): Идентификатор заказа (тот же, что был в основной таблице).
+    - `table_number` (int): Номер столика.
+    - `items` (list[dict]): Список блюд в заказе.
+    - `status` (str): Статус заказа.
+    - `total_price` (Decimal): Сумма заказа.
+    - `created_at`, `paid_at` (datetime): Время создания и оплаты.
+    - `archived_at` (datetime): Время переноса в архив.
+    """
+
+    class Meta:
+        model = ArchivedOrder
+        fields = ['id', 'table_number', 'items', 'status', 'total_price', 'created_at', 'paid_at', 'archived_at']
+        read_only_fields = fields
+
+
+class TableTabSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для открытого счета стола.
+
+    Поля:
+    - `table_number` (int): Номер стола.
+    - `open_count` (int): Количество неоплаченных заказов.
+    - `waiting_count`, `ready_count` (int): Количество заказов в ожидании и готовых.
+    - `outstanding` (Decimal): Сумма к оплате.
+    - `oldest_waiting_at` (datetime): Время создания самого старого заказа в ожидании.
+    """
+
+    class Meta:
+        model = TableTab
+        fields = ['table_number', 'open_count', 'waiting_count', 'ready_count', 'outstanding', 'oldest_waiting_at']
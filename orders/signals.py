@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cache import invalidate_orders
+from .models import Order
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def invalidate_orders_cache(sender, instance: Order, using: str, **kwargs) -> None:
+    """ Сбрасывает кэш заказов после сохранения или удаления заказа. """
+    invalidate_orders(using)
@@ -0,0 +1,77 @@
+from typing import Any, Iterator
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import HttpRequest, StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+from .cache import get_versioned_many, set_versioned_many
+from .models import Order
+from .pagination import paginate_orders
+
+# Потоковая отрисовка HTML-страниц списка и поиска заказов. Представление читает только пары (id, версия)
+# заказов страницы и ссылки на соседние страницы, отдает начало страницы сразу, а строки - пачками
+# по ORDERS_HTML_CHUNK_SIZE. Отрисованная строка кэшируется по id и версии заказа: из базы
+# (только показываемые колонки) читаются и заново отрисовываются только строки измененных заказов.
+
+ROWS_PLACEHOLDER = '<!-- orders:rows -->'
+# Колонки, которые показывают шаблоны строк (`__str__` заказа, статус, ссылки)
+ROW_FIELDS = ['id', 'version', 'table_number', 'status', 'total_price']
+
+
+def paginate_order_versions(request: HttpRequest, queryset: QuerySet) -> dict[str, Any]:
+    """
+    Возвращает страницу заказов как пары (id, версия) с той же keyset-пагинацией, что и `paginate_orders`.
+    :param request: HTTP-запрос с параметрами `cursor` и `page_size`.
+    :param queryset: Отфильтрованная выборка заказов.
+    :return: Словарь с парами (id, версия) страницы и ссылками на соседние страницы.
+    """
+    page = paginate_orders(request, queryset.values('id', 'version'))
+    page['orders'] = [(row['id'], row['version']) for row in page['orders']]
+    return page
+
+
+def iter_order_rows(versions: list[tuple[int, int]], row_template_name: str, using: str) -> Iterator[str]:
+    """
+    Отрисовывает строки заказов пачками: строки из кэша берутся как есть, для остальных
+    одним запросом на пачку читаются только колонки ROW_FIELDS.
+    :param versions: Пары (id, версия) заказов страницы в порядке вывода.
+    :param row_template_name: Шаблон одной строки (контекст - `order`).
+    :param using: Алиас базы данных, из которой читается страница.
+    :return: Итератор HTML пачек строк.
+    """
+    template = get_template(row_template_name)
+    chunk_size = settings.ORDERS_HTML_CHUNK_SIZE
+    for start in range(0, len(versions), chunk_size):
+        chunk = versions[start:start + chunk_size]
+        fragments = get_versioned_many(row_template_name, chunk)
+        missing = [pk for pk, _ in chunk if pk not in fragments]
+        if missing:
+            rendered = {}
+            for values in Order.objects.using(using).filter(pk__in=missing).values(*ROW_FIELDS):
+                order = Order(**values)
+                fragments[order.pk] = rendered[order.pk, order.version] = template.render({'order': order})
+            set_versioned_many(row_template_name, rendered, using)
+        # Заказы, удаленные после чтения страницы, пропускаются
+        yield ''.join(fragments.get(pk, '') for pk, _ in chunk)
+
+
+def stream_order_page(request: HttpRequest, template_name: str, row_template_name: str,
+                      context: dict[str, Any], using: str) -> StreamingHttpResponse:
+    """
+    Отдает страницу потоком: начало страницы (до `{{ rows }}`), строки заказов пачками, конец страницы.
+    :param request: HTTP-запрос.
+    :param template_name: Шаблон страницы, строки выводятся на месте переменной `rows`.
+    :param row_template_name: Шаблон одной строки.
+    :param context: Контекст страницы, `orders` - пары (id, версия) из `paginate_order_versions`.
+    :param using: Алиас базы данных, из которой читается страница.
+    :return: Потоковый HTML-ответ.
+    """
+    page = render_to_string(template_name, {**context, 'rows': mark_safe(ROWS_PLACEHOLDER)}, request)
+    head, _, tail = page.partition(ROWS_PLACEHOLDER)
+
+    def content() -> Iterator[str]:
+        yield head
+        yield from iter_order_rows(context['orders'], row_template_name, using)
+        yield tail
+
+    return StreamingHttpResponse(content(), content_type='text/html; charset=utf-8')
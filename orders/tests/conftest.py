@@ -0,0 +1,10 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Кэш заказов живет в памяти процесса: каждый тест начинает с пустого кэша
+    cache.clear()
+    yield
+    cache.clear()
@@ -0,0 +1,7 @@
+from ..models import Order
+
+
+def create_order(**kwargs) -> Order:
+    """ Создает заказ с одним блюдом; номер стола и статус можно переопределить. """
+    return Order.objects.create(table_number=kwargs.get('table_number', 1), items=[{'name': 'Pizza', 'price': 300}],
+                                status=kwargs.get('status', 'waiting'))
@@ -128,7 +128,7 @@ def test_list_orders(client):
     url = reverse('order-list')
     response = client.get(url)
     assert response.status_code == status.HTTP_200_OK  # Ожидаем успешный запрос
-    assert len(response.data) == 2  # Ожидаем 2 заказа
+    assert len(response.data['results']) == 2  # Ожидаем 2 заказа
 
 
 # тест на получение несуществующего заказа
@@ -0,0 +1,92 @@
+import io
+from datetime import timedelta
+from decimal import Decimal
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from ..models import ArchivedOrder, Order, OrderItem, RevenueRollup, RevenueTotal
+from ..utils import calculate_total_revenue, get_revenue_report
+
+
+@pytest.fixture
+def old_orders():
+    """ Оплаченные заказы 40 дней назад, свежий оплаченный и старый неоплаченный заказ. """
+    paid_at = timezone.now() - timedelta(days=40)
+    return Order.objects.bulk_create([
+        Order(table_number=1, items=[{'name': 'Soup', 'price': 100}], status='paid', paid_at=paid_at),
+        Order(table_number=2, items=[{'name': 'Pizza', 'price': 200}], status='paid',
+              paid_at=paid_at + timedelta(hours=1)),
+        Order(table_number=1, items=[{'name': 'Tea', 'price': 50}], status='paid'),
+        Order(table_number=3, items=[{'name': 'Cake', 'price': 70}], status='waiting',
+              created_at=paid_at),
+    ])
+
+
+# тесты для архива заказов
+
+# тест на перенос старых оплаченных заказов в архив
+@pytest.mark.django_db
+def test_archive_moves_old_paid_orders(old_orders):
+    call_command('archive_orders', days=30, batch_size=1)
+
+    archived_ids = {order.pk for order in old_orders[:2]}
+    assert set(ArchivedOrder.objects.values_list('pk', flat=True)) == archived_ids
+    assert set(Order.objects.values_list('pk', flat=True)) == {old_orders[2].pk, old_orders[3].pk}
+    assert not OrderItem.objects.filter(order_id__in=archived_ids).exists()
+
+    archived = ArchivedOrder.objects.get(pk=old_orders[0].pk)
+    assert archived.items == [{'name': 'Soup', 'price': 100}]
+    assert archived.total_price == Decimal('100.00')
+    assert archived.paid_at == old_orders[0].paid_at
+    assert archived.archived_at is not None
+
+
+# тест на итог выручки после переноса: общая выручка и отчет за период учитывают архив
+@pytest.mark.django_db
+def test_archive_keeps_revenue_consistent(old_orders):
+    start = timezone.now() - timedelta(days=41)
+    before = get_revenue_report(start, timezone.now(), 'week')
+
+    call_command('archive_orders', days=30)
+
+    assert calculate_total_revenue() == Decimal('350.00')
+    assert tuple(RevenueTotal.objects.current()) == (3, Decimal('350.00'))
+    assert RevenueTotal.objects.expected() == (3, Decimal('350.00'))
+    call_command('rebuild_revenue', check=True, stdout=io.StringIO())
+    assert get_revenue_report(start, timezone.now(), 'week') == before
+    assert calculate_total_revenue(start) == Decimal('350.00')
+
+    # Пересчет устаревших часовых итогов учитывает архивные заказы
+    RevenueRollup.objects.update(stale=True)
+    RevenueRollup.objects.refresh()
+    assert get_revenue_report(start, timezone.now(), 'week') == before
+
+
+# тест на пробный запуск без переноса
+@pytest.mark.django_db
+def test_archive_dry_run(old_orders, capsys):
+    call_command('archive_orders', days=30, dry_run=True)
+    assert 'Заказов для переноса в архив: 2.' in capsys.readouterr().out
+    assert not ArchivedOrder.objects.exists()
+
+
+# тест на API архива с фильтрами
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_archive_api(client, old_orders):
+    call_command('archive_orders', days=30)
+
+    response = client.get(reverse('archived-order-list'), {'table_number': 1})
+    assert response.status_code == status.HTTP_200_OK
+    assert [order['id'] for order in response.json()['results']] == [old_orders[0].pk]
+
+    response = client.get(reverse('archived-order-list'), {'paid_at__gte': old_orders[1].paid_at.isoformat()})
+    assert [order['id'] for order in response.json()['results']] == [old_orders[1].pk]
+
+    response = client.get(reverse('archived-order-detail', args=[old_orders[1].pk]))
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['total_price'] == '200.00'
+
+    response = client.delete(reverse('archived-order-detail', args=[old_orders[1].pk]))
+    assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
@@ -0,0 +1,65 @@
+import json
+from urllib.parse import parse_qs, urlsplit
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from .factories import create_order
+
+
+# тесты для асинхронного API заказов
+
+# тест на совпадение списка заказов с синхронным API
+@pytest.mark.django_db
+def test_async_list_matches_sync_api(client):
+    for table_number in range(1, 4):
+        create_order(table_number=table_number)
+    sync_page = client.get(reverse('order-list'), {'page_size': 2}).json()
+    async_page = client.get(reverse('async_order_list'), {'page_size': 2}).json()
+    assert async_page['results'] == sync_page['results']
+
+    # курсор асинхронного API совместим с синхронным
+    cursor = parse_qs(urlsplit(async_page['next']).query)['cursor'][0]
+    sync_next = client.get(reverse('order-list'), {'page_size': 2, 'cursor': cursor}).json()
+    async_next = client.get(async_page['next']).json()
+    assert async_next['results'] == sync_next['results']
+    assert async_next['next'] is None
+
+
+# тест на создание и получение заказа
+@pytest.mark.django_db
+def test_async_create_and_retrieve(client):
+    response = client.post(
+        reverse('async_order_list'),
+        data={'table_number': 2, 'items': [{'name': 'Pizza', 'price': 300}], 'status': 'paid', 'total_price': 1},
+        content_type='application/json',
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    created = response.json()
+    assert created['total_price'] == '300.00'
+    assert client.get(reverse('async_order_detail', args=[created['id']])).json() == created
+    revenue = client.get(reverse('async_order_revenue'))
+    assert revenue.content == client.get(reverse('order-revenue'), HTTP_ACCEPT='application/json').content
+
+
+# тест на ошибки валидации и отсутствующий заказ
+@pytest.mark.django_db
+def test_async_errors(client):
+    response = client.post(
+        reverse('async_order_list'),
+        data=json.dumps({'table_number': 1, 'items': [{'name': 'Pizza', 'price': -1}], 'status': 'waiting',
+                         'total_price': 0}),
+        content_type='application/json',
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'items' in response.json()
+    assert client.get(reverse('async_order_detail', args=[999999])).status_code == status.HTTP_404_NOT_FOUND
+    assert client.get(reverse('async_order_search'), {'status': 'unknown'}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+# тест на поиск по фильтрам
+@pytest.mark.django_db
+def test_async_search(client):
+    create_order(table_number=3, status='ready')
+    create_order(table_number=3, status='waiting')
+    results = client.get(reverse('async_order_search'), {'table_number': 3, 'status': 'ready'}).json()['results']
+    assert [(order['table_number'], order['status']) for order in results] == [(3, 'ready')]
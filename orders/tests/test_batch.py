@@ -0,0 +1,78 @@
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from ..models import Order
+from ..utils import calculate_total_revenue
+
+
+def order_data(table_number=1, price=300, order_status='waiting'):
+    return {
+        'table_number': table_number,
+        'items': [{'name': 'Pizza', 'price': price}, {'name': 'Tea', 'price': 50}],
+        'status': order_status,
+        'total_price': 0,
+    }
+
+
+# тесты для пакетного создания заказов
+
+# тест на создание пакета заказов одним INSERT
+@pytest.mark.django_db
+def test_batch_create_orders(client):
+    url = reverse('order-batch')
+    payload = [order_data(table_number=i + 1) for i in range(20)] + [order_data(order_status='paid')]
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(url, data=payload, content_type='application/json')
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data['created'] == 21
+    assert Order.objects.count() == 21
+    assert len([query for query in queries if query['sql'].startswith('INSERT INTO "orders_order"')]) == 1
+    assert all(result['status'] == 'created' for result in response.data['results'])
+    assert response.data['results'][0]['order']['total_price'] == '350.00'  # сумма вычислена по блюдам
+    assert calculate_total_revenue() == Decimal('350.00')
+
+
+# тест на откат всего пакета в режиме atomic
+@pytest.mark.django_db
+def test_batch_atomic_mode_rejects_whole_batch(client):
+    payload = [order_data(), order_data(price=-1), order_data(table_number=0)]
+    response = client.post(reverse('order-batch'), data=payload, content_type='application/json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data['created'] == 0
+    assert [result['status'] for result in response.data['results']] == ['valid', 'invalid', 'invalid']
+    assert 'items' in response.data['results'][1]['errors']
+    assert 'table_number' in response.data['results'][2]['errors']
+    assert Order.objects.count() == 0
+
+
+# тест на частичное создание в режиме partial
+@pytest.mark.django_db
+def test_batch_partial_mode_creates_valid_orders(client):
+    payload = {'mode': 'partial', 'orders': [order_data(), order_data(order_status='unknown'), order_data()]}
+    response = client.post(reverse('order-batch'), data=payload, content_type='application/json')
+    assert response.status_code == status.HTTP_207_MULTI_STATUS
+    assert response.data['created'] == 2
+    assert [result['status'] for result in response.data['results']] == ['created', 'invalid', 'created']
+    assert Order.objects.count() == 2
+
+
+# тест на пустой пакет
+@pytest.mark.django_db
+def test_batch_empty_payload(client):
+    response = client.post(reverse('order-batch'), data=[], content_type='application/json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+# тест на проверку пакета по тем же правилам, что и импорт
+@pytest.mark.django_db
+def test_batch_validates_like_import(client):
+    payload = {'mode': 'partial', 'orders': [order_data(), 'not an order', order_data(table_number='2')]}
+    response = client.post(reverse('order-batch'), data=payload, content_type='application/json')
+    assert response.status_code == status.HTTP_207_MULTI_STATUS
+    assert [result['status'] for result in response.data['results']] == ['created', 'invalid', 'invalid']
+    assert response.data['results'][1]['errors'] == {'non_field_errors': ['Ожидается объект заказа.']}
+    assert list(response.data['results'][2]['errors']) == ['table_number']
+    assert Order.objects.count() == 1
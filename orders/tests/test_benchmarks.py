@@ -0,0 +1,73 @@
+import json
+import pytest
+from django.core.management import CommandError, call_command
+from ..benchmarks import SCENARIOS, compare_results, run_benchmarks, seed_orders
+from ..models import Order, RevenueTotal
+
+
+# тесты для набора замеров производительности
+
+# тест на воспроизводимость сгенерированных данных
+@pytest.mark.django_db
+def test_seed_orders_is_reproducible():
+    first = seed_orders(50, seed=7, batch_size=20)
+    snapshot = list(Order.objects.filter(pk__in=first).order_by('pk').values_list('table_number', 'items', 'status'))
+    Order.objects.all().delete()
+    second = seed_orders(50, seed=7, batch_size=20)
+    assert len(second) == 50
+    assert list(Order.objects.filter(pk__in=second).order_by('pk').values_list('table_number', 'items', 'status')) \
+        == snapshot
+    assert {len(items) for _, items, _ in snapshot} != {1}
+
+
+# тест на прогон всех сценариев и удаление созданных заказов
+@pytest.mark.django_db
+def test_run_benchmarks():
+    order_ids = seed_orders(100)
+    results = run_benchmarks(order_ids, iterations=2, warmup=1)
+    assert set(results['scenarios']) == set(SCENARIOS)
+    assert results['meta']['orders'] == 100
+    for metrics in results['scenarios'].values():
+        assert metrics['iterations'] == 2
+        assert 0 < metrics['p50_ms'] <= metrics['p95_ms'] <= metrics['max_ms']
+    assert Order.objects.count() == 100
+    assert RevenueTotal.objects.current() == Order.objects.paid_revenue()
+
+
+# тест на поиск регрессий относительно базовых результатов
+def test_compare_results():
+    baseline = {'scenarios': {'list': {'p50_ms': 10.0, 'p95_ms': 20.0}, 'revenue': {'p50_ms': 1.0, 'p95_ms': 2.0}}}
+    current = {'scenarios': {'list': {'p50_ms': 11.0, 'p95_ms': 30.0}, 'revenue': {'p50_ms': 1.0, 'p95_ms': 2.0},
+                             'create': {'p50_ms': 5.0, 'p95_ms': 6.0}}}
+    assert compare_results(current, baseline, threshold=0.2) == [
+        {'scenario': 'list', 'metric': 'p95_ms', 'baseline': 20.0, 'current': 30.0, 'change': 0.5},
+    ]
+
+
+# тест на команду bench_orders с файлом результатов и сравнением с базовыми
+@pytest.mark.django_db
+def test_bench_orders_command(tmp_path):
+    output = tmp_path / 'results.json'
+    call_command('bench_orders', orders=50, iterations=2, warmup=0, scenario=['revenue', 'deserialize'],
+                 output=str(output))
+    results = json.loads(output.read_text(encoding='utf-8'))
+    assert set(results['scenarios']) == {'revenue', 'deserialize'}
+    assert Order.objects.count() == 0
+
+    for metrics in results['scenarios'].values():
+        metrics['p50_ms'] = metrics['p95_ms'] = 0.0001
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps(results), encoding='utf-8')
+    with pytest.raises(CommandError):
+        call_command('bench_orders', orders=50, iterations=2, warmup=0, scenario=['revenue'],
+                     output=str(output), baseline=str(baseline))
+
+
+# тест на замер на существующих заказах без их изменения
+@pytest.mark.django_db
+def test_bench_orders_reuse_keeps_existing_orders(tmp_path):
+    seed_orders(20, seed=3)
+    snapshot = list(Order.objects.order_by('pk').values())
+    call_command('bench_orders', orders=20, iterations=5, warmup=0, scenario=['edit', 'create', 'list'],
+                 reuse=True, output=str(tmp_path / 'results.json'))
+    assert list(Order.objects.order_by('pk').values()) == snapshot
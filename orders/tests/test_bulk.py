@@ -0,0 +1,101 @@
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from ..models import Order
+from ..utils import calculate_total_revenue
+
+
+def create_order(table_number=1, order_status='waiting', price=300):
+    return Order.objects.create(table_number=table_number, items=[{'name': 'Pizza', 'price': price}], status=order_status)
+
+
+# тесты для массовых операций над заказами
+
+# тест на массовую смену статуса по списку ids
+@pytest.mark.django_db
+def test_bulk_status_by_ids(client):
+    orders = [create_order() for _ in range(3)]
+    create_order()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(
+            reverse('order-bulk-status'),
+            data={'status': 'paid', 'ids': [order.id for order in orders]},
+            content_type='application/json',
+        )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['updated'] == 3
+    assert len([query for query in queries if query['sql'].startswith('UPDATE "orders_order"')]) == 1
+    # строки блокируются по возрастанию pk, чтобы пересекающиеся операции не взаимоблокировались
+    [lock] = [query['sql'] for query in queries if query['sql'].endswith('FOR UPDATE')]
+    assert 'ORDER BY "orders_order"."id" ASC' in lock
+    assert Order.objects.filter(status='paid').count() == 3
+    assert calculate_total_revenue() == Decimal('900.00')
+
+
+# тест на массовую смену статуса по фильтру
+@pytest.mark.django_db
+def test_bulk_status_by_filter(client):
+    create_order(table_number=2, order_status='paid', price=100)
+    create_order(table_number=2, order_status='ready')
+    create_order(table_number=3, order_status='ready')
+    response = client.post(
+        reverse('order-bulk-status'),
+        data={'status': 'waiting', 'filter': {'table_number': 2}},
+        content_type='application/json',
+    )
+    assert response.data['updated'] == 2
+    assert Order.objects.filter(table_number=2, status='waiting').count() == 2
+    assert calculate_total_revenue() == 0
+    assert Order.objects.get(table_number=3).status == 'ready'
+
+
+# тест на некорректный статус и некорректный фильтр
+@pytest.mark.django_db
+def test_bulk_status_validation(client):
+    order = create_order()
+    url = reverse('order-bulk-status')
+    response = client.post(url, data={'status': 'done', 'ids': [order.id]}, content_type='application/json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = client.post(url, data={'status': 'paid', 'filter': {'tabel': 1}}, content_type='application/json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = client.post(url, data={'status': 'paid', 'filter': {}}, content_type='application/json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    # логические значения не принимаются за идентификаторы
+    response = client.post(url, data={'status': 'paid', 'ids': [True]}, content_type='application/json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    # тело запроса - не объект
+    response = client.post(url, data=[order.id], content_type='application/json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = client.post(reverse('order-bulk-delete'), data=[order.id], content_type='application/json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert Order.objects.get(pk=order.pk).status == 'waiting'
+
+
+# тест на массовое удаление по фильтру
+@pytest.mark.django_db
+def test_bulk_delete_by_filter(client):
+    create_order(order_status='paid')
+    create_order(order_status='paid', table_number=4, price=50)
+    create_order()
+    response = client.post(
+        reverse('order-bulk-delete'), data={'filter': {'status': 'paid', 'table_number': 1}},
+        content_type='application/json',
+    )
+    assert response.data['deleted'] == 1
+    assert Order.objects.count() == 2
+    assert calculate_total_revenue() == Decimal('50.00')
+
+
+# тест на массовое удаление по списку ids
+@pytest.mark.django_db
+def test_bulk_delete_by_ids(client):
+    orders = [create_order(order_status='paid') for _ in range(2)]
+    response = client.post(
+        reverse('order-bulk-delete'), data={'ids': [order.id for order in orders]}, content_type='application/json'
+    )
+    assert response.data['deleted'] == 2
+    assert Order.objects.count() == 0
+    assert calculate_total_revenue() == 0
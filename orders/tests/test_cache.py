@@ -0,0 +1,76 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..cache import cached, get_cache_stats, get_generation
+from ..models import Order
+from .factories import create_order
+from ..routers import primary_pinned
+
+# Инвалидация выполняется после фиксации транзакции, поэтому тесты работают без общей транзакции
+pytestmark = pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+
+
+# тесты для кэша заказов
+
+# тест на чтение повторного запроса списка из кэша
+def test_api_list_is_cached(client):
+    create_order()
+    url = reverse('order-list')
+    first = client.get(url, {'status': 'waiting'})
+    with CaptureQueriesContext(connection) as queries:
+        second = client.get(url, {'status': 'waiting'})
+    assert len(queries) == 0
+    assert second.data == first.data
+    stats = client.get(reverse('order-cache-stats')).data
+    assert stats['hits'] >= 1 and stats['misses'] >= 1
+
+
+# тест на сброс кэша после сохранения и удаления заказа
+def test_cache_invalidated_after_commit(client):
+    order = create_order()
+    detail_url = reverse('order-detail', args=[order.id])
+    assert client.get(detail_url).data['status'] == 'waiting'
+    client.patch(detail_url, data={'status': 'ready'}, content_type='application/json')
+    assert client.get(detail_url).data['status'] == 'ready'
+
+    assert len(client.get(reverse('list_order')).context['orders']) == 1
+    client.get(reverse('order_delete', args=[order.id]))
+    assert len(client.get(reverse('list_order')).context['orders']) == 0
+
+
+# тест на сброс кэша после массовых операций, одна инвалидация на транзакцию
+def test_cache_invalidated_after_bulk_operations(client):
+    orders = [create_order(), create_order()]
+    assert client.get(reverse('calculate_revenue')).context['total_revenue'] == 0
+    generation = get_generation()
+    Order.objects.filter(pk__in=[order.pk for order in orders]).set_status('paid')
+    assert get_generation() == generation + 1
+    assert client.get(reverse('calculate_revenue')).context['total_revenue'] == 600
+    assert client.get(reverse('order-revenue')).data['total_revenue'] == 600
+
+    generation = get_generation()
+    Order.objects.filter(pk__in=[order.pk for order in orders]).delete()
+    assert get_generation() == generation + 1
+    assert client.get(reverse('order-revenue')).data['total_revenue'] == 0
+
+
+# тест на обход кэша при незафиксированных изменениях в транзакции
+def test_cache_bypassed_with_pending_changes():
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            create_order()
+            assert cached('test', [1], lambda: 'uncommitted') == 'uncommitted'
+            raise RuntimeError  # откат: незафиксированное значение не должно остаться в кэше
+    assert cached('test', [1], lambda: 'committed') == 'committed'
+    assert cached('test', [1], lambda: 'recomputed') == 'committed'
+    assert get_cache_stats()['hits'] >= 1
+
+
+# тест на чтение своих изменений мимо кэша, заполненного с реплики
+def test_cache_not_read_when_pinned_to_primary():
+    assert cached('test', [1], lambda: 'replica') == 'replica'
+    with primary_pinned():
+        assert cached('test', [1], lambda: 'primary') == 'primary'
+    # значение с основной базы заменило значение с реплики
+    assert cached('test', [1], lambda: 'replica') == 'primary'
@@ -0,0 +1,77 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import status
+from ..models import Order
+from .factories import create_order
+
+
+# тесты для условных GET-запросов (ETag / Last-Modified)
+
+# тест на версию заказа при сохранении и массовом изменении
+@pytest.mark.django_db
+def test_order_version_increments():
+    order = create_order()
+    assert order.version == 1
+    order.status = 'ready'
+    order.save()
+    assert order.version == 2
+    Order.objects.filter(pk=order.pk).set_status('paid')
+    assert Order.objects.get(pk=order.pk).version == 3
+
+
+# тест на 304 для заказа по If-None-Match и новый ETag после изменения
+@pytest.mark.django_db
+def test_detail_if_none_match(client):
+    order = create_order()
+    url = reverse('order-detail', args=[order.id])
+    response = client.get(url)
+    etag = response['ETag']
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert all('"items"' not in query['sql'] for query in queries)  # тело заказа не читается
+
+    client.patch(url, data={'status': 'ready'}, content_type='application/json')
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response['ETag'] != etag
+
+
+# тест на 304 для заказа по If-Modified-Since
+@pytest.mark.django_db
+def test_detail_if_modified_since(client):
+    order = create_order()
+    url = reverse('order-detail', args=[order.id])
+    last_modified = client.get(url)['Last-Modified']
+    assert client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == status.HTTP_304_NOT_MODIFIED
+    assert client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(0)).status_code == status.HTTP_200_OK
+
+
+# тест на 404 для ID из нецифровых символов Unicode
+@pytest.mark.django_db
+def test_detail_unicode_digit_pk(client):
+    create_order()
+    response = client.get('/orders/api/orders/%C2%B2/')
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert 'ETag' not in response
+
+
+# тест на 304 для списка и новый ETag после добавления или удаления заказа
+@pytest.mark.django_db
+def test_list_if_none_match(client):
+    first = create_order()
+    url = reverse('order-list')
+    etag = client.get(url, {'status': 'waiting'})['ETag']
+    response = client.get(url, {'status': 'waiting'}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    create_order(status='paid')  # не попадает в фильтр
+    assert client.get(url, {'status': 'waiting'}, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+    first.delete()
+    response = client.get(url, {'status': 'waiting'}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['results'] == []
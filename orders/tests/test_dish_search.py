@@ -0,0 +1,88 @@
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from ..forms import OrderSearchForm
+from ..models import Order, OrderItem
+from ..utils import get_filtered_orders
+
+
+@pytest.fixture
+def orders():
+    """ Заказы с кириллическими и латинскими названиями блюд. """
+    return [
+        Order.objects.create(table_number=1, items=[{'name': 'Борщ украинский', 'price': 300}]),
+        Order.objects.create(table_number=2, items=[{'name': 'Суп', 'price': 200}, {'name': 'ЗЕЛЁНЫЙ чай', 'price': 50}]),
+        Order.objects.create(table_number=3, items=[{'name': 'Pizza  Margherita', 'price': 450}], status='paid'),
+    ]
+
+
+def search(**params):
+    form = OrderSearchForm(params)
+    assert form.is_valid(), form.errors
+    return sorted(order.table_number for order in get_filtered_orders(form))
+
+
+# тесты для поиска заказов по названию блюда
+
+# тест на нормализованные названия блюд
+@pytest.mark.django_db
+def test_search_name_normalized(orders):
+    assert set(OrderItem.objects.values_list('search_name', flat=True)) == {
+        'борщ украинский', 'суп', 'зеленый чай', 'pizza margherita',
+    }
+    Order.objects.filter(pk=orders[1].pk).update(items=[{'name': 'Щи', 'price': 150}])
+    assert list(orders[1].order_items.values_list('search_name', flat=True)) == ['щи']
+
+
+# тест на поиск по части названия и по началу названия без учета регистра
+@pytest.mark.django_db
+def test_search_by_dish(orders):
+    assert search(dish='БОРЩ') == [1]
+    assert search(dish='украин') == [1]
+    assert search(dish='зеленый') == [2]
+    assert search(dish='ЗЕЛЁН') == [2]
+    assert search(dish='pizza margherita') == [3]
+    assert search(dish='MARG') == [3]
+    assert search(dish='чай', dish_match='prefix') == []
+    assert search(dish='зел', dish_match='prefix') == [2]
+    assert search(dish='%') == []
+    assert search(dish='у', status='waiting') == [1, 2]
+
+
+# тест на поиск по блюду в API и на HTML-странице поиска
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_dish_search_views(client, orders):
+    response = client.get(reverse('order-list'), {'dish': 'борщ'})
+    assert response.status_code == status.HTTP_200_OK
+    assert [order['table_number'] for order in response.json()['results']] == [1]
+
+    response = client.get(reverse('order-list'), {'dish': 'pi', 'dish_match': 'prefix'})
+    assert [order['table_number'] for order in response.json()['results']] == [3]
+
+    response = client.get(reverse('order-list'), {'dish': 'pi', 'dish_match': 'start'})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.get(reverse('order_search'), {'dish': 'Суп'})
+    assert response.status_code == status.HTTP_200_OK
+    assert list(Order.objects.filter(pk__in=dict(response.context['orders'])).values_list('table_number', flat=True)) == [2]
+
+
+# тест на заполнение названий для поиска в миграции
+@pytest.mark.django_db(transaction=True)
+def test_search_name_backfill():
+    order = Order.objects.create(table_number=1, items=[{'name': 'Ёжики', 'price': 100}])
+    OrderItem.objects.update(search_name='')
+    call_command('migrate', 'orders', '0009', verbosity=0)
+    call_command('migrate', 'orders', verbosity=0)
+    assert list(order.order_items.values_list('search_name', flat=True)) == ['ежики']
+
+
+# тест на массовую смену статуса по фильтру с блюдом
+@pytest.mark.django_db
+def test_bulk_status_by_dish(client, orders):
+    response = client.post(
+        reverse('order-bulk-status'), data={'status': 'ready', 'filter': {'dish': 'суп'}}, content_type='application/json'
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert list(Order.objects.filter(status='ready').values_list('table_number', flat=True)) == [2]
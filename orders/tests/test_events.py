@@ -0,0 +1,177 @@
+import asyncio
+import json
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import transaction
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+from ..events import broker, stop_listener, subscribe_order_events
+from ..models import Order
+from .factories import create_order
+
+# События отправляются после фиксации транзакции, поэтому тесты работают без общей транзакции
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def run(scenario):
+    async_to_sync(scenario)()
+
+
+async def next_events(subscription, count):
+    return [await subscription.get(5) for _ in range(count)]
+
+
+# тесты для потока событий о заказах
+
+# тест на события о создании, изменении и удалении заказа
+def test_order_lifecycle_events():
+    async def scenario():
+        subscription = broker.subscribe()
+        try:
+            order = await sync_to_async(create_order)()
+            order_id = order.id
+            await sync_to_async(Order.objects.filter(pk=order.pk).set_status)('ready')
+            await sync_to_async(order.delete)()
+            events = await next_events(subscription, 3)
+        finally:
+            subscription.close()
+        assert [event['type'] for event in events] == ['created', 'updated', 'deleted']
+        assert events[0]['order'] == {
+            'id': order_id, 'table_number': 1, 'status': 'waiting', 'total_price': '300.00', 'version': 1
+        }
+        assert events[1]['order']['status'] == 'ready' and events[1]['order']['version'] == 2
+        assert events[2]['order']['id'] == order_id
+        assert events[0]['id'] < events[1]['id'] < events[2]['id']
+
+    run(scenario)
+
+
+# тест на отсутствие событий при откате транзакции
+def test_no_events_on_rollback():
+    def create_and_rollback():
+        with pytest.raises(RuntimeError), transaction.atomic():
+            create_order()
+            raise RuntimeError
+
+    async def scenario():
+        subscription = broker.subscribe()
+        try:
+            await sync_to_async(create_and_rollback)()
+            await sync_to_async(create_order)(table_number=2)
+            event = await subscription.get(5)
+        finally:
+            subscription.close()
+        assert event['order']['table_number'] == 2
+        assert subscription.queue.empty()
+
+    run(scenario)
+
+
+# тест на фильтры подписки и события массовых операций
+def test_filters_and_bulk_events():
+    async def scenario():
+        subscription = broker.subscribe(statuses={'ready'}, table_number=2)
+        try:
+            await sync_to_async(Order.objects.bulk_create)([
+                Order(table_number=table_number, items=[{'name': 'Soup', 'price': 100}], status='waiting')
+                for table_number in (1, 2, 2)
+            ])
+            await sync_to_async(Order.objects.all().set_status)('ready')
+            events = await next_events(subscription, 2)
+            await sync_to_async(Order.objects.filter(table_number=1).delete)()
+            await asyncio.sleep(0.1)
+        finally:
+            subscription.close()
+        assert [event['type'] for event in events] == ['updated', 'updated']
+        assert {event['order']['table_number'] for event in events} == {2}
+        assert subscription.queue.empty()
+
+    run(scenario)
+
+
+# тест на событие о выходе заказа из отслеживаемого статуса
+def test_status_filter_sees_order_leaving_status():
+    async def scenario():
+        subscription = broker.subscribe(statuses={'waiting'})
+        try:
+            order = await sync_to_async(create_order)(table_number=1)
+            other = await sync_to_async(create_order)(table_number=2)
+            order.status = 'ready'
+            await sync_to_async(order.save)()
+            await sync_to_async(Order.objects.filter(pk=other.pk).set_status)('paid')
+            events = await next_events(subscription, 4)
+            await sync_to_async(Order.objects.filter(pk=other.pk).update)(table_number=3)
+            await asyncio.sleep(0.1)
+        finally:
+            subscription.close()
+        assert [event['type'] for event in events] == ['created', 'created', 'updated', 'updated']
+        assert [(event['order']['previous_status'], event['order']['status']) for event in events[2:]] == [
+            ('waiting', 'ready'), ('waiting', 'paid')
+        ]
+        # изменения вне отслеживаемого статуса не приходят
+        assert subscription.queue.empty()
+
+    run(scenario)
+
+
+# тест на дочитывание пропущенных событий по Last-Event-ID
+def test_replay_after_reconnect():
+    async def scenario():
+        subscription = broker.subscribe()
+        await sync_to_async(create_order)(table_number=1)
+        first = await subscription.get(5)
+        subscription.close()
+        await sync_to_async(create_order)(table_number=2)
+        await sync_to_async(create_order)(table_number=3)
+
+        resumed = broker.subscribe(last_event_id=first['id'])
+        try:
+            events = await next_events(resumed, 2)
+        finally:
+            resumed.close()
+        assert [event['order']['table_number'] for event in events] == [2, 3]
+
+    run(scenario)
+
+
+# тест на поток Server-Sent Events
+def test_sse_endpoint():
+    async def scenario():
+        client = AsyncClient()
+        response = await client.get(reverse('async_order_events'), {'status': 'waiting'})
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'text/event-stream'
+        stream = response.streaming_content
+        try:
+            assert (await stream.__anext__()).startswith(b'retry:')
+            order = await sync_to_async(create_order)(table_number=4)
+            chunk = (await stream.__anext__()).decode()
+        finally:
+            response.close()
+        lines = chunk.strip().split('\n')
+        assert lines[1] == 'event: created'
+        assert json.loads(lines[2].removeprefix('data: '))['id'] == order.id
+        assert not broker.has_subscribers()
+
+        invalid = await client.get(reverse('async_order_events'), {'status': 'cooking'})
+        assert invalid.status_code == 400
+
+    run(scenario)
+
+
+# тест на доставку событий через PostgreSQL LISTEN/NOTIFY
+@override_settings(ORDERS_EVENTS_BACKEND='postgres')
+def test_postgres_notify_backend():
+    async def scenario():
+        subscription = await subscribe_order_events()
+        try:
+            order = await sync_to_async(create_order)(table_number=5)
+            event = await subscription.get(5)
+        finally:
+            subscription.close()
+        assert event['type'] == 'created' and event['order']['id'] == order.id
+
+    try:
+        run(scenario)
+    finally:
+        stop_listener()
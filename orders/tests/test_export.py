@@ -0,0 +1,65 @@
+import csv
+import gzip
+import io
+import json
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from ..models import Order
+
+
+@pytest.fixture
+def orders(db):
+    return [
+        Order.objects.create(table_number=1, items=[{'name': 'Борщ', 'price': 250}], status='paid'),
+        Order.objects.create(table_number=2, items=[{'name': 'Pizza', 'price': 300}], status='waiting'),
+        Order.objects.create(table_number=1, items=[{'name': 'Tea', 'price': 50}], status='waiting'),
+    ]
+
+
+# тесты для потоковой выгрузки заказов
+
+# тест на выгрузку в CSV через API
+def test_export_csv(client, orders):
+    response = client.get(reverse('order-export'), {'fmt': 'csv'})
+    assert response.status_code == 200
+    assert response.streaming
+    rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+    assert rows[0] == ['id', 'table_number', 'status', 'total_price', 'items', 'created_at', 'paid_at']
+    assert [int(row[0]) for row in rows[1:]] == [order.id for order in orders]
+    assert json.loads(rows[1][4]) == [{'name': 'Борщ', 'price': 250}]
+
+
+# тест на выгрузку в NDJSON с фильтрами
+def test_export_ndjson_with_filters(client, orders):
+    response = client.get(reverse('order-export'), {'fmt': 'ndjson', 'table_number': 1, 'status': 'waiting'})
+    lines = b''.join(response.streaming_content).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {'id': orders[2].id, 'table_number': 1, 'status': 'waiting', 'total_price': '50.00',
+         'items': [{'name': 'Tea', 'price': 50}], 'created_at': orders[2].created_at.isoformat(), 'paid_at': None},
+    ]
+
+
+# тест на неизвестный формат выгрузки
+def test_export_unknown_format(client, orders):
+    response = client.get(reverse('order-export'), {'fmt': 'xml'})
+    assert response.status_code == 400
+
+
+# тест на выгрузку командой export_orders в gzip
+def test_export_orders_command_gzip(orders, tmp_path):
+    output = tmp_path / 'orders.ndjson.gz'
+    call_command('export_orders', '--format', 'ndjson', '--output', str(output), '--status', 'waiting',
+                 '--chunk-size', '1', stdout=io.StringIO())
+    with gzip.open(output, 'rt', encoding='utf-8') as stream:
+        exported = [json.loads(line) for line in stream]
+    assert [order['id'] for order in exported] == [orders[1].id, orders[2].id]
+
+
+# тест на выгрузку командой export_orders в stdout
+def test_export_orders_command_stdout(orders):
+    stdout = io.StringIO()
+    call_command('export_orders', '--table-number', '2', stdout=stdout)
+    rows = list(csv.reader(io.StringIO(stdout.getvalue())))
+    assert len(rows) == 2
+    assert rows[1][0] == str(orders[1].id)
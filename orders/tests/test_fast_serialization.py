@@ -0,0 +1,69 @@
+import json
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from ..models import Order
+from ..serializers import OrderSerializer, order_values, serialize_order_rows
+
+
+@pytest.fixture
+def orders():
+    return [
+        Order.objects.create(table_number=1, items=[{'name': 'Пицца «Маргарита»', 'price': 450}]),
+        Order.objects.create(table_number=2, items=[{'name': 'Tea', 'price': 99.9}, {'name': 'Ёлка', 'price': 0.5}],
+                             status='ready'),
+        Order.objects.create(table_number=3, items=[{'name': 'Line sep', 'price': 1e-05, 'qty': 3}],
+                             status='paid', total_price='12345678.9'),
+    ]
+
+
+def render_serializer(queryset):
+    return JSONRenderer().render(OrderSerializer(queryset, many=True).data)
+
+
+# тесты для быстрой сериализации заказов
+
+# тест на побайтное совпадение с OrderSerializer
+@pytest.mark.django_db
+def test_serialize_order_rows_matches_serializer(orders):
+    queryset = Order.objects.order_by('-id')
+    fast = serialize_order_rows(list(order_values(queryset)))
+    assert JSONRenderer().render(fast) == render_serializer(queryset)
+    assert list(fast[0]) == OrderSerializer.Meta.fields
+
+    # без приведения Decimal к строке формат тоже совпадает
+    with override_settings(REST_FRAMEWORK={'COERCE_DECIMAL_TO_STRING': False}):
+        fast = serialize_order_rows(list(order_values(queryset)))
+        assert JSONRenderer().render(fast) == render_serializer(queryset)
+
+
+# тест на побайтное совпадение ответов списка и заказа в API
+@pytest.mark.django_db
+def test_api_responses_match_serializer(client, orders):
+    response = client.get(reverse('order-list'), {'page_size': 2})
+    assert response.status_code == status.HTTP_200_OK
+    payload = json.loads(response.content)
+    expected = {'next': payload['next'], 'previous': None,
+                'results': OrderSerializer(Order.objects.order_by('-id')[:2], many=True).data}
+    assert response.content == JSONRenderer().render(expected)
+
+    response = client.get(payload['next'])
+    assert json.loads(response.content)['results'] == OrderSerializer(Order.objects.filter(pk=orders[0].pk), many=True).data
+
+    response = client.get(reverse('order-detail', args=[orders[2].pk]))
+    assert response.content == JSONRenderer().render(OrderSerializer(Order.objects.get(pk=orders[2].pk)).data)
+    assert client.get(reverse('order-detail', args=[0])).status_code == status.HTTP_404_NOT_FOUND
+    assert client.get(reverse('order-detail', args=['abc'])).status_code == status.HTTP_404_NOT_FOUND
+
+
+# тест на побайтное совпадение ответов асинхронного API
+@pytest.mark.django_db
+def test_async_responses_match_serializer(client, orders):
+    response = client.get(reverse('async_order_list'))
+    expected = {'next': None, 'previous': None, 'results': OrderSerializer(Order.objects.order_by('-id'), many=True).data}
+    assert response.content == JSONRenderer().render(expected)
+
+    response = client.get(reverse('async_order_detail', args=[orders[1].pk]))
+    assert response.content == JSONRenderer().render(OrderSerializer(Order.objects.get(pk=orders[1].pk)).data)
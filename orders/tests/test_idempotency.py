@@ -0,0 +1,91 @@
+from datetime import timedelta
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from ..models import IdempotencyKey, Order
+
+PAYLOAD = {'table_number': 2, 'items': [{'name': 'Pizza', 'price': 300}], 'status': 'waiting', 'total_price': 300}
+
+
+def post_order(client, key, payload=PAYLOAD):
+    return client.post(reverse('order-list'), data=payload, content_type='application/json', HTTP_IDEMPOTENCY_KEY=key)
+
+
+def form_data(key, table_number=3):
+    return {'table_number': table_number, 'status': 'waiting', 'dish_name': ['Суп'], 'dish_price': ['200'],
+            'idempotency_key': key}
+
+
+# тесты для ключей идемпотентности
+
+# тест на повтор запроса API с тем же ключом
+@pytest.mark.django_db
+def test_api_create_replayed(client):
+    first = post_order(client, 'tablet-1-0001')
+    assert first.status_code == status.HTTP_201_CREATED
+    assert 'Idempotent-Replayed' not in first
+
+    with CaptureQueriesContext(connection) as queries:
+        second = post_order(client, 'tablet-1-0001')
+    assert second.status_code == status.HTTP_201_CREATED
+    assert second['Idempotent-Replayed'] == 'true'
+    assert second.json() == first.json()
+    assert not any('INSERT' in query['sql'] for query in queries)
+    assert Order.objects.count() == 1
+
+    assert post_order(client, 'tablet-1-0002').status_code == status.HTTP_201_CREATED
+    assert Order.objects.count() == 2
+
+
+# тест на ключ, использованный с другими данными, и на некорректный ключ
+@pytest.mark.django_db
+def test_api_key_reused_with_other_payload(client):
+    post_order(client, 'key')
+    response = post_order(client, 'key', {**PAYLOAD, 'table_number': 7})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert post_order(client, 'x' * 256).status_code == status.HTTP_400_BAD_REQUEST
+    assert Order.objects.count() == 1
+
+
+# тест на то, что неуспешный запрос не занимает ключ
+@pytest.mark.django_db
+def test_api_failed_request_releases_key(client):
+    response = post_order(client, 'retry', {**PAYLOAD, 'items': []})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not IdempotencyKey.objects.exists()
+    assert post_order(client, 'retry').status_code == status.HTTP_201_CREATED
+    assert Order.objects.count() == 1
+
+
+# тест на повторную отправку HTML-формы создания заказа
+@pytest.mark.django_db
+def test_form_create_replayed(client):
+    content = client.get(reverse('create_order')).content.decode()
+    assert 'name="idempotency_key"' in content
+
+    assert client.post(reverse('create_order'), form_data('form-1')).status_code == 302
+    response = client.post(reverse('create_order'), form_data('form-1'))
+    assert response.status_code == 302 and response.url == reverse('list_order')
+    assert Order.objects.count() == 1
+
+    response = client.post(reverse('create_order'), form_data('form-1', table_number=4))
+    assert response.status_code == 422
+    assert Order.objects.count() == 1
+
+
+# тест на истечение срока ключа и удаление истекших ключей
+@pytest.mark.django_db
+def test_expired_keys(client):
+    post_order(client, 'old')
+    IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+    assert 'Idempotent-Replayed' not in post_order(client, 'old')
+    assert Order.objects.count() == 2
+
+    post_order(client, 'other')
+    IdempotencyKey.objects.filter(key='other').update(expires_at=timezone.now() - timedelta(seconds=1))
+    call_command('purge_idempotency_keys', batch_size=1)
+    assert list(IdempotencyKey.objects.values_list('key', flat=True)) == ['old']
@@ -0,0 +1,102 @@
+import io
+import json
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.utils import timezone
+from ..models import Order, OrderItem
+from ..utils import calculate_total_revenue
+from ..validation import TIMESTAMP_INVALID, TOTAL_PRICE_INVALID, validate_order_rows
+
+
+# тесты для импорта заказов
+
+# тест на пачечную проверку заказов по правилам Order.clean
+def test_validate_order_rows():
+    errors = validate_order_rows([
+        {'table_number': 1, 'status': 'waiting', 'items': [{'name': 'Pizza', 'price': 300}]},
+        {'table_number': 1, 'status': 'waiting', 'items': []},
+        {'table_number': 1, 'status': 'waiting', 'items': [{'name': 'Pizza', 'price': 0}]},
+        {'table_number': 1, 'status': 'waiting', 'items': [{'name': '', 'price': 10}]},
+        {'table_number': 0, 'status': 'done', 'items': [{'name': 'Pizza', 'price': '10'}]},
+    ], statuses=dict(Order.STATUS_CHOICES))
+    assert errors[0] == []
+    assert errors[1] == ["Поле 'items' не может быть пустым."]
+    assert errors[2] == ['Цена блюда не может быть отрицательной или нулевой.']
+    assert errors[3] == ['Название блюда не может быть пустым.']
+    assert len(errors[4]) == 3
+
+    errors = validate_order_rows([
+        {'table_number': 1, 'status': 'paid', 'items': [{'name': 'Pizza', 'price': 300}],
+         'created_at': '2024-01-01T12:00:00', 'paid_at': '2024-01-01T13:00:00+03:00'},
+        {'table_number': 1, 'status': 'paid', 'items': [{'name': 'Pizza', 'price': 300}],
+         'created_at': 'вчера', 'paid_at': 5},
+    ], statuses=dict(Order.STATUS_CHOICES))
+    assert errors == [[], [TIMESTAMP_INVALID, TIMESTAMP_INVALID]]
+
+
+# тест на импорт JSONL с отклоненными строками
+@pytest.mark.django_db(transaction=True)
+def test_import_orders_jsonl(tmp_path):
+    source = tmp_path / 'orders.jsonl'
+    source.write_text('\n'.join([
+        json.dumps({'table_number': 1, 'status': 'paid', 'items': [{'name': 'Борщ', 'price': 250}]}),
+        json.dumps({'table_number': 2, 'status': 'waiting', 'items': [{'name': 'Tea', 'price': -5}]}),
+        'not json',
+        json.dumps({'table_number': 3, 'status': 'waiting',
+                    'items': [{'name': 'Tea', 'price': 50}, {'name': 'Tea', 'price': 50}]}),
+    ]), encoding='utf-8')
+    rejects = tmp_path / 'rejects.jsonl'
+    call_command('import_orders', str(source), '--batch-size', '2', '--rejects', str(rejects), stdout=io.StringIO())
+
+    assert list(Order.objects.order_by('id').values_list('table_number', 'total_price')) == [
+        (1, Decimal('250.00')), (3, Decimal('100.00')),
+    ]
+    assert OrderItem.objects.get(order__table_number=3).quantity == 2
+    assert calculate_total_revenue() == Decimal('250.00')
+    assert [json.loads(line)['line'] for line in rejects.read_text(encoding='utf-8').splitlines()] == [2, 3]
+
+    # после COPY последовательность id продолжает работать для обычных вставок
+    order = Order.objects.create(table_number=4, items=[{'name': 'Pizza', 'price': 300}])
+    assert order.id > Order.objects.filter(table_number=3).get().id
+
+
+# тест на отклонение строк с некорректной суммой заказа без остановки пачки
+@pytest.mark.django_db(transaction=True)
+def test_import_orders_rejects_invalid_total_price(tmp_path):
+    source = tmp_path / 'orders.csv'
+    items = json.dumps([{'name': 'Tea', 'price': 50}]).replace('"', '""')
+    source.write_text('table_number,status,items,total_price\n' + ''.join(
+        f'{table_number},waiting,"{items}",{total_price}\n'
+        for table_number, total_price in [(1, 'abc'), (2, '1e10'), (3, '-1'), (4, '12.5'), (5, ''), (6, 'NaN')]
+    ), encoding='utf-8')
+    rejects = tmp_path / 'rejects.jsonl'
+    call_command('import_orders', str(source), '--rejects', str(rejects), stdout=io.StringIO())
+
+    assert list(Order.objects.order_by('id').values_list('table_number', 'total_price')) == [
+        (4, Decimal('12.50')), (5, Decimal('50.00')),
+    ]
+    rejected = [json.loads(line) for line in rejects.read_text(encoding='utf-8').splitlines()]
+    assert [row['line'] for row in rejected] == [2, 3, 4, 7]
+    assert all(row['errors'] == [TOTAL_PRICE_INVALID] for row in rejected)
+
+
+# тест на импорт CSV в формате выгрузки export_orders
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_import_orders_csv_roundtrip(tmp_path):
+    Order.objects.create(table_number=5, items=[{'name': 'Pizza', 'price': 300}], status='ready')
+    # исторический оплаченный заказ сохраняет время создания и оплаты
+    created_at = timezone.now() - timedelta(days=30)
+    paid = Order.objects.create(table_number=6, items=[{'name': 'Tea', 'price': 50}], status='paid',
+                                paid_at=created_at + timedelta(hours=1))
+    Order.objects.filter(pk=paid.pk).update(created_at=created_at)
+    export = tmp_path / 'orders.csv'
+    call_command('export_orders', '--output', str(export), stdout=io.StringIO())
+    Order.objects.all().delete()
+
+    call_command('import_orders', str(export), stdout=io.StringIO())
+    order, paid = Order.objects.order_by('table_number')
+    assert (order.table_number, order.status, order.items) == (5, 'ready', [{'name': 'Pizza', 'price': 300}])
+    assert order.paid_at is None
+    assert (paid.created_at, paid.paid_at) == (created_at, created_at + timedelta(hours=1))
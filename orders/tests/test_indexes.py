@@ -0,0 +1,53 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from ..models import Order
+
+pytestmark = pytest.mark.skipif(connection.vendor != 'postgresql', reason='Планы запросов проверяются только на PostgreSQL')
+
+
+@pytest.fixture
+def seeded_orders(transactional_db):
+    # 20 000 заказов на 500 столах, оплачена только небольшая часть
+    statuses = ['waiting'] * 10 + ['ready'] * 9 + ['paid']
+    Order.objects.bulk_create(
+        [
+            Order(
+                table_number=i % 500 + 1,
+                items=[{'name': 'Pizza', 'price': 300}],
+                status=statuses[i % len(statuses)],
+                total_price=300,
+            )
+            for i in range(20000)
+        ],
+        batch_size=5000,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM ANALYZE orders_order')
+
+
+def explain_executed_query(func):
+    """ Выполняет функцию и возвращает план последнего выполненного ей SQL-запроса. """
+    with CaptureQueriesContext(connection) as queries:
+        func()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN ' + queries[-1]['sql'])
+        return '\n'.join(row[0] for row in cursor.fetchall())
+
+
+# тест на использование индекса по статусу и номеру стола при поиске
+def test_search_by_status_and_table_uses_index(seeded_orders):
+    plan = Order.objects.filter(status='waiting', table_number=7).order_by('-id')[:50].explain()
+    assert 'orders_status_table_id_idx' in plan
+
+
+# тест на использование индекса при поиске только по номеру стола
+def test_search_by_table_uses_index(seeded_orders):
+    plan = Order.objects.filter(table_number=7).order_by('-id')[:50].explain()
+    assert 'orders_table_id_idx' in plan
+
+
+# тест на index-only scan при полном пересчете выручки
+def test_revenue_is_index_only_scan(seeded_orders):
+    plan = explain_executed_query(Order.objects.paid_revenue)
+    assert 'Index Only Scan using orders_paid_total_price_idx' in plan
@@ -0,0 +1,84 @@
+import re
+import pytest
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..metrics import Histogram
+from .factories import create_order
+
+
+def sample(client, name, **labels) -> float:
+    """ Значение метрики с указанными метками из ответа /metrics (0, если метрики еще нет). """
+    text = client.get(reverse('metrics')).content.decode()
+    for line in text.splitlines():
+        match = re.match(r'^(\w+)\{(.*)\} (\S+)$', line)
+        if match and match[1] == name and dict(re.findall(r'(\w+)="([^"]*)"', match[2])) == labels:
+            return float(match[3])
+    return 0
+
+
+# тесты для метрик запросов
+
+# тест на метрики задержки, количества SQL-запросов и размера ответа по имени маршрута
+@pytest.mark.django_db
+def test_metrics_per_view(client):
+    create_order()
+    requests_before = sample(client, 'cafe_http_requests_total', view='list_order', method='GET', status='200')
+    queries_before = sample(client, 'cafe_db_queries_total', view='list_order')
+    latency_before = sample(client, 'cafe_http_request_duration_seconds_count', view='list_order', method='GET')
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('list_order'))
+    assert response.status_code == 200
+    # журнал запросов соединения очищается в начале следующего запроса к /metrics
+    query_count = len(queries)
+
+    assert sample(client, 'cafe_http_requests_total', view='list_order', method='GET', status='200') \
+        == requests_before + 1
+    assert sample(client, 'cafe_db_queries_total', view='list_order') == queries_before + query_count
+    assert sample(client, 'cafe_http_request_duration_seconds_count', view='list_order', method='GET') \
+        == latency_before + 1
+    # размер потоковых ответов (список заказов) не записывается
+    client.get(reverse('calculate_revenue'))
+    assert sample(client, 'cafe_http_response_size_bytes_count', view='calculate_revenue') >= 1
+    assert sample(client, 'cafe_db_query_duration_seconds_total', view='list_order') > 0
+
+
+# тест на метрики DRF и асинхронных маршрутов
+@pytest.mark.django_db
+def test_metrics_for_api_and_async_views(client):
+    create_order(status='paid')
+    client.get(reverse('order-revenue'))
+    client.get(reverse('async_order_list'))
+    assert sample(client, 'cafe_http_requests_total', view='order-revenue', method='GET', status='200') >= 1
+    assert sample(client, 'cafe_db_queries_total', view='async_order_list') >= 1
+    client.get('/orders/missing/')
+    assert sample(client, 'cafe_http_requests_total', view='<unresolved>', method='GET', status='404') >= 1
+
+
+# тест на формат гистограммы Prometheus
+def test_histogram_render():
+    histogram = Histogram('test_seconds', 'Тест.', ['view'], (0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(('a"b',), value)
+    assert list(histogram.render()) == [
+        '# HELP test_seconds Тест.',
+        '# TYPE test_seconds histogram',
+        'test_seconds_bucket{view="a\\"b",le="0.1"} 2',
+        'test_seconds_bucket{view="a\\"b",le="1"} 3',
+        'test_seconds_bucket{view="a\\"b",le="+Inf"} 4',
+        'test_seconds_sum{view="a\\"b"} 3.65',
+        'test_seconds_count{view="a\\"b"} 4',
+    ]
+
+
+# тест на отключение метрик
+@pytest.mark.django_db
+def test_metrics_disabled():
+    before = sample(Client(), 'cafe_http_requests_total', view='calculate_revenue', method='GET', status='200')
+    with override_settings(ORDERS_METRICS_ENABLED=False):
+        client = Client()
+        assert client.get(reverse('metrics')).status_code == 404
+        assert client.get(reverse('calculate_revenue')).status_code == 200
+    assert sample(Client(), 'cafe_http_requests_total', view='calculate_revenue', method='GET', status='200') == before
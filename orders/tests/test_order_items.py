@@ -0,0 +1,82 @@
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+from rest_framework import status
+from ..models import Order, OrderItem
+
+
+def create_order(items, order_status='waiting'):
+    return Order.objects.create(table_number=1, items=items, status=order_status)
+
+
+def stored_items(order):
+    return list(order.order_items.order_by('name').values_list('name', 'price', 'quantity'))
+
+
+# тесты для таблицы блюд OrderItem
+
+# тест на запись блюд при создании заказа
+@pytest.mark.django_db
+def test_order_items_written_on_create():
+    order = create_order([{'name': 'Пицца', 'price': 300}, {'name': 'Чай', 'price': 50}, {'name': 'Пицца', 'price': 300}])
+    assert stored_items(order) == [('Пицца', Decimal('300.00'), 2), ('Чай', Decimal('50.00'), 1)]
+
+
+# тест на пересоздание блюд при изменении заказа через API
+@pytest.mark.django_db
+def test_order_items_follow_api_update(client):
+    order = create_order([{'name': 'Pizza', 'price': 300}])
+    client.patch(
+        reverse('order-detail', args=[order.id]),
+        data={'items': [{'name': 'Burger', 'price': 500}]},
+        content_type='application/json',
+    )
+    assert stored_items(order) == [('Burger', Decimal('500.00'), 1)]
+    client.patch(reverse('order-detail', args=[order.id]), data={'status': 'ready'}, content_type='application/json')
+    assert stored_items(order) == [('Burger', Decimal('500.00'), 1)]
+
+
+# тест на запись блюд при создании заказа через HTML-форму
+@pytest.mark.django_db
+def test_order_items_follow_form_create(client):
+    client.post(reverse('create_order'), {
+        'table_number': 2,
+        'status': 'waiting',
+        'dish_name': ['Суп', 'Хлеб'],
+        'dish_price': ['250', '30.5'],
+    })
+    order = Order.objects.get()
+    assert stored_items(order) == [('Суп', Decimal('250.00'), 1), ('Хлеб', Decimal('30.50'), 1)]
+
+
+# тест на запись блюд при пакетном создании и удаление вместе с заказом
+@pytest.mark.django_db
+def test_order_items_follow_bulk_create_and_delete():
+    orders = Order.objects.bulk_create([
+        Order(table_number=1, items=[{'name': 'Pizza', 'price': 300}], status='waiting'),
+        Order(table_number=2, items=[{'name': 'Tea', 'price': 50}, {'name': 'Cake', 'price': 150}], status='paid'),
+    ])
+    assert OrderItem.objects.count() == 3
+    Order.objects.filter(pk=orders[1].pk).delete()
+    assert list(OrderItem.objects.values_list('name', flat=True)) == ['Pizza']
+
+
+# тест на топ блюд и выручку по блюдам
+@pytest.mark.django_db
+def test_dish_analytics_endpoints(client):
+    create_order([{'name': 'Pizza', 'price': 300}, {'name': 'Pizza', 'price': 300}], order_status='paid')
+    create_order([{'name': 'Tea', 'price': 50}, {'name': 'Pizza', 'price': 300}], order_status='paid')
+    create_order([{'name': 'Tea', 'price': 50}] * 5)
+
+    response = client.get(reverse('order-top-dishes'), {'limit': 1})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == [{'name': 'Tea', 'quantity': 6, 'revenue': '300.00'}]
+
+    response = client.get(reverse('order-top-dishes'), {'status': 'paid'})
+    assert [dish['name'] for dish in response.data] == ['Pizza', 'Tea']
+
+    response = client.get(reverse('order-dish-revenue'))
+    assert response.data == [
+        {'name': 'Pizza', 'quantity': 3, 'revenue': '900.00'},
+        {'name': 'Tea', 'quantity': 1, 'revenue': '50.00'},
+    ]
@@ -0,0 +1,90 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from ..models import Order
+
+
+def create_orders(count, **kwargs):
+    return [
+        Order.objects.create(
+            table_number=kwargs.get('table_number', i % 3 + 1),
+            items=[{'name': 'Pizza', 'price': 300}],
+            status=kwargs.get('status', 'waiting'),
+        )
+        for i in range(count)
+    ]
+
+
+# тесты для keyset-пагинации
+
+# тест на обход всех страниц API по курсору
+@pytest.mark.django_db
+def test_api_cursor_pagination_walks_all_orders(client):
+    orders = create_orders(5)
+    url = reverse('order-list') + '?page_size=2'
+    seen = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert 'count' not in response.data  # COUNT(*) по умолчанию не выполняется
+        seen.extend(order['id'] for order in response.data['results'])
+        url = response.data['next']
+    assert seen == sorted((order.id for order in orders), reverse=True)  # от новых к старым, без повторов
+
+
+# тест на пагинацию отфильтрованной выборки
+@pytest.mark.django_db
+def test_api_cursor_pagination_with_filters(client):
+    create_orders(4, table_number=7, status='paid')
+    create_orders(3, table_number=7, status='waiting')
+    response = client.get(reverse('order-list'), {'table_number': 7, 'status': 'paid', 'page_size': 3})
+    assert len(response.data['results']) == 3
+    assert all(order['status'] == 'paid' for order in response.data['results'])
+    response = client.get(response.data['next'])
+    assert len(response.data['results']) == 1
+    assert response.data['next'] is None
+
+
+# тест на оценочное количество заказов по запросу
+@pytest.mark.django_db
+def test_api_cursor_pagination_optional_count(client):
+    create_orders(3)
+    response = client.get(reverse('order-list'), {'with_count': 1})
+    assert isinstance(response.data['count'], int)
+
+
+# тест на постраничный вывод HTML-списка заказов
+@pytest.mark.django_db
+def test_list_order_page(client):
+    orders = create_orders(3)
+    response = client.get(reverse('list_order'), {'page_size': 2})
+    assert response.status_code == 200
+    assert [pk for pk, _ in response.context['orders']] == [orders[2].id, orders[1].id]
+    assert response.context['next_page'] is not None
+    response = client.get(response.context['next_page'])
+    assert [pk for pk, _ in response.context['orders']] == [orders[0].id]
+    assert response.context['next_page'] is None
+
+
+# тест на постраничный вывод результатов поиска
+@pytest.mark.django_db
+def test_search_order_page(client):
+    create_orders(3, table_number=2)
+    create_orders(2, table_number=5)
+    response = client.get(reverse('order_search'), {'table_number': 2, 'page_size': 2})
+    assert len(response.context['orders']) == 2
+    assert set(Order.objects.filter(pk__in=dict(response.context['orders'])).values_list('table_number', flat=True)) == {2}
+    response = client.get(response.context['next_page'])
+    assert len(response.context['orders']) == 1
+
+
+# тест на 404 для некорректного курсора в HTML-списке и поиске
+@pytest.mark.django_db
+@pytest.mark.parametrize('url_name, params', [
+    ('list_order', {}),
+    ('order_search', {'table_number': 2}),
+])
+def test_html_pages_invalid_cursor(client, url_name, params):
+    create_orders(2, table_number=2)
+    response = client.get(reverse(url_name), {**params, 'cursor': 'garbage'})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
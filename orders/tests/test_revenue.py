@@ -0,0 +1,108 @@
+import pytest
+from decimal import Decimal
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import Order, RevenueTotal
+from ..utils import calculate_total_revenue, delete_order_from_db
+
+
+def create_order(status='waiting', price=300):
+    return Order.objects.create(table_number=1, items=[{'name': 'Pizza', 'price': price}], status=status)
+
+
+def assert_revenue_matches_orders():
+    assert RevenueTotal.objects.current() == Order.objects.paid_revenue()
+
+
+# тесты для накопительного итога выручки
+
+# тест на учет заказа при переходе в статус paid и выходе из него
+@pytest.mark.django_db
+def test_revenue_follows_status_changes():
+    order = create_order()
+    assert calculate_total_revenue() == 0
+    order.status = 'paid'
+    order.save()
+    assert calculate_total_revenue() == Decimal('300.00')
+    order.status = 'ready'
+    order.save()
+    assert calculate_total_revenue() == 0
+    assert_revenue_matches_orders()
+
+
+# тест на пересчет при изменении суммы оплаченного заказа
+@pytest.mark.django_db
+def test_revenue_follows_paid_total_changes():
+    order = create_order(status='paid', price=10.99)
+    create_order(status='paid', price=15.99)
+    assert calculate_total_revenue() == Decimal('26.98')
+    order.items = [{'name': 'Pizza', 'price': 20}]
+    order.total_price = 20
+    order.save()
+    assert calculate_total_revenue() == Decimal('35.99')
+    assert_revenue_matches_orders()
+
+
+# тест на учет изменений через API и удаления заказа
+@pytest.mark.django_db
+def test_revenue_follows_api_update_and_delete(client):
+    order = create_order()
+    url = reverse('order-detail', args=[order.id])
+    client.patch(url, data={'status': 'paid'}, content_type='application/json')
+    response = client.get(reverse('order-revenue'))
+    assert Decimal(response.data['total_revenue']) == Decimal('300.00')
+    client.patch(url, data={'items': [{'name': 'Pizza', 'price': 450}]}, content_type='application/json')
+    assert calculate_total_revenue() == Decimal('450.00')
+    delete_order_from_db(Order.objects.get(pk=order.pk))
+    assert calculate_total_revenue() == 0
+    assert_revenue_matches_orders()
+
+
+# тест на учет изменений через HTML-форму редактирования
+@pytest.mark.django_db
+def test_revenue_follows_form_edit(client):
+    order = create_order()
+    client.post(reverse('update_order', args=[order.id]), {
+        'table_number': 1,
+        'status': 'paid',
+        'dish_name': ['Pizza', 'Salad'],
+        'dish_price': ['300', '150'],
+    })
+    assert calculate_total_revenue() == Decimal('450.00')
+    assert_revenue_matches_orders()
+
+
+# тест на удаление выборки заказов
+@pytest.mark.django_db
+def test_revenue_follows_queryset_delete():
+    create_order(status='paid')
+    create_order(status='paid', price=100)
+    create_order(status='waiting')
+    Order.objects.filter(items__0__price=300).delete()
+    assert calculate_total_revenue() == Decimal('100.00')
+    assert_revenue_matches_orders()
+
+
+# тест на чтение выручки одним запросом без агрегата
+@pytest.mark.django_db
+def test_revenue_read_is_single_row_lookup():
+    create_order(status='paid')
+    with CaptureQueriesContext(connection) as queries:
+        calculate_total_revenue()
+    assert len(queries) == 1
+    assert 'SUM' not in queries[0]['sql'].upper()
+
+
+# тест на пересчет и сверку итога командой rebuild_revenue
+@pytest.mark.django_db
+def test_rebuild_revenue_command():
+    create_order(status='paid')
+    RevenueTotal.objects.update(total_revenue=1)  # искусственное расхождение
+    with pytest.raises(CommandError):
+        call_command('rebuild_revenue', '--check')
+    call_command('rebuild_revenue')
+    call_command('rebuild_revenue', '--check')
+    assert calculate_total_revenue() == Decimal('300.00')
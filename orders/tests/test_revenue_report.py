@@ -0,0 +1,118 @@
+from datetime import timedelta
+from decimal import Decimal
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from ..models import Order, RevenueRollup
+from .factories import create_order
+from ..utils import calculate_total_revenue, get_revenue_report
+
+
+@pytest.fixture
+def day():
+    """ Начало дня двое суток назад: все его часы уже закрыты. """
+    return (timezone.now() - timedelta(days=2)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+@pytest.fixture
+def paid_orders(day):
+    """ Оплаченные заказы с известным временем оплаты в прошедших часах. """
+    moments = [(10, 15, 100), (10, 45, 200), (11, 30, 300), (33, 0, 400)]
+    return Order.objects.bulk_create([
+        Order(table_number=1, items=[{'name': 'Soup', 'price': price}], status='paid',
+              paid_at=day + timedelta(hours=hour, minutes=minute))
+        for hour, minute, price in moments
+    ])
+
+
+def report(start, end, bucket):
+    return [(row['period'], row['order_count'], row['total_revenue']) for row in get_revenue_report(start, end, bucket)]
+
+
+# тесты для времени оплаты и отчета по выручке
+
+# тест на время оплаты при смене статуса
+@pytest.mark.django_db
+def test_paid_at_follows_status():
+    order = create_order()
+    assert order.created_at is not None and order.paid_at is None
+    order.status = 'paid'
+    order.save()
+    paid_at = order.paid_at
+    assert paid_at is not None
+
+    order.table_number = 2
+    order.save()
+    assert Order.objects.get(pk=order.pk).paid_at == paid_at
+
+    Order.objects.filter(pk=order.pk).set_status('waiting')
+    assert Order.objects.get(pk=order.pk).paid_at is None
+    Order.objects.filter(pk=order.pk).set_status('paid')
+    assert Order.objects.get(pk=order.pk).paid_at is not None
+
+
+# тест на отчет по дням и часам без часовых итогов
+@pytest.mark.django_db
+def test_revenue_report_buckets(day, paid_orders):
+    create_order(status='waiting')
+    assert report(day, day + timedelta(days=2), 'day') == [
+        (day, 3, Decimal('600.00')),
+        (day + timedelta(days=1), 1, Decimal('400.00')),
+    ]
+    assert report(day + timedelta(hours=10, minutes=30), day + timedelta(hours=12), 'hour') == [
+        (day + timedelta(hours=10), 1, Decimal('200.00')),
+        (day + timedelta(hours=11), 1, Decimal('300.00')),
+    ]
+    assert calculate_total_revenue(day, day + timedelta(hours=11)) == Decimal('300.00')
+
+
+# тест на чтение закрытых часов из часовых итогов и их пересчет после изменения заказа
+@pytest.mark.django_db
+def test_revenue_rollup(day, paid_orders):
+    assert RevenueRollup.objects.refresh() > 0
+    assert RevenueRollup.objects.refresh() == 0
+    rollup = RevenueRollup.objects.get(hour=day + timedelta(hours=10))
+    assert (rollup.order_count, rollup.total_revenue, rollup.stale) == (2, Decimal('300.00'), False)
+    assert RevenueRollup.objects.get(hour=day + timedelta(hours=12)).order_count == 0
+    before = report(day, day + timedelta(days=2), 'day')
+
+    # отчет читает закрытые часы из итогов, а не из заказов
+    RevenueRollup.objects.filter(hour=day + timedelta(hours=11)).update(total_revenue=Decimal('999.00'))
+    assert report(day, day + timedelta(days=1), 'day') == [(day, 3, Decimal('1299.00'))]
+
+    # изменение заказа за прошедший час помечает итог устаревшим, и он считается по заказам
+    order = paid_orders[2]
+    order.status = 'ready'
+    order.save()
+    assert RevenueRollup.objects.get(hour=day + timedelta(hours=11)).stale
+    assert report(day, day + timedelta(days=1), 'day') == [(day, 2, Decimal('300.00'))]
+    assert RevenueRollup.objects.refresh() == 1
+    assert RevenueRollup.objects.get(hour=day + timedelta(hours=11)).order_count == 0
+
+    # массовые операции тоже помечают затронутые часы
+    Order.objects.filter(pk=paid_orders[3].pk).delete()
+    assert RevenueRollup.objects.get(hour=day + timedelta(hours=33)).stale
+    assert report(day, day + timedelta(days=2), 'day') == [before[0][:1] + (2, Decimal('300.00'))]
+
+
+# тест на API отчета по выручке
+@pytest.mark.django_db
+def test_revenue_report_api(client, day, paid_orders):
+    url = reverse('order-revenue-report')
+    response = client.get(url, {'start': day.isoformat(), 'end': (day + timedelta(days=2)).isoformat()})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['order_count'] == 4
+    assert response.data['total_revenue'] == '1000.00'
+    assert [row['total_revenue'] for row in response.data['results']] == ['600.00', '400.00']
+
+    # по умолчанию - текущий день
+    create_order(status='paid')
+    response = client.get(url, {'bucket': 'hour'})
+    assert response.data['order_count'] == 1
+
+    assert client.get(url, {'bucket': 'month'}).status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get(url, {'start': day.isoformat(), 'end': day.isoformat()}).status_code == \
+        status.HTTP_400_BAD_REQUEST
+    assert client.get(url, {'start': day.isoformat(), 'end': (day + timedelta(days=40)).isoformat(),
+                            'bucket': 'hour'}).status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,86 @@
+import pytest
+from django.db import connections, router, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import Order
+from .factories import create_order
+from ..routers import STICKY_COOKIE_NAME, primary_pinned, replica_reads
+
+# Реплика в тестах зеркалирует тестовую базу, а чтение с нее возможно только вне общей транзакции
+pytestmark = pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+
+
+def count_queries(client_call):
+    with CaptureQueriesContext(connections['default']) as primary, \
+            CaptureQueriesContext(connections['replica']) as replica:
+        response = client_call()
+    return response, len(primary), len(replica)
+
+
+# тесты для чтения с реплик
+
+# тест на выбор базы роутером
+def test_router_choice():
+    assert router.db_for_read(Order) == 'default'
+    with replica_reads():
+        assert router.db_for_read(Order) == 'replica'
+        with primary_pinned():
+            assert router.db_for_read(Order) == 'default'
+        with transaction.atomic():
+            assert router.db_for_read(Order) == 'default'
+        assert router.db_for_write(Order) == 'default'
+
+
+# тест на сохранение заказа, прочитанного с реплики, в основную базу
+def test_replica_object_saved_to_primary():
+    order = create_order()
+    with replica_reads():
+        replica_order = Order.objects.get(pk=order.pk)
+    assert replica_order._state.db == 'replica'
+    replica_order.status = 'ready'
+    replica_order.save()
+    assert Order.objects.get(pk=order.pk).status == 'ready'
+
+
+# тест на чтение списка, поиска, выручки и выгрузки с реплики
+@pytest.mark.parametrize('url_name, params', [
+    ('list_order', {}),
+    ('order_search', {'status': 'waiting'}),
+    ('calculate_revenue', {}),
+    ('order-list', {}),
+    ('order-revenue', {}),
+    ('order-export', {'fmt': 'ndjson'}),
+    ('async_order_list', {}),
+])
+def test_reads_go_to_replica(client, url_name, params):
+    create_order()
+
+    def get():
+        response = client.get(reverse(url_name), params)
+        if response.streaming:
+            # строки выгрузки читаются уже после выхода из представления
+            b''.join(response.streaming_content)
+        return response
+
+    response, primary, replica = count_queries(get)
+    assert response.status_code == 200
+    assert primary == 0
+    assert replica > 0
+
+
+# тест на чтение своих изменений после создания заказа (read-your-writes)
+def test_read_your_writes_after_post(client):
+    response = client.post(reverse('create_order'), {
+        'table_number': 7, 'status': 'waiting', 'dish_name': ['Паста'], 'dish_price': [500],
+    })
+    assert response.status_code == 302
+    assert STICKY_COOKIE_NAME in response.cookies
+
+    response, primary, replica = count_queries(lambda: client.get(reverse('list_order')))
+    assert replica == 0 and primary > 0
+    assert list(Order.objects.filter(pk__in=dict(response.context['orders'])).values_list('table_number', flat=True)) == [7]
+
+    # без cookie чтение снова идет с реплики
+    client.cookies.pop(STICKY_COOKIE_NAME)
+    _, primary, replica = count_queries(lambda: client.get(reverse('order_search'), {'table_number': 7}))
+    assert primary == 0 and replica > 0
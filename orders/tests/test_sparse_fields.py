@@ -0,0 +1,112 @@
+import json
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from ..models import Order
+from ..serializers import OrderSerializer, ORDER_SUMMARY_FIELDS
+
+
+@pytest.fixture
+def orders():
+    return [
+        Order.objects.create(table_number=table_number, items=[{'name': 'Суп', 'price': 100 * table_number}])
+        for table_number in (1, 2, 3)
+    ]
+
+
+def get_with_queries(client, url, params=None):
+    """ Выполняет запрос и возвращает ответ и SQL-запросы к заказам на всех базах. """
+    with CaptureQueriesContext(connections['default']) as primary, \
+            CaptureQueriesContext(connections['replica']) as replica:
+        response = client.get(url, params)
+    queries = [query['sql'] for query in [*primary.captured_queries, *replica.captured_queries]
+               if 'orders_order' in query['sql']]
+    return response, queries
+
+
+# тесты для выбора полей и получения нескольких заказов в API
+
+# тест на ограничение полей списка: items не читается из базы
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_list_fields_are_selected_in_sql(client, orders):
+    response, queries = get_with_queries(client, reverse('order-list'), {'fields': 'status,table_number'})
+    assert response.status_code == status.HTTP_200_OK
+    results = json.loads(response.content)['results']
+    assert [list(row) for row in results] == [['id', 'table_number', 'status']] * 3
+    assert queries and all('"items"' not in sql for sql in queries)
+
+
+# тест на исключение полей и сокращенный набор полей
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_exclude_and_summary_projection(client, orders):
+    response, queries = get_with_queries(client, reverse('order-list'), {'exclude': 'items'})
+    row = json.loads(response.content)['results'][0]
+    assert list(row) == [field for field in OrderSerializer.Meta.fields if field != 'items']
+    assert row['total_price'] == OrderSerializer(orders[2]).data['total_price']
+    assert all('"items"' not in sql for sql in queries)
+
+    response = client.get(reverse('order-list'), {'projection': 'summary'})
+    assert list(json.loads(response.content)['results'][0]) == ORDER_SUMMARY_FIELDS
+
+    response = client.get(reverse('order-detail', args=[orders[0].pk]), {'projection': 'summary'})
+    assert json.loads(response.content) == {
+        field: value for field, value in OrderSerializer(orders[0]).data.items() if field in ORDER_SUMMARY_FIELDS
+    }
+
+
+# тест на ограничение полей одного заказа
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_detail_fields(client, orders):
+    url = reverse('order-detail', args=[orders[1].pk])
+    response, queries = get_with_queries(client, url, {'fields': 'total_price'})
+    assert json.loads(response.content) == {'id': orders[1].pk, 'total_price': '200.00'}
+    assert all('"items"' not in sql for sql in queries)
+    # без параметров ответ прежний
+    assert json.loads(client.get(url).content) == OrderSerializer(orders[1]).data
+
+
+# тест на ошибки в параметрах полей
+@pytest.mark.django_db(databases=['default', 'replica'])
+@pytest.mark.parametrize('params', [
+    {'fields': 'status,secret'},
+    {'exclude': 'id'},
+    {'fields': 'status', 'exclude': 'items'},
+    {'projection': 'tiny'},
+])
+def test_invalid_field_params(client, orders, params):
+    assert client.get(reverse('order-list'), params).status_code == status.HTTP_400_BAD_REQUEST
+    url = reverse('order-detail', args=[orders[0].pk])
+    assert client.get(url, params).status_code == status.HTTP_400_BAD_REQUEST
+
+
+# тест на получение нескольких заказов одним запросом в порядке ids
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_multi_get(client, orders):
+    ids = f'{orders[2].pk},{orders[0].pk},999999,{orders[2].pk}'
+    response, queries = get_with_queries(client, reverse('order-list'), {'ids': ids, 'fields': 'status'})
+    assert response.status_code == status.HTTP_200_OK
+    assert json.loads(response.content) == {
+        'results': [{'id': orders[2].pk, 'status': 'waiting'}, {'id': orders[0].pk, 'status': 'waiting'}],
+        'missing': [999999],
+    }
+    # один запрос для ETag и один запрос IN за данными
+    data_queries = [sql for sql in queries if '"status"' in sql]
+    assert len(data_queries) == 1 and ' IN ' in data_queries[0]
+
+    # фильтры списка применяются и к ids
+    response = client.get(reverse('order-list'), {'ids': ids, 'table_number': orders[0].table_number})
+    assert [row['id'] for row in json.loads(response.content)['results']] == [orders[0].pk]
+
+    etag = response.headers['ETag']
+    response = client.get(reverse('order-list'), {'ids': ids, 'table_number': orders[0].table_number},
+                          HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+# тест на ошибки в параметре ids
+@pytest.mark.django_db(databases=['default', 'replica'])
+@pytest.mark.parametrize('ids', ['', '1,abc', '0', '-1', '²'])
+def test_invalid_ids(client, ids):
+    assert client.get(reverse('order-list'), {'ids': ids}).status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,74 @@
+import pytest
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import Order
+
+
+def create_orders(count, **kwargs):
+    return [
+        Order.objects.create(table_number=kwargs.get('table_number', i + 1), items=[{'name': 'Pizza', 'price': 300}],
+                             status=kwargs.get('status', 'waiting'))
+        for i in range(count)
+    ]
+
+
+def read(response):
+    """ Дочитывает потоковый ответ и возвращает запросы к базам, выполненные во время чтения. """
+    with CaptureQueriesContext(connections['default']) as primary, \
+            CaptureQueriesContext(connections['replica']) as replica:
+        content = b''.join(response.streaming_content).decode()
+    return content, [query['sql'] for query in [*primary, *replica]]
+
+
+# тесты для потоковой отрисовки HTML-страниц заказов
+
+# тест на потоковую отрисовку списка пачками с чтением только показываемых колонок
+@pytest.mark.django_db(databases=['default', 'replica'])
+@override_settings(ORDERS_HTML_CHUNK_SIZE=2)
+def test_list_page_streams_rows_in_chunks(client):
+    orders = create_orders(5)
+    response = client.get(reverse('list_order'))
+    assert response.streaming
+    assert response['Content-Type'] == 'text/html; charset=utf-8'
+
+    content, queries = read(response)
+    assert len(queries) == 3
+    assert all('"items"' not in sql for sql in queries)
+    assert content.startswith('<h1>Список заказов</h1>')
+    positions = [content.index(f'Заказ {order.id} - Столик {order.table_number} - Сумма 300.00') for order in orders]
+    assert positions == sorted(positions, reverse=True)
+    assert content.count(reverse('update_order', args=[orders[0].id])) == 1
+    assert content.rstrip().endswith('</ul>')
+
+
+# тест на повторную отрисовку только измененных строк (строки кэшируются после фиксации изменений)
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_only_changed_rows_are_rendered_again(client):
+    orders = create_orders(4)
+    read(client.get(reverse('list_order')))
+
+    content, queries = read(client.get(reverse('list_order')))
+    assert queries == []
+
+    orders[1].table_number = 42
+    orders[1].save()
+    content, queries = read(client.get(reverse('list_order')))
+    assert len(queries) == 1
+    assert queries[0].endswith(f'IN ({orders[1].id})')
+    assert f'Заказ {orders[1].id} - Столик 42' in content
+    assert f'Заказ {orders[2].id} - Столик 3' in content
+
+
+# тест на потоковую отрисовку результатов поиска и пустой результат
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_search_page_streams_rows(client):
+    create_orders(2, table_number=5, status='ready')
+    content, _ = read(client.get(reverse('order_search'), {'table_number': 5}))
+    assert content.count('<td>готово</td>') == 2
+    assert '</tbody>' in content
+
+    content, queries = read(client.get(reverse('order_search'), {'table_number': 6}))
+    assert 'Заказы не найдены.' in content
+    assert queries == []
@@ -0,0 +1,128 @@
+from decimal import Decimal
+import pytest
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from rest_framework import status
+from ..models import Order, TableTab
+
+
+def tab_of(table_number):
+    return TableTab.objects.filter(table_number=table_number).values(
+        'open_count', 'waiting_count', 'ready_count', 'outstanding'
+    ).first()
+
+
+def assert_matches_full_aggregate():
+    expected = {tab.table_number: (tab.open_count, tab.outstanding)
+                for tab in TableTab.objects.compute(Order.objects.all())}
+    assert dict((tab.table_number, (tab.open_count, tab.outstanding)) for tab in TableTab.objects.all()) == expected
+
+
+# тесты для открытых счетов столов
+
+# тест на счет стола при создании, изменении статуса и оплате заказов
+@pytest.mark.django_db
+def test_tab_follows_order_saves():
+    first = Order.objects.create(table_number=1, items=[{'name': 'Soup', 'price': 100}])
+    second = Order.objects.create(table_number=1, items=[{'name': 'Tea', 'price': 50}])
+    assert tab_of(1) == {'open_count': 2, 'waiting_count': 2, 'ready_count': 0, 'outstanding': Decimal('150.00')}
+    assert TableTab.objects.get(table_number=1).oldest_waiting_at == first.created_at
+
+    first.status = 'ready'
+    first.save()
+    assert tab_of(1) == {'open_count': 2, 'waiting_count': 1, 'ready_count': 1, 'outstanding': Decimal('150.00')}
+    assert TableTab.objects.get(table_number=1).oldest_waiting_at == second.created_at
+
+    first.status = 'paid'
+    first.save()
+    second.status = 'paid'
+    second.save()
+    assert tab_of(1) is None
+
+
+# тест на перенос заказа на другой стол
+@pytest.mark.django_db
+def test_tab_follows_table_move():
+    order = Order.objects.create(table_number=1, items=[{'name': 'Soup', 'price': 100}])
+    order.table_number = 2
+    order.save()
+
+    assert tab_of(1) is None
+    assert tab_of(2)['outstanding'] == Decimal('100.00')
+
+
+# тест на массовые изменения, удаление и bulk_create
+@pytest.mark.django_db
+def test_tab_follows_bulk_changes():
+    Order.objects.bulk_create([
+        Order(table_number=1, items=[{'name': 'Soup', 'price': 100}]),
+        Order(table_number=2, items=[{'name': 'Pizza', 'price': 200}], status='ready'),
+        Order(table_number=3, items=[{'name': 'Cake', 'price': 70}], status='paid'),
+    ])
+    assert set(TableTab.objects.values_list('table_number', flat=True)) == {1, 2}
+
+    Order.objects.filter(table_number=1).update(table_number=3)
+    assert set(TableTab.objects.values_list('table_number', flat=True)) == {2, 3}
+
+    Order.objects.filter(table_number=2).update(status='paid')
+    assert set(TableTab.objects.values_list('table_number', flat=True)) == {3}
+
+    Order.objects.filter(table_number=3, status='waiting').delete()
+    assert not TableTab.objects.exists()
+
+
+# тест на удаление неоплаченного заказа
+@pytest.mark.django_db
+def test_tab_follows_order_delete():
+    order = Order.objects.create(table_number=1, items=[{'name': 'Soup', 'price': 100}])
+    Order.objects.create(table_number=1, items=[{'name': 'Tea', 'price': 50}])
+    order.delete()
+
+    assert tab_of(1) == {'open_count': 1, 'waiting_count': 1, 'ready_count': 0, 'outstanding': Decimal('50.00')}
+    assert_matches_full_aggregate()
+
+
+# тест на пересчет и сверку счетов командой rebuild_table_tabs
+@pytest.mark.django_db
+def test_rebuild_table_tabs_command():
+    Order.objects.create(table_number=1, items=[{'name': 'Soup', 'price': 100}])
+    Order.objects.create(table_number=2, items=[{'name': 'Tea', 'price': 50}], status='ready')
+    call_command('rebuild_table_tabs', check=True)
+
+    TableTab.objects.filter(table_number=1).update(outstanding=0)
+    TableTab.objects.filter(table_number=2).delete()
+    with pytest.raises(CommandError, match='1, 2'):
+        call_command('rebuild_table_tabs', check=True)
+
+    call_command('rebuild_table_tabs')
+    assert_matches_full_aggregate()
+    call_command('rebuild_table_tabs', check=True)
+
+
+# тест на получение счетов столов через API
+@pytest.mark.django_db
+def test_table_tabs_api(client):
+    Order.objects.create(table_number=2, items=[{'name': 'Soup', 'price': 100}])
+    Order.objects.create(table_number=1, items=[{'name': 'Tea', 'price': 50}], status='ready')
+
+    response = client.get(reverse('table-tab-list'))
+    assert response.status_code == status.HTTP_200_OK
+    assert [tab['table_number'] for tab in response.data] == [1, 2]
+    assert response.data[0]['ready_count'] == 1
+    assert response.data[0]['oldest_waiting_at'] is None
+
+    response = client.get(reverse('table-tab-detail', args=[2]))
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['outstanding'] == '100.00'
+    assert client.get(reverse('table-tab-detail', args=[3])).status_code == status.HTTP_404_NOT_FOUND
+
+
+# тест на страницу открытых счетов
+@pytest.mark.django_db
+def test_table_board_view(client):
+    Order.objects.create(table_number=7, items=[{'name': 'Soup', 'price': 100}])
+
+    response = client.get(reverse('table_board'))
+    assert response.status_code == 200
+    assert [tab.table_number for tab in response.context['tabs']] == [7]
+    assert 'Открытые счета' in b''.join(client.get(reverse('list_order')).streaming_content).decode()
@@ -0,0 +1,134 @@
+import pytest
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from rest_framework import status
+from .. import validation
+from ..forms import OrderForm
+from ..models import Order
+from ..validation import NAME_EMPTY, NAME_TOO_LONG, PRICE_NOT_NUMBER, PRICE_NOT_POSITIVE, check_items, validate_orders
+
+
+@pytest.fixture
+def checked_items(monkeypatch):
+    """ Считает проверки отдельных блюд. """
+    calls = []
+    item_is_valid = validation._item_is_valid
+
+    def counting(item):
+        calls.append(item)
+        return item_is_valid(item)
+
+    monkeypatch.setattr(validation, '_item_is_valid', counting)
+    return calls
+
+
+# тесты для общих правил проверки заказов
+
+# тест на структурированные ошибки по каждому блюду
+def test_check_items_errors():
+    assert check_items([{'name': 'Soup', 'price': 100}, {'name': 'Tea', 'price': 0.5}]) == []
+    assert check_items([]) == ["Поле 'items' не может быть пустым."]
+    assert check_items(None) == ["Поле 'items' не может быть пустым."]
+    assert check_items([{'name': 'Soup', 'price': 100}, {'name': ' ', 'price': 0}, {'name': 'Tea', 'price': '10'},
+                        'Cake']) == {
+        1: {'name': [NAME_EMPTY], 'price': [PRICE_NOT_POSITIVE]},
+        2: {'price': [PRICE_NOT_NUMBER]},
+        3: {'non_field_errors': ['Блюдо должно быть объектом с полями name и price.']},
+    }
+
+
+# тест на проверку пачки заказов за один проход
+def test_validate_orders():
+    errors = validate_orders([
+        {'table_number': 1, 'status': 'waiting', 'items': [{'name': 'Soup', 'price': 100}]},
+        {'table_number': 0, 'status': 'waiting', 'items': [{'name': 'Soup', 'price': -1}]},
+        {'table_number': 2, 'status': 'done', 'items': []},
+    ], statuses=dict(Order.STATUS_CHOICES))
+    assert errors == [
+        {},
+        {'table_number': ['Номер стола не может быть меньше 1'], 'items': {0: {'price': [PRICE_NOT_POSITIVE]}}},
+        {'status': ['Некорректный статус: done.'], 'items': ["Поле 'items' не может быть пустым."]},
+    ]
+
+
+# тест на ошибки блюд в API и в форме
+@pytest.mark.django_db
+def test_item_errors_in_api_and_form(client):
+    response = client.post(reverse('order-list'), {
+        'table_number': 1, 'status': 'waiting', 'total_price': 1,
+        'items': [{'name': 'Soup', 'price': 100}, {'name': '', 'price': -5}],
+    }, content_type='application/json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {'items': {'1': {'name': [NAME_EMPTY], 'price': [PRICE_NOT_POSITIVE]}}}
+
+    form = OrderForm(data={'table_number': 1, 'status': 'waiting', 'dish_name': ['Soup', 'Tea', ' '],
+                           'dish_price': ['abc', '0', '10']})
+    assert not form.is_valid()
+    assert form.errors['dish_price'] == [PRICE_NOT_NUMBER, PRICE_NOT_POSITIVE]
+    assert form.errors['dish_name'] == [NAME_EMPTY]
+
+    # Order.clean проверяет блюда, заданные напрямую
+    with pytest.raises(ValidationError):
+        Order.objects.create(table_number=1, items=[{'name': 'Soup', 'price': 0}])
+
+
+# тест на ограничение длины названия блюда во всех точках входа
+@pytest.mark.django_db
+def test_dish_name_length(client):
+    long_name = 'Суп' * 100
+    response = client.post(reverse('order-list'), {
+        'table_number': 1, 'status': 'waiting', 'total_price': 1, 'items': [{'name': long_name, 'price': 100}],
+    }, content_type='application/json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {'items': {'0': {'name': [NAME_TOO_LONG]}}}
+
+    form = OrderForm(data={'table_number': 1, 'status': 'waiting', 'dish_name': [long_name], 'dish_price': ['10']})
+    assert not form.is_valid()
+    assert form.errors['dish_name'] == [NAME_TOO_LONG]
+    assert validate_orders([{'table_number': 1, 'status': 'waiting', 'items': [{'name': long_name, 'price': 1}]}],
+                           ['waiting']) == [{'items': {0: {'name': [NAME_TOO_LONG]}}}]
+
+    # название на границе длины сохраняется, даже если нормализованное для поиска длиннее
+    order = Order.objects.create(table_number=1, items=[{'name': 'ß' * 255, 'price': 100}])
+    assert order.order_items.get().name == 'ß' * 255
+    # то же при загрузке через COPY в импорте
+    [order] = Order.objects.copy_create([Order(table_number=1, items=[{'name': 'ß' * 255, 'price': 100}])])
+    assert order.order_items.get().search_name == 'ss' * 127 + 's'
+
+
+# тест на однократную проверку каждого блюда в API, асинхронном API, форме и пакетном создании
+@pytest.mark.django_db
+def test_items_are_checked_once(client, checked_items):
+    items = [{'name': 'Soup', 'price': 100}, {'name': 'Tea', 'price': 50}]
+    response = client.post(reverse('order-list'), {'table_number': 1, 'status': 'waiting', 'items': items,
+                                                   'total_price': 150}, content_type='application/json')
+    assert response.status_code == status.HTTP_201_CREATED
+    assert len(checked_items) == 2
+
+    response = client.patch(reverse('order-detail', args=[response.json()['id']]),
+                            {'items': items[:1]}, content_type='application/json')
+    assert response.status_code == status.HTTP_200_OK
+    assert len(checked_items) == 3
+
+    response = client.post(reverse('async_order_list'), {'table_number': 1, 'status': 'waiting', 'items': items,
+                                                         'total_price': 150}, content_type='application/json')
+    assert response.status_code == status.HTTP_201_CREATED
+    assert len(checked_items) == 5
+
+    response = client.post(reverse('create_order'), {'table_number': 2, 'status': 'waiting',
+                                                     'dish_name': ['Soup', 'Tea'], 'dish_price': ['100', '50']})
+    assert response.status_code == 302
+    assert len(checked_items) == 7
+
+    order = Order.objects.get(table_number=2)
+    response = client.post(reverse('update_order', args=[order.pk]), {
+        'table_number': 2, 'status': 'ready', 'dish_name': ['Soup'], 'dish_price': ['100'], 'version': order.version,
+    })
+    assert response.status_code == 302
+    assert len(checked_items) == 8
+
+    batch = [{'table_number': 3, 'status': 'waiting', 'items': items, 'total_price': 150}] * 3
+    response = client.post(reverse('order-batch'), batch, content_type='application/json')
+    assert response.status_code == status.HTTP_201_CREATED
+    assert len(checked_items) == 14
+    assert Order.objects.count() == 6
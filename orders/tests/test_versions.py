@@ -0,0 +1,121 @@
+from decimal import Decimal
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from ..models import Order, OrderVersionConflict, RevenueTotal
+from .factories import create_order
+
+
+def edit_data(version, table_number=2, dish_price=300):
+    data = {'table_number': table_number, 'status': 'paid', 'dish_name': ['Pizza'], 'dish_price': [dish_price]}
+    if version is not None:
+        data['version'] = version
+    return data
+
+
+# тесты для оптимистичной блокировки заказов
+
+# тест на конфликт при сохранении устаревшей копии заказа
+@pytest.mark.django_db
+def test_save_detects_lost_update():
+    order = create_order()
+    first, second = Order.objects.get(pk=order.pk), Order.objects.get(pk=order.pk)
+    first.expected_version = first.version
+    first.status = 'paid'
+    first.save()
+    assert first.version == 2 and first.expected_version is None
+
+    second.expected_version = second.version
+    second.table_number = 5
+    with pytest.raises(OrderVersionConflict) as conflict:
+        second.save()
+    assert (conflict.value.expected_version, conflict.value.current_version) == (1, 2)
+    stored = Order.objects.get(pk=order.pk)
+    assert (stored.table_number, stored.status, stored.version) == (1, 'paid', 2)
+    assert RevenueTotal.objects.current() == (1, Decimal('300.00'))
+
+    # без ожидаемой версии заказ сохраняется как раньше
+    second.expected_version = None
+    second.save()
+    assert Order.objects.get(pk=order.pk).table_number == 5
+
+
+# тест на конфликт при сохранении удаленного заказа
+@pytest.mark.django_db
+def test_save_deleted_order_conflict():
+    order = create_order()
+    stale = Order.objects.get(pk=order.pk)
+    order.delete()
+    stale.expected_version = stale.version
+    with pytest.raises(OrderVersionConflict) as conflict:
+        stale.save()
+    assert conflict.value.current_version is None
+    assert not Order.objects.exists()
+
+
+# тест на 409 при изменении через API с устаревшим If-Match
+@pytest.mark.django_db
+def test_api_update_if_match(client):
+    order = create_order()
+    url = reverse('order-detail', args=[order.id])
+    etag = client.get(url)['ETag']
+    payload = {'table_number': 2, 'items': [{'name': 'Soup', 'price': 100}], 'status': 'ready', 'total_price': 100}
+
+    response = client.put(url, data=payload, content_type='application/json', HTTP_IF_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['version'] == 2
+
+    response = client.patch(url, data={'status': 'paid'}, content_type='application/json', HTTP_IF_MATCH=etag)
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.json()['current']['table_number'] == 2
+    assert response.json()['current']['version'] == 2
+    assert Order.objects.get(pk=order.pk).status == 'ready'
+
+    response = client.patch(url, data={'status': 'paid'}, content_type='application/json', HTTP_IF_MATCH='"oops"')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = client.patch(url, data={'status': 'paid'}, content_type='application/json', HTTP_IF_MATCH='"5-²"')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # ETag другого заказа - условие не выполнено
+    response = client.patch(url, data={'status': 'paid'}, content_type='application/json',
+                            HTTP_IF_MATCH=f'"{order.id + 1}-2"')
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    assert Order.objects.get(pk=order.pk).status == 'ready'
+
+
+# тест на версию в теле запроса API
+@pytest.mark.django_db
+def test_api_update_body_version(client):
+    order = create_order()
+    url = reverse('order-detail', args=[order.id])
+    response = client.patch(url, data={'status': 'ready', 'version': 1}, content_type='application/json')
+    assert response.status_code == status.HTTP_200_OK
+    response = client.patch(url, data={'status': 'paid', 'version': 1}, content_type='application/json')
+    assert response.status_code == status.HTTP_409_CONFLICT
+    response = client.patch(url, data={'status': 'paid', 'version': '²'}, content_type='application/json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = client.patch(url, data={'status': 'paid'}, content_type='application/json')
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['version'] == 3
+
+
+# тест на ошибку формы с текущим состоянием заказа при конфликте в HTML-форме
+@pytest.mark.django_db
+def test_edit_form_conflict(client):
+    order = create_order()
+    url = reverse('update_order', args=[order.id])
+    assert 'name="version" value="1"' in client.get(url).content.decode()
+
+    assert client.post(url, edit_data(version=1, table_number=3)).status_code == 302
+    response = client.post(url, edit_data(version=1, table_number=4, dish_price=500))
+    assert response.status_code == status.HTTP_409_CONFLICT
+    content = response.content.decode()
+    assert 'Заказ изменен другим пользователем' in content
+    assert 'Текущее состояние заказа: стол 3' in content
+    assert 'name="version" value="2"' in content
+    assert Order.objects.get(pk=order.pk).table_number == 3
+
+    # повторная отправка с текущей версией сохраняет изменения
+    assert client.post(url, edit_data(version=2, table_number=4, dish_price=500)).status_code == 302
+    order = Order.objects.get(pk=order.pk)
+    assert (order.table_number, order.total_price, order.version) == (4, Decimal('500.00'), 3)
@@ -1,10 +1,12 @@
-from . import views
+from . import views, async_views
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import OrderViewSet
+from .views import OrderViewSet, ArchivedOrderViewSet, TableTabViewSet
 
 router = DefaultRouter()
 router.register(r'orders', OrderViewSet, basename='order')
+router.register(r'archive/orders', ArchivedOrderViewSet, basename='archived-order')
+router.register(r'tables', TableTabViewSet, basename='table-tab')
 
 urlpatterns = [
     path('', views.list_order, name='list_order'),
@@ -13,5 +15,11 @@ urlpatterns = [
     path('delete/<int:pk>/', views.delete_order, name='order_delete'),
     path('search/', views.search_order, name='order_search'),
     path('revenue/', views.calculate_revenue, name='calculate_revenue'),
+    path('tables/', views.table_board, name='table_board'),
     path('api/', include(router.urls)),
+    path('api/async/orders/', async_views.order_list, name='async_order_list'),
+    path('api/async/orders/search/', async_views.order_search, name='async_order_search'),
+    path('api/async/orders/events/', async_views.order_events, name='async_order_events'),
+    path('api/async/orders/revenue/', async_views.order_revenue, name='async_order_revenue'),
+    path('api/async/orders/<int:pk>/', async_views.order_detail, name='async_order_detail'),
 ]
@@ -1,49 +1,21 @@
 from django.core.exceptions import ValidationError
-from django.http import HttpResponseRedirect, HttpRequest
+from django.http import HttpResponse, HttpResponseRedirect, HttpRequest
 from django.shortcuts import redirect
 from .forms import OrderForm, OrderSearchForm
+from .idempotency import IDEMPOTENCY_FIELD, MAX_KEY_LENGTH, IdempotencyKeyReused, run_idempotent
 from django.shortcuts import render
 from django.db.models import Sum
 from django.db.models import QuerySet
-from .models import Order
+from django.db.models import F, Count
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Optional
+from .models import Order, OrderItem, OrderVersionConflict, RevenueTotal, RevenueRollup, hour_start, hour_ranges_q, merge_hours, \
+    paid_order_sources
 
-
-def extract_dishes_from_request(request) -> list:
-    """
-    Извлекает данные о блюдах из POST-запроса и преобразует их в список словарей.
-    :param request: POST-запрос
-    :return: Список словарей с названиями и ценами блюд
-    """
-    dish_names, dish_prices = get_dish_data_from_request(request)
-    dish_prices = request.POST.getlist('dish_price')
-    return convert_dish_data_to_list_of_dicts(dish_names=dish_names, dish_prices=dish_prices)
-
-
-def get_dish_data_from_request(request) -> tuple:
-    """
-    Извлекает данные о блюдах из POST-запроса.
-    :param request: POST-запрос
-    :return: Кортеж из двух списков: названия блюд и их цены
-    """
-    dish_names = request.POST.getlist('dish_name')
-    dish_prices = request.POST.getlist('dish_price')
-    return dish_names, dish_prices
-
-
-def convert_dish_data_to_list_of_dicts(dish_names, dish_prices) -> list:
-    """
-    Преобразует списки названий и цен блюд в список словарей.
-    :param dish_names: Список названий блюд
-    :param dish_prices: Список цен блюд
-    :return: Список словарей с названиями и ценами блюд
-    :raises ValueError: Если цена отрицательная
-    """
-    items = []
-
-    for name, price in zip(dish_names, dish_prices):
-        if name and price:
-            items.append({"name": name, "price": float(price)})
-    return items
+REVENUE_BUCKETS = ('hour', 'day', 'week')
 
 
 def create_order_from_form(form, items) -> Order:
@@ -90,20 +62,52 @@ def save_order(order) -> None:
 def handle_post_create_order(request: HttpRequest) -> HttpResponseRedirect:
     """
     Обрабатывает POST-запрос для создания заказа.
+    Если форма содержит ключ идемпотентности, повторная отправка той же формы (например, после обрыва связи)
+    не создает второй заказ, а сразу перенаправляет на список заказов.
     :param request: HTTP-запрос с данными формы.
     :return: Перенаправление на список заказов.
     """
+    key = request.POST.get(IDEMPOTENCY_FIELD)
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return create_order_from_post(request)
+    payload = {
+        name: request.POST.getlist(name) for name in request.POST if name not in ('csrfmiddlewaretoken', IDEMPOTENCY_FIELD)
+    }
+
+    def handler():
+        response = create_order_from_post(request)
+        return response, (response.status_code, {'location': response.url}) if response.status_code == 302 else None
+
+    try:
+        result, replayed = run_idempotent('form-create', key, payload, handler)
+    except IdempotencyKeyReused as e:
+        form = OrderForm(request.POST)
+        form.is_valid()
+        form.add_error(None, str(e))
+        return render(request, 'orders/order_form.html', {'form': form}, status=422)
+    if replayed:
+        status_code, data = result
+        return redirect(data['location'])
+    return result
+
+
+def create_order_from_post(request: HttpRequest) -> HttpResponse:
+    """
+    Проверяет форму и создает заказ.
+    :param request: HTTP-запрос с данными формы.
+    :return: Перенаправление на список заказов или форма с ошибками.
+    """
     form = OrderForm(request.POST)
     if form.is_valid():
         try:
-            items = extract_dishes_from_request(request)
-            create_and_save_order(form, items)
+            create_and_save_order(form, form.cleaned_data['items'])
             return redirect('list_order')
         except ValueError as e:
             form.add_error('dish_price', str(e))
         except ValidationError as e:
             form.add_error('table_number', e)  # Добавляем ошибку в форму
-    return render(request, 'orders/order_form.html', {'form': form})
+    context = {'form': form, 'idempotency_key': request.POST.get(IDEMPOTENCY_FIELD)}
+    return render(request, 'orders/order_form.html', context)
 
 
 def create_and_save_order(form: OrderForm, items: list) -> None:
@@ -124,11 +128,33 @@ def handle_post_edit_order(request: HttpRequest, order: Order) -> redirect:
     """
     form = OrderForm(request.POST, instance=order)
     if form.is_valid():
-        items = extract_dishes_from_request(request)
-        create_and_save_order(form, items)
+        try:
+            create_and_save_order(form, form.cleaned_data['items'])
+        except OrderVersionConflict as conflict:
+            return render_edit_conflict(request, form, order, conflict)
         return redirect('list_order')
     return render(request, 'orders/order_form.html', {'form': form, 'order_id': order.id})
 
+
+def render_edit_conflict(request: HttpRequest, form: OrderForm, order: Order,
+                         conflict: OrderVersionConflict) -> HttpResponse:
+    """
+    Показывает форму редактирования с ошибкой конфликта версий и текущим состоянием заказа (HTTP 409).
+    Скрытое поле версии заменяется на текущую версию: повторная отправка формы сознательно перезапишет заказ.
+    :param request: HTTP-запрос с данными формы.
+    :param form: Проверенная форма с изменениями пользователя.
+    :param order: Редактируемый заказ.
+    :param conflict: Ошибка конфликта версий.
+    :return: Страница формы с ошибкой.
+    """
+    current_order = Order.objects.filter(pk=order.pk).first()
+    form.add_error(None, str(conflict))
+    if current_order is not None:
+        form.data = form.data.copy()
+        form.data['version'] = current_order.version
+    context = {'form': form, 'order_id': order.id, 'current_order': current_order}
+    return render(request, 'orders/order_form.html', context, status=409)
+
 def get_filtered_orders(form: OrderSearchForm) -> QuerySet:
     """
     Фильтрует заказы на основе формы.
@@ -139,20 +165,91 @@ def get_filtered_orders(form: OrderSearchForm) -> QuerySet:
     if form.is_valid():
         table_number = form.cleaned_data.get('table_number')
         status = form.cleaned_data.get('status')
+        dish = form.cleaned_data.get('dish')
         if table_number:
             orders = orders.filter(table_number=table_number)
         if status:
             orders = orders.filter(status=status)
+        if dish:
+            orders = orders.with_dish(dish, prefix=form.cleaned_data.get('dish_match') == 'prefix')
     return orders
 
 
-def calculate_total_revenue() -> float:
+def calculate_total_revenue(start: Optional[datetime] = None, end: Optional[datetime] = None) -> float:
+    """
+    Возвращает выручку по оплаченным заказам.
+    Без периода выручка читается из накопительного итога (без SUM по всем заказам), с периодом -
+    складывается из отчета `get_revenue_report`. В обоих случаях учитываются и заказы в архиве.
+    :param start: Начало периода по времени оплаты (включительно).
+    :param end: Конец периода (не включительно).
+    :return: Выручка.
+    """
+    if start is None and end is None:
+        order_count, total_revenue = RevenueTotal.objects.current()
+        return total_revenue
+    start = start or min(filter(None, (
+        orders.order_by('paid_at').values_list('paid_at', flat=True).first() for orders in paid_order_sources()
+    )), default=None)
+    if start is None:
+        return Decimal('0.00')
+    report = get_revenue_report(start, end or timezone.now(), 'week')
+    return sum((row['total_revenue'] for row in report), Decimal('0.00'))
+
+
+def subtract_ranges(start: datetime, end: datetime,
+                    covered: list[tuple[datetime, datetime]]) -> list[tuple[datetime, datetime]]:
     """
-    Считает общую выручку за смену.
-    :return: Общая выручка.
+    Возвращает части интервала [start, end), не покрытые отсортированными интервалами `covered`.
     """
-    revenue: QuerySet = Order.objects.filter(status='paid').aggregate(total_revenue=Sum('total_price'))
-    return revenue['total_revenue'] or 0
+    gaps, cursor = [], start
+    for covered_start, covered_end in covered:
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def get_revenue_report(start: datetime, end: datetime, bucket: str = 'day') -> list[dict[str, Any]]:
+    """
+    Считает выручку за период по интервалам (час, день или неделя в текущем часовом поясе).
+    Закрытые часы, полностью попадающие в период, читаются из часовых итогов `RevenueRollup`,
+    остальное время (текущий час, края периода, устаревшие итоги) - из оплаченных заказов основной таблицы
+    и архива по индексам времени оплаты.
+    Группировка выполняется в базе (Trunc), интервалы без оплат не возвращаются.
+    :param start: Начало периода по времени оплаты (включительно).
+    :param end: Конец периода (не включительно).
+    :param bucket: Размер интервала: hour, day или week.
+    :return: Список словарей с началом интервала, количеством оплаченных заказов и выручкой.
+    """
+    tzinfo = timezone.get_current_timezone()
+    first_hour = hour_start(start)
+    if first_hour < start:
+        first_hour += timedelta(hours=1)
+    rollups = RevenueRollup.objects.filter(hour__gte=first_hour, hour__lt=hour_start(end), stale=False)
+    covered = merge_hours(rollups.values_list('hour', flat=True))
+
+    periods: dict[datetime, dict[str, Any]] = {}
+    gaps = hour_ranges_q(subtract_ranges(start, end, covered))
+    sources = [
+        orders.filter(gaps).annotate(period=Trunc('paid_at', bucket, tzinfo=tzinfo))
+        .values('period').annotate(order_count=Count('*'), total_revenue=Sum('total_price'))
+        for orders in paid_order_sources()
+    ]
+    if covered:
+        sources.append(
+            rollups.filter(order_count__gt=0).annotate(period=Trunc('hour', bucket, tzinfo=tzinfo))
+            .values('period').annotate(order_count=Sum('order_count'), total_revenue=Sum('total_revenue'))
+        )
+    for source in sources:
+        for row in source:
+            period = periods.setdefault(
+                row['period'], {'period': row['period'], 'order_count': 0, 'total_revenue': Decimal('0.00')}
+            )
+            period['order_count'] += row['order_count']
+            period['total_revenue'] += row['total_revenue']
+    return [periods[period] for period in sorted(periods)]
 
 
 def delete_order_from_db(order: Order) -> None:
@@ -161,3 +258,37 @@ def delete_order_from_db(order: Order) -> None:
     :param order: заказ для удаления.
     """
     order.delete()
+
+
+def get_dish_stats(status: Optional[str] = None) -> QuerySet:
+    """
+    Группирует блюда по названию (GROUP BY по таблице OrderItem).
+    :param status: Учитывать только заказы с этим статусом (None - все заказы).
+    :return: Выборка словарей с названием блюда, количеством порций и суммой.
+    """
+    order_items: QuerySet = OrderItem.objects.all()
+    if status:
+        order_items = order_items.filter(order__status=status)
+    # revenue объявляется раньше quantity, иначе F('quantity') сошлется на агрегат, а не на колонку
+    return order_items.values('name').annotate(
+        revenue=Sum(F('price') * F('quantity')),
+        quantity=Sum('quantity'),
+    )
+
+
+def get_top_dishes(limit: int, status: Optional[str] = None) -> QuerySet:
+    """
+    Возвращает самые продаваемые блюда.
+    :param limit: Количество блюд.
+    :param status: Учитывать только заказы с этим статусом.
+    :return: Блюда, отсортированные по количеству проданных порций.
+    """
+    return get_dish_stats(status).order_by('-quantity', 'name')[:limit]
+
+
+def get_revenue_per_dish() -> QuerySet:
+    """
+    Возвращает выручку по каждому блюду среди оплаченных заказов.
+    :return: Блюда, отсортированные по выручке.
+    """
+    return get_dish_stats('paid').order_by('-revenue', 'name')
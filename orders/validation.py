@@ -0,0 +1,190 @@
+from datetime import datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from numbers import Real
+from typing import Any, Iterable, Optional, Union
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+# Единые правила проверки заказов для всех точек входа: модели (`Order.clean`), API (`OrderSerializer`),
+# HTML-формы (`OrderForm`), пакетного создания и импорта. Блюда сначала проверяются быстрым проходом
+# без сбора ошибок, подробные ошибки по каждому блюду собираются только для невалидного заказа.
+# Проверенный список блюд запоминается в `Order.validated_items`, и `Order.clean` его повторно не проверяет.
+
+ITEMS_EMPTY = "Поле 'items' не может быть пустым."
+ITEM_NOT_OBJECT = 'Блюдо должно быть объектом с полями name и price.'
+PRICE_NOT_POSITIVE = 'Цена блюда не может быть отрицательной или нулевой.'
+PRICE_NOT_NUMBER = 'Цена блюда должна быть числом.'
+NAME_EMPTY = 'Название блюда не может быть пустым.'
+NAME_TOO_LONG = 'Название блюда не может быть длиннее 255 символов.'
+TABLE_NUMBER_INVALID = 'Номер стола не может быть меньше 1'
+TIMESTAMP_INVALID = 'Ожидается дата и время в формате ISO 8601.'
+TOTAL_PRICE_INVALID = 'Сумма заказа должна быть неотрицательным числом не больше 99999999.99.'
+
+# Наибольшая сумма, которая помещается в колонку `Order.total_price` (DecimalField(max_digits=10, decimal_places=2))
+MAX_TOTAL_PRICE = Decimal('99999999.99')
+
+# Длина колонки названия блюда (`OrderItem.name`)
+MAX_NAME_LENGTH = 255
+
+ItemErrors = Union[list[str], dict[int, dict[str, list[str]]]]
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (Real, Decimal)) and not isinstance(value, bool)
+
+
+def _item_is_valid(item: Any) -> bool:
+    """ Быстрая проверка одного блюда без сбора ошибок. """
+    if not isinstance(item, dict):
+        return False
+    name, price = item.get('name'), item.get('price')
+    return (isinstance(name, str) and bool(name.strip()) and len(name) <= MAX_NAME_LENGTH
+            and _is_number(price) and price > 0)
+
+
+def _item_errors(item: Any) -> dict[str, list[str]]:
+    """ Подробные ошибки одного блюда по полям. """
+    if not isinstance(item, dict):
+        return {'non_field_errors': [ITEM_NOT_OBJECT]}
+    errors = {}
+    name, price = item.get('name'), item.get('price')
+    if not isinstance(name, str) or not name.strip():
+        errors['name'] = [NAME_EMPTY]
+    elif len(name) > MAX_NAME_LENGTH:
+        errors['name'] = [NAME_TOO_LONG]
+    if not _is_number(price):
+        errors['price'] = [PRICE_NOT_NUMBER]
+    elif not price > 0:
+        errors['price'] = [PRICE_NOT_POSITIVE]
+    return errors
+
+
+def _total_price_is_valid(value: Any) -> bool:
+    """ Сумма заказа - неотрицательное число (или строка с числом), которое после округления помещается в колонку. """
+    if isinstance(value, bool) or not isinstance(value, (str, int, float, Decimal)):
+        return False
+    try:
+        value = Decimal(str(value).strip()).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    except InvalidOperation:
+        return False
+    return value.is_finite() and 0 <= value <= MAX_TOTAL_PRICE
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """
+    Разбирает время создания или оплаты заказа из импорта (ISO 8601, как в выгрузке `export_orders`).
+    Время без часового пояса считается временем в текущем часовом поясе.
+    :param value: Строка, datetime или пустое значение.
+    :raises ValueError: Если значение не является датой и временем.
+    :return: Время с часовым поясом или None, если значение пустое.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str):
+        parsed = parse_datetime(value.strip())
+    else:
+        parsed = None
+    if parsed is None:
+        raise ValueError(TIMESTAMP_INVALID)
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+def check_items(items: Any) -> ItemErrors:
+    """
+    Проверяет список блюд заказа: список не пустой, у каждого блюда непустое название не длиннее
+    MAX_NAME_LENGTH символов и цена больше нуля.
+    Каждое блюдо проверяется один раз; подробные ошибки собираются только если заказ невалиден.
+    :param items: Список блюд.
+    :return: Пустой список, если блюда валидны; список ошибок, относящихся ко всему списку;
+        или ошибки невалидных блюд по их номерам: `{номер: {'name': [...], 'price': [...]}}`.
+    """
+    if not isinstance(items, list) or not items:
+        return [ITEMS_EMPTY]
+    if all(map(_item_is_valid, items)):
+        return []
+    return {index: errors for index, item in enumerate(items) if (errors := _item_errors(item))}
+
+
+def item_messages(errors: ItemErrors) -> list[str]:
+    """
+    Сводит ошибки `check_items` к списку различных сообщений (для ошибок модели и отчетов импорта).
+    :param errors: Результат `check_items`.
+    :return: Сообщения в порядке первого появления.
+    """
+    if isinstance(errors, list):
+        return errors
+    messages = (message for item_errors in errors.values() for field_errors in item_errors.values()
+                for message in field_errors)
+    return list(dict.fromkeys(messages))
+
+
+def parse_form_items(dish_names: list[str], dish_prices: list[Any]) -> tuple[list[dict[str, Any]], ItemErrors]:
+    """
+    Собирает блюда из полей HTML-формы (`dish_name`, `dish_price`) и проверяет их `check_items`.
+    Цены, которые не являются числом, остаются в блюде как есть и попадают в ошибки.
+    :param dish_names: Названия блюд.
+    :param dish_prices: Цены блюд (строки или числа).
+    :return: Кортеж (блюда, ошибки `check_items`).
+    """
+    items = []
+    for name, price in zip(dish_names, dish_prices):
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            pass
+        items.append({'name': name, 'price': price})
+    return items, check_items(items)
+
+
+def validate_orders(rows: list[dict[str, Any]], statuses: Iterable[str]) -> list[dict[str, Any]]:
+    """
+    Проверяет пачку заказов за один проход по тем же правилам, что и `Order.clean`:
+    непустой список блюд, цена каждого блюда больше нуля, непустое название,
+    допустимый статус и номер стола не меньше 1. Переданная сумма заказа (`total_price`) должна быть
+    неотрицательным числом, которое помещается в колонку; без нее сумма вычисляется по блюдам при сохранении.
+    Переданные время создания и оплаты (`created_at`, `paid_at`) должны разбираться `parse_timestamp`.
+    :param rows: Заказы в виде словарей с ключами `table_number`, `items`, `status` и необязательными
+        `total_price`, `created_at`, `paid_at`.
+    :param statuses: Допустимые статусы.
+    :return: Ошибки каждого заказа по полям (пустой словарь - заказ валиден), ошибки блюд - в формате `check_items`.
+    """
+    statuses = frozenset(statuses)
+    errors = []
+    for row in rows:
+        row_errors = {}
+        table_number = row.get('table_number')
+        if not isinstance(table_number, int) or isinstance(table_number, bool) or table_number < 1:
+            row_errors['table_number'] = [TABLE_NUMBER_INVALID]
+        status = row.get('status')
+        if status not in statuses:
+            row_errors['status'] = [f'Некорректный статус: {status}.']
+        if items_errors := check_items(row.get('items')):
+            row_errors['items'] = items_errors
+        total_price = row.get('total_price')
+        if total_price is not None and not _total_price_is_valid(total_price):
+            row_errors['total_price'] = [TOTAL_PRICE_INVALID]
+        for field in ('created_at', 'paid_at'):
+            try:
+                parse_timestamp(row.get(field))
+            except ValueError:
+                row_errors[field] = [TIMESTAMP_INVALID]
+        errors.append(row_errors)
+    return errors
+
+
+def validate_order_rows(rows: list[dict[str, Any]], statuses: Iterable[str]) -> list[list[str]]:
+    """
+    Проверяет пачку заказов `validate_orders` и сводит ошибки каждого заказа к списку сообщений.
+    :param rows: Заказы в виде словарей с ключами `table_number`, `items`, `status` и необязательными
+        `total_price`, `created_at`, `paid_at`.
+    :param statuses: Допустимые статусы.
+    :return: Список ошибок для каждого заказа (пустой список - заказ валиден).
+    """
+    return [
+        [*row_errors.get('table_number', []), *row_errors.get('status', []),
+         *item_messages(row_errors.get('items', [])), *row_errors.get('total_price', []),
+         *row_errors.get('created_at', []), *row_errors.get('paid_at', [])]
+        for row_errors in validate_orders(rows, statuses)
+    ]
@@ -1,34 +1,59 @@
-from django.http import HttpResponse, HttpResponseRedirect, HttpRequest
+from django.http import HttpResponse, HttpResponseRedirect, HttpRequest, StreamingHttpResponse, Http404
 from django.shortcuts import get_object_or_404, redirect
-from .utils import extract_dishes_from_request, delete_order_from_db, handle_post_create_order, create_and_save_order, \
-    get_filtered_orders, calculate_total_revenue, handle_post_edit_order
+from .utils import delete_order_from_db, handle_post_create_order, create_and_save_order, get_filtered_orders, \
+    calculate_total_revenue, handle_post_edit_order, get_top_dishes, get_revenue_per_dish, get_revenue_report
 from .forms import OrderForm, OrderSearchForm
 from django.shortcuts import render
-from django.db.models import Sum
-from typing import Union
+from typing import Any, Optional, Union
+from decimal import Decimal
+import hashlib
+import uuid
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, quote_etag
 from django.db.models import QuerySet
 from rest_framework import viewsets
-from .models import Order
-from .serializers import OrderSerializer
+from rest_framework import generics
+from .models import Order, ArchivedOrder, OrderVersionConflict, TableTab
+from .serializers import OrderSerializer, DishStatsSerializer, RevenueReportQuerySerializer, RevenueBucketSerializer, \
+    ArchivedOrderSerializer, TableTabSerializer, order_values, serialize_order_rows, \
+    select_order_fields, parse_field_list
+from .pagination import OrderCursorPagination
+from .streaming import paginate_order_versions, stream_order_page
+from .filters import OrderFilter
+from .idempotency import IDEMPOTENCY_HEADER, MAX_KEY_LENGTH, REPLAYED_HEADER, IdempotencyKeyReused, run_idempotent
+from .export import EXPORT_FORMATS
+from .validation import validate_orders
+from .cache import cached, get_cache_stats
+from .routers import read_from_replica
+from .metrics import render_metrics
 from rest_framework import status
+from rest_framework import exceptions
 from rest_framework import filters
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework import serializers
+from django.conf import settings
+from django.core.exceptions import ValidationError
 
 
+@read_from_replica
 def list_order(request: HttpRequest) -> HttpResponse:
     """
-    Отображает на странице список всех заказов с основной информацией.
+    Отображает на странице список заказов с основной информацией.
 
-    Извлекает все заказы из базы данных и передает их в шаблон для отображения.
+    Заказы выводятся постранично (keyset-пагинация по `id`, параметры `cursor` и `page_size`).
+    Состав страницы (id и версии заказов) читается из кэша заказов, страница отдается потоком,
+    а строки заказов берутся из кэша строк по версии заказа.
 
     :param request: HTTP-запрос, содержащий информацию о текущем запросе пользователя.
-    :return: Отображение страницы, содержащей список всех заказов.
+    :return: Потоковое отображение одной страницы списка заказов.
     """
     orders: QuerySet = Order.objects.all()
-    return render(request, 'orders/order_list.html', {'orders': orders})
+    page = cached('list', [request.get_host(), request.get_full_path()],
+                  lambda: paginate_order_versions(request, orders))
+    return stream_order_page(request, 'orders/order_list.html', 'orders/order_list_row.html', page, orders.db)
 
 
 def create_order(request: HttpRequest) -> Union[HttpResponseRedirect, HttpResponse]:
@@ -41,7 +66,7 @@ def create_order(request: HttpRequest) -> Union[HttpResponseRedirect, HttpRespon
         return handle_post_create_order(request)
     else:
         form = OrderForm()
-    return render(request, 'orders/order_form.html', {'form': form})
+    return render(request, 'orders/order_form.html', {'form': form, 'idempotency_key': uuid.uuid4().hex})
 
 
 def edit_order(request: HttpRequest, pk: int) -> HttpResponse:
@@ -70,27 +95,60 @@ def delete_order(request: HttpRequest, pk: int) -> HttpResponseRedirect:
     return redirect('list_order')
 
 
+@read_from_replica
 def search_order(request: HttpRequest) -> HttpResponse:
     """
-    Поиск заказов по фильтрам.
+    Поиск заказов по фильтрам. Результаты отдаются потоком, как и список заказов.
     :param request: HTTP-запрос с параметрами поиска.
-    :return: Отображение результатов поиска.
+    :return: Потоковое отображение результатов поиска.
     """
     form = OrderSearchForm(request.GET or None)
     orders: QuerySet = get_filtered_orders(form)
-    return render(request, 'orders/order_search.html', {'form': form, 'orders': orders})
+    page = cached('search', [request.get_host(), request.get_full_path()],
+                  lambda: paginate_order_versions(request, orders))
+    return stream_order_page(request, 'orders/order_search.html', 'orders/order_search_row.html',
+                             {'form': form, **page}, orders.db)
 
 
+@read_from_replica
 def calculate_revenue(request: HttpRequest) -> HttpResponse:
     """
     Рассчитывает выручку за смену (заказы со статусом "оплачено").
     :param request: HTTP-запрос.
     :return: Отображение общей выручки.
     """
-    total_revenue = calculate_total_revenue()
+    total_revenue = cached('revenue', [], calculate_total_revenue)
     return render(request, 'orders/revenue.html', {'total_revenue': total_revenue})
 
 
+def table_board(request: HttpRequest) -> HttpResponse:
+    """
+    Отображает открытые счета столов: количество неоплаченных заказов, сумму к оплате,
+    самый старый заказ в ожидании и статусы заказов. Читается одной выборкой из `TableTab`.
+    :param request: HTTP-запрос.
+    :return: Отображение открытых счетов столов.
+    """
+    return render(request, 'orders/table_board.html', {'tabs': TableTab.objects.order_by('table_number')})
+
+
+def metrics(request: HttpRequest) -> HttpResponse:
+    """
+    Отдает метрики запросов процесса в текстовом формате Prometheus.
+    :param request: HTTP-запрос.
+    :return: Текст метрик или 404, если сбор метрик отключен.
+    """
+    if not settings.ORDERS_METRICS_ENABLED:
+        raise Http404
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class PreconditionFailed(exceptions.APIException):
+    """ `If-Match` передан в верном формате, но не указывает на изменяемый заказ. """
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'If-Match не соответствует ETag изменяемого заказа.'
+    default_code = 'precondition_failed'
+
+
 # ViewSet для API
 class OrderViewSet(viewsets.ModelViewSet):
     """
@@ -98,18 +156,218 @@ class OrderViewSet(viewsets.ModelViewSet):
 
     Позволяет:
     - Создавать заказы
-    - Обновлять заказы
+    - Обновлять заказы (с проверкой версии: `If-Match` или поле `version`)
     - Удалять заказы
-    - Искать и фильтровать заказы по номеру столика и статусу
+    - Искать и фильтровать заказы по номеру столика, статусу и названию блюда
     - Получать общую выручку от оплаченных заказов
     """
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    pagination_class = OrderCursorPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    filterset_fields = ['table_number', 'status']
+    filterset_class = OrderFilter
     search_fields = ['table_number', 'status']
 
+    @read_from_replica
+    def list(self, request, *args, **kwargs) -> HttpResponse:
+        """
+        Список заказов с учетом фильтров и курсора, читается из кэша заказов.
+
+        ETag строится по парам (`id`, `version`) заказов страницы без чтения `items` и без сериализации,
+        поэтому на `If-None-Match` с тем же ETag сразу отдается 304.
+
+        Параметры `fields`, `exclude` и `projection=summary` ограничивают поля ответа, невыбранные колонки
+        не читаются из базы. С параметром `ids=1,2,3` возвращаются заказы с этими ID одним запросом
+        (`{"results": [...], "missing": [...]}` в порядке `ids`, без пагинации).
+        """
+        fields = self.get_order_fields()
+        ids = self.get_requested_ids()
+        cache_key = [request.get_host(), request.get_full_path(), request.META.get('HTTP_ACCEPT')]
+        etag = cached('api-list-etag', cache_key, lambda: self.get_list_etag(request, fields, ids))
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        if ids is None:
+            data = cached('api-list', cache_key, lambda: self.get_list_data(request, fields))
+        else:
+            data = cached('api-multi', cache_key, lambda: self.get_multi_data(ids, fields))
+        return Response(data, headers={'ETag': etag})
+
+    def retrieve(self, request, *args, **kwargs) -> HttpResponse:
+        """
+        Один заказ по ID, читается из кэша заказов. Поля ответа ограничиваются так же, как в списке.
+
+        Отвечает 304 на `If-None-Match` / `If-Modified-Since`, если версия заказа не изменилась.
+        """
+        pk = kwargs[self.lookup_field]
+        fields = self.get_order_fields()
+        state = cached('api-detail-etag', [pk], lambda: self.get_detail_state(pk))
+        headers = {}
+        if state is not None:
+            version, updated_at = state
+            headers = {'ETag': quote_etag(f'{pk}-{version}'), 'Last-Modified': http_date(updated_at.timestamp())}
+            not_modified = get_conditional_response(
+                request, etag=headers['ETag'], last_modified=int(updated_at.timestamp())
+            )
+            if not_modified is not None:
+                return not_modified
+        data = cached('api-detail', [pk, *fields], lambda: self.get_detail_data(pk, fields))
+        return Response(data, headers=headers)
+
+    def get_order_fields(self) -> 'list[str]':
+        """
+        Поля ответа по параметрам запроса `fields`, `exclude` и `projection`.
+        :raises serializers.ValidationError: Если параметры заданы неверно.
+        """
+        params = self.request.query_params
+        return select_order_fields(params.get('fields'), params.get('exclude'), params.get('projection'))
+
+    def get_requested_ids(self) -> 'Optional[list[int]]':
+        """
+        Разбирает параметр `ids` (ID заказов через запятую, не больше ORDERS_MAX_PAGE_SIZE).
+        :raises serializers.ValidationError: Если ID не являются положительными целыми числами или их слишком много.
+        :return: ID без повторов в порядке запроса или None, если параметр не передан.
+        """
+        value = self.request.query_params.get('ids')
+        if value is None:
+            return None
+        ids = parse_field_list(value)
+        if not ids or not all(pk.isdecimal() and int(pk) > 0 for pk in ids):
+            raise serializers.ValidationError({'ids': 'Ожидаются ID заказов через запятую.'})
+        ids = list(dict.fromkeys(map(int, ids)))
+        if len(ids) > settings.ORDERS_MAX_PAGE_SIZE:
+            raise serializers.ValidationError({'ids': f'Не больше {settings.ORDERS_MAX_PAGE_SIZE} ID за запрос.'})
+        return ids
+
+    def get_list_data(self, request, fields: 'Optional[list[str]]' = None) -> dict[str, Any]:
+        """
+        Читает страницу списка через `values()` и сериализует ее без `OrderSerializer`
+        (со всеми полями результат совпадает с ответом `ModelViewSet.list`).
+        """
+        page = self.paginate_queryset(order_values(self.filter_queryset(self.get_queryset()), fields))
+        return self.get_paginated_response(serialize_order_rows(page)).data
+
+    def get_multi_data(self, ids: 'list[int]', fields: 'Optional[list[str]]' = None) -> dict[str, Any]:
+        """
+        Читает заказы с переданными ID одним запросом `IN` (с учетом фильтров списка).
+        :return: Словарь `results` (заказы в порядке `ids`) и `missing` (ID, которых нет).
+        """
+        queryset = order_values(self.filter_queryset(self.get_queryset()).filter(pk__in=ids).order_by(), fields)
+        rows = {row['id']: row for row in serialize_order_rows(list(queryset))}
+        return {
+            'results': [rows[pk] for pk in ids if pk in rows],
+            'missing': [pk for pk in ids if pk not in rows],
+        }
+
+    def get_detail_data(self, pk: str, fields: 'Optional[list[str]]' = None) -> dict[str, Any]:
+        """
+        Читает заказ через `values()` и сериализует его без `OrderSerializer`
+        (со всеми полями результат совпадает с ответом `ModelViewSet.retrieve`).
+        :raises Http404: Если заказа нет.
+        """
+        queryset = order_values(self.filter_queryset(self.get_queryset()), fields)
+        row = generics.get_object_or_404(queryset, **{self.lookup_field: pk})
+        return serialize_order_rows([row])[0]
+
+    def get_list_etag(self, request, fields: 'list[str]', ids: 'Optional[list[int]]' = None) -> str:
+        """
+        Вычисляет ETag страницы списка по версиям заказов на ней, ссылкам на соседние страницы и полям ответа.
+        :return: ETag в кавычках.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        if ids is None:
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(queryset.only('id', 'version'), request, view=self)
+            orders = [(order.id, order.version) for order in page]
+            links = (paginator.get_next_link(), paginator.get_previous_link())
+        else:
+            orders = sorted(queryset.filter(pk__in=ids).values_list('id', 'version').order_by())
+            links = (ids,)
+        fingerprint = (orders, *links, fields, request.META.get('HTTP_ACCEPT'))
+        return quote_etag(hashlib.md5(repr(fingerprint).encode()).hexdigest())
+
+    @staticmethod
+    def get_detail_state(pk: str) -> Optional[tuple]:
+        """
+        Читает версию и время изменения заказа без остальных колонок.
+        :return: Кортеж (version, updated_at) или None, если заказа нет.
+        """
+        if not str(pk).isdecimal():
+            return None
+        return Order.objects.filter(pk=pk).values_list('version', 'updated_at').first()
+
+    def update(self, request, *args, **kwargs) -> HttpResponse:
+        """
+        Изменяет заказ (PUT/PATCH) с оптимистичной блокировкой.
+
+        Версия, с которой начиналось редактирование, передается заголовком `If-Match` с ETag заказа
+        или полем `version`. Если заказ успел измениться, изменения не сохраняются и возвращается 409
+        с текущим состоянием заказа. Без версии заказ перезаписывается как раньше.
+        """
+        try:
+            return super().update(request, *args, **kwargs)
+        except OrderVersionConflict as conflict:
+            current = Order.objects.filter(pk=kwargs[self.lookup_field]).first()
+            return Response(
+                {'detail': str(conflict), 'current': self.get_serializer(current).data if current else None},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+    def perform_update(self, serializer) -> None:
+        serializer.instance.expected_version = self.get_expected_version(serializer.instance)
+        serializer.save()
+
+    def get_expected_version(self, order: Order) -> Optional[int]:
+        """
+        Возвращает версию заказа из заголовка `If-Match` (ETag вида `"<id>-<version>"`) или из поля `version`.
+        :raises serializers.ValidationError: Если версия передана в неверном формате.
+        :raises PreconditionFailed: Если ETag в `If-Match` относятся к другим заказам.
+        """
+        if_match = self.request.headers.get('If-Match')
+        if if_match and if_match.strip() != '*':
+            etags = [etag.removeprefix('W/').strip('"').partition('-') for etag in parse_etags(if_match)]
+            etags = [(pk, version) for pk, _, version in etags if pk.isdecimal() and version.isdecimal()]
+            if not etags:
+                raise serializers.ValidationError({'If-Match': 'Ожидается ETag заказа вида "<id>-<version>".'})
+            for pk, version in etags:
+                if int(pk) == order.pk:
+                    return int(version)
+            raise PreconditionFailed
+        version = self.request.data.get('version')
+        if version is None:
+            return None
+        if isinstance(version, bool) or not str(version).isdecimal():
+            raise serializers.ValidationError({'version': 'Ожидается целое число.'})
+        return int(version)
+
     def create(self, request, *args, **kwargs):
+        """
+        Создает заказ. С заголовком `Idempotency-Key` повтор запроса с тем же ключом
+        возвращает ответ первого запроса (с заголовком `Idempotent-Replayed: true`) без повторного создания.
+        """
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return self.validate_and_create(request)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'detail': f'{IDEMPOTENCY_HEADER}: ожидается непустая строка не длиннее {MAX_KEY_LENGTH} символов.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        def handler():
+            response = self.validate_and_create(request)
+            return response, (response.status_code, response.data) if response.status_code == 201 else None
+
+        try:
+            result, replayed = run_idempotent('api-create', key, request.data, handler)
+        except IdempotencyKeyReused as e:
+            return Response({'detail': str(e)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if replayed:
+            status_code, data = result
+            return Response(data, status=status_code, headers={REPLAYED_HEADER: 'true'})
+        return result
+
+    def validate_and_create(self, request) -> Response:
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             return self.create_order(serializer)
@@ -126,14 +384,260 @@ class OrderViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=['post'])
+    def batch(self, request) -> Response:
+        """
+        Пакетное создание заказов (синхронизация очереди заказов с планшетов).
+
+        Принимает список заказов или объект `{"orders": [...], "mode": "atomic" | "partial"}`.
+        Весь пакет проверяется за один проход `validate_orders`, как при импорте, `total_price` вычисляется
+        для каждого заказа, а сохранение выполняется одним `bulk_create` в одной транзакции.
+        - `atomic` (по умолчанию): при любой ошибке не создается ни один заказ (400).
+        - `partial`: создаются только валидные заказы (207, если часть заказов отклонена).
+
+        :return: JSON-ответ с результатом по каждому заказу.
+        """
+        payload = request.data
+        orders_data = payload.get('orders') if isinstance(payload, dict) else payload
+        mode = (payload.get('mode') if isinstance(payload, dict) else None) or request.query_params.get('mode', 'atomic')
+        if not isinstance(orders_data, list) or not orders_data:
+            return Response({'detail': 'Ожидается непустой список заказов.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(orders_data) > settings.ORDERS_BATCH_MAX_SIZE:
+            return Response(
+                {'detail': f'В пакете не может быть больше {settings.ORDERS_BATCH_MAX_SIZE} заказов.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if mode not in ('atomic', 'partial'):
+            return Response({'detail': f'Некорректный режим: {mode}.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # принимаются только поля, которые записывает OrderSerializer; total_price все равно вычисляется по блюдам
+        rows = [
+            {field: order_data.get(field) for field in ('table_number', 'status', 'items')}
+            if isinstance(order_data, dict) else None
+            for order_data in orders_data
+        ]
+        row_errors = validate_orders([row or {} for row in rows], dict(Order.STATUS_CHOICES))
+        results = []
+        valid = []
+        for index, (row, errors) in enumerate(zip(rows, row_errors)):
+            if row is None:
+                errors = {api_settings.NON_FIELD_ERRORS_KEY: ['Ожидается объект заказа.']}
+            if errors:
+                results.append({'index': index, 'status': 'invalid', 'errors': errors})
+            else:
+                valid.append((index, row))
+                results.append({'index': index, 'status': 'valid'})
+
+        failed = len(orders_data) - len(valid)
+        if failed and (mode == 'atomic' or not valid):
+            return Response(
+                {'mode': mode, 'created': 0, 'failed': failed, 'results': results},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # total_price вычисляется по ценам блюд внутри bulk_create, как и в OrderSerializer.create;
+        # сериализатор только отдает созданные заказы
+        created = Order.objects.bulk_create([Order(**row, total_price=None) for _, row in valid])
+        for (index, _), order in zip(valid, created):
+            results[index] = {'index': index, 'status': 'created', 'order': self.get_serializer(order).data}
+        return Response(
+            {'mode': mode, 'created': len(created), 'failed': failed, 'results': results},
+            status=status.HTTP_207_MULTI_STATUS if failed else status.HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_status(self, request) -> Response:
+        """
+        Массово переводит заказы в новый статус (например, закрытие смены: все заказы в `paid`).
+
+        Тело запроса: `{"status": "paid", "ids": [...]}` или `{"status": "paid", "filter": {"table_number": 3}}`.
+        Выполняется одним UPDATE, накопительный итог выручки обновляется в той же транзакции.
+
+        :return: JSON-ответ с количеством измененных заказов.
+        """
+        orders = self.get_bulk_queryset(request)
+        try:
+            updated = orders.set_status(request.data.get('status'))
+        except ValidationError as e:
+            return Response({'status': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'updated': updated})
+
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def bulk_delete(self, request) -> Response:
+        """
+        Массово удаляет заказы по списку `ids` или по фильтру `filter` (`table_number`, `status`).
+
+        Выполняется одним DELETE, накопительный итог выручки обновляется в той же транзакции.
+
+        :return: JSON-ответ с количеством удаленных заказов.
+        """
+        orders = self.get_bulk_queryset(request)
+        _, deleted = orders.delete()
+        return Response({'deleted': deleted.get(Order._meta.label, 0)})
+
+    def get_bulk_queryset(self, request) -> QuerySet:
+        """
+        Возвращает выборку заказов для массовой операции по `ids` или по фильтру `filter`.
+
+        Фильтр разбирается тем же FilterSet, что и параметры списка заказов.
+
+        :raises serializers.ValidationError: Если тело запроса не объект, не передано ни `ids`, ни непустого `filter`,
+            или они некорректны.
+        """
+        if not isinstance(request.data, dict):
+            raise serializers.ValidationError({'detail': 'Тело запроса должно быть JSON-объектом.'})
+        ids = request.data.get('ids')
+        filters = request.data.get('filter')
+        if ids:
+            if not isinstance(ids, list) or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+                raise serializers.ValidationError({'ids': 'Ожидается список идентификаторов заказов.'})
+            return Order.objects.filter(pk__in=ids)
+        if filters:
+            if not isinstance(filters, dict) or not set(filters) <= set(self.filterset_class.base_filters):
+                raise serializers.ValidationError(
+                    {'filter': f'Допустимые поля фильтра: {", ".join(self.filterset_class.base_filters)}.'}
+                )
+            filterset = self.filterset_class(data=filters, queryset=Order.objects.all(), request=request)
+            if not filterset.is_valid():
+                raise serializers.ValidationError({'filter': filterset.errors})
+            return filterset.qs
+        raise serializers.ValidationError({'detail': 'Нужно передать список ids или непустой filter.'})
+
+    @action(detail=False, methods=['get'], url_path='top-dishes')
+    @read_from_replica
+    def top_dishes(self, request) -> Response:
+        """
+        Возвращает самые продаваемые блюда (`?limit=10`, `?status=paid`).
+
+        Считается одним GROUP BY по таблице блюд без разбора JSON заказов.
+        Учитываются только заказы основной таблицы, без архива.
+
+        :return: JSON-ответ со списком блюд, количеством порций и суммой.
+        """
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), 100)
+        except ValueError:
+            return Response({'limit': 'Ожидается целое число.'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'limit': 'Должно быть больше 0.'}, status=status.HTTP_400_BAD_REQUEST)
+        order_status = request.query_params.get('status')
+        if order_status and order_status not in dict(Order.STATUS_CHOICES):
+            return Response({'status': f'Некорректный статус: {order_status}.'}, status=status.HTTP_400_BAD_REQUEST)
+        dishes = get_top_dishes(limit, order_status)
+        return Response(DishStatsSerializer(dishes, many=True).data)
+
+    @action(detail=False, methods=['get'], url_path='dish-revenue')
+    @read_from_replica
+    def dish_revenue(self, request) -> Response:
+        """
+        Возвращает выручку по каждому блюду среди оплаченных заказов основной таблицы (без архива).
+
+        :return: JSON-ответ со списком блюд, отсортированным по выручке.
+        """
+        return Response(DishStatsSerializer(get_revenue_per_dish(), many=True).data)
+
+    @action(detail=False, methods=['get'])
+    @read_from_replica
+    def export(self, request) -> Union[StreamingHttpResponse, Response]:
+        """
+        Потоковая выгрузка заказов в CSV или NDJSON (`?fmt=csv|ndjson`).
+
+        Поддерживает те же фильтры `table_number` и `status`, что и список заказов.
+        Выгружаются заказы основной таблицы, архивные заказы читаются через API архива.
+        Строки читаются серверным курсором пачками, поэтому память не растет с числом заказов.
+
+        :return: Потоковый ответ с файлом выгрузки.
+        """
+        export_format = request.query_params.get('fmt', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'fmt': f'Допустимые форматы: {", ".join(EXPORT_FORMATS)}.'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        iter_rows, content_type = EXPORT_FORMATS[export_format]
+        queryset = self.filter_queryset(self.get_queryset())
+        # Строки читаются уже после выхода из представления, поэтому база выбирается сейчас
+        queryset = queryset.using(queryset.db)
+        response = StreamingHttpResponse(iter_rows(queryset), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="orders.{export_format}"'
+        return response
+
     @action(detail=False, methods=['get'])
-    def revenue(self) -> Response:
+    @read_from_replica
+    def revenue(self, request) -> Response:
         """
         Возвращает общую сумму выручки за оплаченные заказы.
 
-        Выручка рассчитывается на основе всех заказов, имеющих статус `paid`.
+        Выручка читается из накопительного итога, который обновляется при каждом изменении заказов
+        и включает заказы, перенесенные в архив.
 
         :return: JSON-ответ с суммарной выручкой.
         """
-        revenue = Order.objects.filter(status='paid').aggregate(total_revenue=Sum('total_price'))
-        return Response({'total_revenue': revenue['total_revenue'] or 0})
+        return Response({'total_revenue': cached('revenue', [], calculate_total_revenue)})
+
+    @action(detail=False, methods=['get'], url_path='revenue-report')
+    @read_from_replica
+    def revenue_report(self, request) -> Response:
+        """
+        Возвращает выручку за период по интервалам (`?start=...&end=...&bucket=hour|day|week`).
+
+        Период задается по времени оплаты (по умолчанию - текущий день), закрытые часы
+        читаются из часовых итогов, поэтому отчеты за прошлые периоды не сканируют заказы.
+
+        :return: JSON-ответ с интервалами и итогом за период.
+        """
+        params = RevenueReportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        report = get_revenue_report(**params.validated_data)
+        return Response({
+            'start': params.data['start'],
+            'end': params.data['end'],
+            'bucket': params.validated_data['bucket'],
+            'order_count': sum(row['order_count'] for row in report),
+            'total_revenue': RevenueBucketSerializer().fields['total_revenue'].to_representation(
+                sum((row['total_revenue'] for row in report), Decimal('0.00'))
+            ),
+            'results': RevenueBucketSerializer(report, many=True).data,
+        })
+
+    @action(detail=False, methods=['get'], url_path='cache-stats')
+    def cache_stats(self, request) -> Response:
+        """
+        Возвращает счетчики попаданий, промахов и инвалидаций кэша заказов в текущем процессе.
+
+        :return: JSON-ответ со счетчиками.
+        """
+        return Response(get_cache_stats())
+
+
+class ArchivedOrderViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet для чтения архива заказов (оплаченные заказы закрытых смен, см. команду `archive_orders`).
+
+    Позволяет:
+    - Получать архивные заказы постранично (keyset-пагинация по `id`)
+    - Фильтровать по номеру столика и времени оплаты (`paid_at__gte`, `paid_at__lt`)
+    - Получать архивный заказ по ID
+    """
+    queryset = ArchivedOrder.objects.all()
+    serializer_class = ArchivedOrderSerializer
+    pagination_class = OrderCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = {'table_number': ['exact'], 'paid_at': ['gte', 'lt']}
+
+    @read_from_replica
+    def list(self, request, *args, **kwargs) -> HttpResponse:
+        return super().list(request, *args, **kwargs)
+
+
+class TableTabViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet для открытых счетов столов (только чтение).
+
+    Позволяет:
+    - Получать счета всех столов с неоплаченными заказами одним запросом к `TableTab`
+    - Получать счет стола по номеру
+    """
+    queryset = TableTab.objects.order_by('table_number')
+    serializer_class = TableTabSerializer
+    pagination_class = None
+    lookup_field = 'table_number'